@@ -0,0 +1,69 @@
+// Native lexer microbenchmark: reports raw slovorez_lexer_next throughput.
+//
+//   cmake .. -DSLOVOREZ_BUILD_BENCH=ON && cmake --build . --target slovorez_lexer_bench
+//   ./slovorez_lexer_bench ../text.txt [iterations]
+
+#include <chrono>
+#include <cstdio>
+#include <cstdlib>
+#include <vector>
+
+#include "../text_lexer.h"
+
+int main(int argc, char** argv)
+{
+    if (argc < 2)
+    {
+        fprintf(stderr, "usage: %s <file> [iterations]\n", argv[0]);
+        return 1;
+    }
+    const int iterations = argc > 2 ? atoi(argv[2]) : 5;
+
+    FILE* f = fopen(argv[1], "rb");
+    if (f == nullptr)
+    {
+        fprintf(stderr, "cannot open %s\n", argv[1]);
+        return 1;
+    }
+    std::vector<unsigned char> data;
+    unsigned char block[1 << 16];
+    size_t got;
+    while ((got = fread(block, 1, sizeof(block), f)) > 0)
+    {
+        data.insert(data.end(), block, block + got);
+    }
+    fclose(f);
+
+    double best = 0.0;
+    size_t tokens = 0;
+    size_t token_bytes = 0;
+    for (int it = 0; it < iterations; ++it)
+    {
+        LexerContext lctx;
+        slovorez_lexer_init(&lctx);
+        size_t pos = 0;
+        tokens = 0;
+        token_bytes = 0;
+
+        auto t0 = std::chrono::steady_clock::now();
+        while (slovorez_lexer_next(&lctx, data.data(), data.size(), &pos, true))
+        {
+            tokens++;
+            token_bytes += lctx.rtoken.bytes;
+        }
+        if (slovorez_lexer_token_flush(&lctx))
+        {
+            tokens++;
+            token_bytes += lctx.rtoken.bytes;
+        }
+        const double dt = std::chrono::duration<double>(std::chrono::steady_clock::now() - t0).count();
+        if (it == 0 || dt < best)
+        {
+            best = dt;
+        }
+    }
+
+    printf("input: %zu bytes, tokens: %zu (%zu bytes)\n", data.size(), tokens, token_bytes);
+    printf("best of %d: %.3f s, %.1f MB/s\n", iterations, best, data.size() / best / 1e6);
+    return 0;
+}
@@ -0,0 +1,86 @@
+#ifndef SLOVOREZ_CHAR_ENCODER_H
+#define SLOVOREZ_CHAR_ENCODER_H
+
+#include <algorithm>
+#include <cstdint>
+#include <unordered_map>
+#include <vector>
+#include "utf8_decoder.h"
+
+// Code points below this limit are looked up in a flat table; the rest
+// (rare in Russian text) fall back to a hash map.
+constexpr uint32_t CHAR_ENCODER_DENSE_LIMIT = 0x800;
+
+class CharEncoder {
+private:
+    std::vector<int32_t> dense;
+    std::unordered_map<uint32_t, int32_t> sparse;
+    int32_t unk_id;
+    int32_t pad_id;
+    size_t maxlen;
+    size_t pad_context;
+
+public:
+    CharEncoder(size_t maxlen, int32_t unk_id, int32_t pad_id, size_t pad_context = 0)
+        : dense(CHAR_ENCODER_DENSE_LIMIT, unk_id), unk_id(unk_id), pad_id(pad_id), maxlen(maxlen), pad_context(pad_context) {}
+
+    void add(uint32_t cp, int32_t id)
+    {
+        if (cp < CHAR_ENCODER_DENSE_LIMIT)
+        {
+            this->dense[cp] = id;
+        }
+        else
+        {
+            this->sparse[cp] = id;
+        }
+    }
+
+    inline int32_t lookup(uint32_t cp) const
+    {
+        if (cp < CHAR_ENCODER_DENSE_LIMIT)
+        {
+            return this->dense[cp];
+        }
+        auto it = this->sparse.find(cp);
+        return it == this->sparse.end() ? this->unk_id : it->second;
+    }
+
+    inline int32_t get_pad_id() const
+    {
+        return this->pad_id;
+    }
+
+    inline size_t get_maxlen() const
+    {
+        return this->maxlen;
+    }
+
+    inline size_t get_pad_context() const
+    {
+        return this->pad_context;
+    }
+
+    // Matrix width for a batch whose longest word has `longest` chars: the
+    // model must see `pad_context` pad positions after every word, as in
+    // training, or its last chars are tagged differently.
+    inline size_t batch_width(size_t longest) const
+    {
+        return std::min(longest + this->pad_context, this->maxlen);
+    }
+
+    // Writes at most `width` char ids of a UTF-8 span into `row` and returns
+    // how many were written. The rest of the row is left untouched (padding).
+    inline size_t encode_utf8(const unsigned char* s, size_t n, int32_t* row, size_t width) const
+    {
+        size_t i = 0;
+        size_t k = 0;
+        while (i < n && k < width)
+        {
+            row[k++] = this->lookup(slovorez_utf8_decode(s, n, i));
+        }
+        return k;
+    }
+};
+
+#endif // SLOVOREZ_CHAR_ENCODER_H
@@ -1,11 +1,35 @@
+#include <algorithm>
+#include <condition_variable>
 #include <cstdio>
 #include <cstring>
+#include <deque>
+#include <mutex>
+#include <stdexcept>
 #include <string>
+#include <thread>
+#include <vector>
+
+#if !defined(_WIN32)
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#define SLOVOREZ_HAS_MMAP 1
+#endif
+
+#if defined(_WIN32)
+#define slovorez_fseek _fseeki64
+#define slovorez_ftell _ftelli64
+#else
+#define slovorez_fseek fseeko
+#define slovorez_ftell ftello
+#endif
 
 #include <pybind11/pybind11.h>
 #include <pybind11/numpy.h>
 
 #include "text_lexer.h"
+#include "char_encoder.h"
 
 namespace py = pybind11;
 using namespace py::literals;
@@ -13,228 +37,1153 @@ using namespace py::literals;
 constexpr size_t DEFAULT_BATCH_SIZE = 65536;
 constexpr size_t DEFAULT_TOKEN_MIN_LEN = 0;
 constexpr size_t DEFAULT_TOKEN_MAX_LEN = 512;
+constexpr size_t DEFAULT_READ_BLOCK_SIZE = 1 << 20;
+constexpr size_t DEFAULT_STREAM_QUEUE_SIZE = 8;
+// Initial size of a batch buffer; both parts grow with the output.
+constexpr size_t DEFAULT_BATCH_TOKENS = 1024;
+constexpr size_t DEFAULT_BATCH_STR_SIZE = 1 << 16;
 
-class FromTextSentencer {
-private:
+// Slot of the per-batch dedup table. A slot is live only when its generation
+// matches the current batch, so the table never has to be cleared.
+typedef struct DedupSlot {
+    uint32_t gen;
+    uint32_t token;
+} DedupSlot;
+
+static inline uint64_t slovorez_fnv1a(const unsigned char* s, size_t n)
+{
+    uint64_t h = 0xCBF29CE484222325ULL;
+    for (size_t i = 0; i < n; ++i)
+    {
+        h = (h ^ s[i]) * 0x100000001B3ULL;
+    }
+    return h;
+}
+
+// One batch of lexer output. Sentencers own two of them, so that one can be
+// filled in the background while Python reads the other.
+typedef struct BatchBuffer {
+    char* str = nullptr;
+    TokenType* types = nullptr;
+    int64_t* offsets = nullptr;
+    uint32_t* counts = nullptr;
+    size_t capacity = 0;
+    size_t str_capacity = 0;
+    size_t str_size = 0;
+    size_t token_idx = 0;
+    bool nul_separated = true;
+
+    void resize(size_t tokens)
+    {
+        this->capacity = tokens;
+        this->types = (TokenType*)realloc(this->types, tokens * sizeof(TokenType));
+        this->offsets = (int64_t*)realloc(this->offsets, (tokens + 1) * sizeof(int64_t));
+        this->counts = (uint32_t*)realloc(this->counts, tokens * sizeof(uint32_t));
+    }
+
+    // Grows the token arrays to hold `tokens` tokens.
+    void reserve(size_t tokens)
+    {
+        if (tokens > this->capacity)
+        {
+            this->resize(tokens);
+        }
+    }
+
+    // Makes room for one more token of `bytes` bytes plus its separator.
+    // Token arrays double up to `batch_size`, the text doubles on demand.
+    inline void reserve_token(size_t bytes, size_t batch_size)
+    {
+        if (this->token_idx == this->capacity)
+        {
+            this->reserve(std::min(batch_size, 2 * this->capacity));
+        }
+        this->reserve_str(this->str_size + bytes + 1);
+    }
+
+    // Called before the buffer is refilled, when views of the previous batch
+    // are no longer valid. Drops token slots above `batch_size` and text
+    // capacity the previous batch used less than a quarter of.
+    void fit(size_t batch_size)
+    {
+        const size_t limit = std::max<size_t>(1, batch_size);
+        if (this->capacity > limit)
+        {
+            this->resize(limit);
+        }
+        this->reserve(std::min(limit, DEFAULT_BATCH_TOKENS));
+        const size_t used = this->str_size;
+        if (this->str_capacity > DEFAULT_BATCH_STR_SIZE && this->str_capacity > 4 * used)
+        {
+            this->str_capacity = std::max(DEFAULT_BATCH_STR_SIZE, 2 * used);
+            this->str = (char*)realloc(this->str, this->str_capacity * sizeof(char));
+        }
+        this->reserve_str(DEFAULT_BATCH_STR_SIZE);
+    }
+
+    size_t allocated_bytes() const
+    {
+        return this->str_capacity
+            + this->capacity * (sizeof(TokenType) + sizeof(int64_t) + sizeof(uint32_t))
+            + (this->offsets != nullptr ? sizeof(int64_t) : 0);
+    }
+
+    void reserve_str(size_t size)
+    {
+        if (size <= this->str_capacity)
+        {
+            return;
+        }
+        this->str_capacity = std::max(size, 2 * this->str_capacity);
+        this->str = (char*)realloc(this->str, this->str_capacity * sizeof(char));
+    }
+
+    void reset(bool nul_separated)
+    {
+        this->str_size = 0;
+        this->token_idx = 0;
+        this->offsets[0] = 0;
+        this->nul_separated = nul_separated;
+    }
+
+    inline size_t token_bytes(size_t t) const
+    {
+        return (size_t)(this->offsets[t + 1] - this->offsets[t]) - (this->nul_separated ? 1 : 0);
+    }
+
+    // Converts between the NUL-separated and the columnar layout in place.
+    // Only needed when a prefetched batch was lexed for the other format.
+    void set_format(bool nul_separated)
+    {
+        if (nul_separated == this->nul_separated)
+        {
+            return;
+        }
+        const size_t n = this->token_idx;
+        if (nul_separated)
+        {
+            this->reserve_str(this->str_size + n);
+            for (size_t t = n; t-- > 0;)
+            {
+                const int64_t start = this->offsets[t];
+                const size_t len = (size_t)(this->offsets[t + 1] - start);
+                memmove(this->str + start + t, this->str + start, len);
+                this->str[start + t + len] = '\0';
+                this->offsets[t + 1] += (int64_t)(t + 1);
+            }
+            this->str_size += n;
+        }
+        else
+        {
+            for (size_t t = 0; t < n; ++t)
+            {
+                const int64_t start = this->offsets[t];
+                const size_t len = (size_t)(this->offsets[t + 1] - start) - 1;
+                memmove(this->str + start - t, this->str + start, len);
+                this->offsets[t] = start - (int64_t)t;
+            }
+            this->offsets[n] -= (int64_t)n;
+            this->str_size -= n;
+        }
+        this->nul_separated = nul_separated;
+    }
+
+    void release()
+    {
+        free(this->str);
+        free(this->types);
+        free(this->offsets);
+        free(this->counts);
+        this->str = nullptr;
+        this->types = nullptr;
+        this->offsets = nullptr;
+        this->counts = nullptr;
+        this->capacity = 0;
+        this->str_capacity = 0;
+    }
+} BatchBuffer;
+
+class BaseSentencer {
+protected:
     LexerContext lctx;
-    char* raw_text = nullptr;
-    size_t text_len = 0;
-    size_t text_pos = 0;
-    char* batch_str_buf = nullptr;
-    TokenType* batch_types_buf = nullptr;
+    BatchBuffer buffers[2];
+    BatchBuffer* out = nullptr;
+    int current = 0;
     size_t batch_size = DEFAULT_BATCH_SIZE;
     uint64_t filter_mask = 0xFFFFFFFFFFFFFFFF;
     size_t token_min_len = DEFAULT_TOKEN_MIN_LEN;
     size_t token_max_len = DEFAULT_TOKEN_MAX_LEN;
+    bool lowercase = false;
+    bool unique = false;
+    bool lexer_finished = false;
+    std::vector<DedupSlot> dedup_table;
+    uint32_t dedup_gen = 0;
+
+    // Prefetch state. `pending` is the buffer being filled by the worker
+    // thread (or already filled when `pending_done`), -1 when idle.
+    bool prefetch = false;
+    std::thread worker;
+    std::mutex mtx;
+    std::condition_variable cv;
+    int pending = -1;
+    bool pending_nul = true;
+    bool pending_requested = false;
+    bool pending_done = false;
+    bool stopping = false;
+
+    inline bool batch_full() const
+    {
+        return this->out->token_idx >= this->batch_size;
+    }
+
+    // Looks up the span [start, end) of the batch buffer among the tokens
+    // already emitted in this batch. A repeat bumps that token's count and
+    // returns true; a new span is registered under the next token index.
+    bool dedup_seen(size_t start, size_t end)
+    {
+        BatchBuffer& b = *this->out;
+        const unsigned char* buf = (const unsigned char*)b.str;
+        const size_t len = end - start;
+        const size_t mask = this->dedup_table.size() - 1;
+        for (size_t i = slovorez_fnv1a(buf + start, len) & mask;; i = (i + 1) & mask)
+        {
+            DedupSlot& slot = this->dedup_table[i];
+            if (slot.gen != this->dedup_gen)
+            {
+                slot.gen = this->dedup_gen;
+                slot.token = (uint32_t)b.token_idx;
+                return false;
+            }
+            const size_t t = slot.token;
+            if (b.token_bytes(t) == len && memcmp(buf + b.offsets[t], buf + start, len) == 0)
+            {
+                b.counts[t]++;
+                return true;
+            }
+        }
+    }
+
+    void resize_dedup_table()
+    {
+        if (!this->unique)
+        {
+            std::vector<DedupSlot>().swap(this->dedup_table);
+            return;
+        }
+        size_t capacity = 16;
+        while (capacity < 2 * this->batch_size)
+        {
+            capacity <<= 1;
+        }
+        std::vector<DedupSlot>(capacity, DedupSlot{ 0, 0 }).swap(this->dedup_table);
+        this->dedup_gen = 0;
+    }
+
+    // Copies a token span of the input window `data` into the batch.
+    inline void push_token(const Token& token, const unsigned char* data)
+    {
+        const bool allowed_type = static_cast<uint64_t>(token.type) & this->filter_mask;
+        const bool allowed_size = this->token_min_len <= token.size && token.size <= this->token_max_len;
+        if (allowed_type && allowed_size)
+        {
+            BatchBuffer& b = *this->out;
+            b.reserve_token(token.bytes, this->batch_size);
+            const size_t start = b.str_size;
+            memcpy(b.str + start, data + token.start, token.bytes);
+            b.str_size += token.bytes;
+            if (this->lowercase)
+            {
+                slovorez_utf8_lower_inplace((unsigned char*)b.str + start, b.str_size - start);
+            }
+            if (this->unique && this->dedup_seen(start, b.str_size))
+            {
+                b.str_size = start;
+                return;
+            }
+            if (b.nul_separated)
+            {
+                b.str[b.str_size++] = '\0';
+            }
+            b.counts[b.token_idx] = 1;
+            b.types[b.token_idx++] = token.type;
+            b.offsets[b.token_idx] = (int64_t)b.str_size;
+        }
+    }
+
+    // Lexes the window [data + pos, data + len) until the batch is full or
+    // the window is exhausted. `pos` is advanced past every consumed byte, so
+    // the caller can resume from the same window on the next batch. `eof`
+    // marks the window as the tail of the input (see slovorez_lexer_next).
+    void lex(const unsigned char* data, size_t len, size_t& pos, bool eof)
+    {
+        while (!this->batch_full() && slovorez_lexer_next(&this->lctx, data, len, &pos, eof))
+        {
+            this->push_token(this->lctx.rtoken, data);
+        }
+    }
+
+    // Emits the token still pending in the lexer once the input is exhausted.
+    // `data` must still be the window the pending token points into.
+    void finish(const unsigned char* data)
+    {
+        if (this->lexer_finished || this->batch_full())
+        {
+            return;
+        }
+        this->lexer_finished = true;
+        if (slovorez_lexer_token_flush(&this->lctx))
+        {
+            this->push_token(this->lctx.rtoken, data);
+        }
+    }
+
+    // Number of bytes at the end of a window of `len` bytes that the lexer
+    // still needs: the pending token plus any unconsumed tail at `pos`.
+    size_t window_carry(size_t len, size_t pos) const
+    {
+        size_t keep_from = pos;
+        if (this->lctx.ctxtoken.type != TokenType::NOTTKN)
+        {
+            keep_from = std::min(keep_from, this->lctx.ctxtoken.start);
+        }
+        return len - keep_from;
+    }
+
+    // Lexes the next batch into `this->out`. Runs without the GIL, possibly
+    // on the prefetch thread, so it must not touch Python objects.
+    virtual void fill_batch() = 0;
+
+    // Raises a pending input error on the Python side. Called with the GIL
+    // held after every batch.
+    virtual void check_input() {}
+
+    void fill_into(BatchBuffer& b, bool nul_separated)
+    {
+        b.fit(this->batch_size);
+        b.reset(nul_separated);
+        if (this->unique && ++this->dedup_gen == 0)
+        {
+            this->resize_dedup_table();
+            this->dedup_gen = 1;
+        }
+        this->out = &b;
+        this->fill_batch();
+    }
+
+    void worker_loop()
+    {
+        std::unique_lock<std::mutex> lock(this->mtx);
+        while (true)
+        {
+            this->cv.wait(lock, [this] { return this->pending_requested || this->stopping; });
+            if (this->stopping)
+            {
+                return;
+            }
+            this->pending_requested = false;
+            BatchBuffer& b = this->buffers[this->pending];
+            const bool nul_separated = this->pending_nul;
+            lock.unlock();
+            this->fill_into(b, nul_separated);
+            lock.lock();
+            this->pending_done = true;
+            this->cv.notify_all();
+        }
+    }
+
+    // Blocks until no batch is being lexed in the background. Settings must
+    // not change under the worker's feet.
+    void wait_idle()
+    {
+        if (!this->worker.joinable())
+        {
+            return;
+        }
+        py::gil_scoped_release release;
+        std::unique_lock<std::mutex> lock(this->mtx);
+        this->cv.wait(lock, [this] { return this->pending < 0 || this->pending_done; });
+    }
+
+    // Must be called by derived destructors before the input is released.
+    void stop_prefetch()
+    {
+        if (!this->worker.joinable())
+        {
+            return;
+        }
+        {
+            std::lock_guard<std::mutex> lock(this->mtx);
+            this->stopping = true;
+        }
+        this->cv.notify_all();
+        this->worker.join();
+        this->stopping = false;
+    }
+
+    BatchBuffer& next_batch(bool nul_separated)
+    {
+        py::gil_scoped_release release;
+        if (!this->prefetch && this->pending < 0)
+        {
+            this->current = 0;
+            this->fill_into(this->buffers[0], nul_separated);
+            return this->buffers[0];
+        }
+        std::unique_lock<std::mutex> lock(this->mtx);
+        if (this->pending < 0)
+        {
+            this->pending = 1 - this->current;
+            this->pending_nul = nul_separated;
+            this->pending_requested = true;
+            this->pending_done = false;
+            this->cv.notify_all();
+        }
+        this->cv.wait(lock, [this] { return this->pending_done; });
+        this->current = this->pending;
+        this->pending = -1;
+        if (this->prefetch)
+        {
+            // Lex batch N + 1 into the other buffer while Python handles N.
+            this->pending = 1 - this->current;
+            this->pending_nul = nul_separated;
+            this->pending_requested = true;
+            this->pending_done = false;
+            this->cv.notify_all();
+        }
+        lock.unlock();
+        BatchBuffer& b = this->buffers[this->current];
+        b.set_format(nul_separated);
+        return b;
+    }
+
+    py::array_t<uint64_t> types_view(const BatchBuffer& b)
+    {
+        return py::array_t<uint64_t>(
+            { (size_t)b.token_idx },
+            { sizeof(uint64_t) },
+            reinterpret_cast<uint64_t*>(b.types),
+            py::cast(this)
+        );
+    }
+
+    py::array_t<uint32_t> counts_view(const BatchBuffer& b)
+    {
+        return py::array_t<uint32_t>(
+            { (size_t)b.token_idx },
+            { sizeof(uint32_t) },
+            b.counts,
+            py::cast(this)
+        );
+    }
 
 public:
-    FromTextSentencer(const char* str, size_t str_len) : text_len(str_len), text_pos(0)
+    BaseSentencer()
     {
-        this->raw_text = (char*)malloc(str_len);
-        this->batch_str_buf = (char*)malloc((512 * this->batch_size + this->batch_size) * sizeof(char));
-        this->batch_types_buf = (TokenType*)malloc(this->batch_size * sizeof(TokenType));
-        memcpy(this->raw_text, str, str_len);
         slovorez_lexer_init(&this->lctx);
     }
 
+    // Bytes currently held by the batch buffers and the dedup table.
+    size_t get_buffer_bytes()
+    {
+        this->wait_idle();
+        return this->buffers[0].allocated_bytes() + this->buffers[1].allocated_bytes()
+            + this->dedup_table.capacity() * sizeof(DedupSlot);
+    }
+
     void set_batch_size(size_t batch_size)
     {
+        this->wait_idle();
         this->batch_size = batch_size;
-        this->batch_str_buf = (char*)realloc(this->batch_str_buf, (512 * this->batch_size + this->batch_size) * sizeof(char));
-        this->batch_types_buf = (TokenType*)realloc(this->batch_types_buf, this->batch_size * sizeof(TokenType));
+        this->resize_dedup_table();
+    }
+
+    void set_lowercase(bool lowercase)
+    {
+        this->wait_idle();
+        this->lowercase = lowercase;
+    }
+
+    // When enabled, each batch holds at most batch_size *distinct* tokens and
+    // reports how often each one occurred in the consumed input.
+    void set_unique(bool unique)
+    {
+        this->wait_idle();
+        this->unique = unique;
+        this->resize_dedup_table();
+        if (!unique)
+        {
+            this->dedup_table.clear();
+            this->dedup_table.shrink_to_fit();
+        }
+    }
+
+    // When enabled, a native thread lexes the next batch while Python works
+    // on the current one. A batch already in flight keeps the settings it
+    // was started with.
+    void set_prefetch(bool prefetch)
+    {
+        this->wait_idle();
+        this->prefetch = prefetch;
+        if (prefetch && !this->worker.joinable())
+        {
+            this->worker = std::thread(&BaseSentencer::worker_loop, this);
+        }
+        else if (!prefetch && this->pending < 0)
+        {
+            this->stop_prefetch();
+        }
     }
 
     void set_filter(uint64_t filter_mask)
     {
+        this->wait_idle();
         this->filter_mask = filter_mask;
     }
 
     void set_token_min_len(size_t token_min_len)
     {
+        this->wait_idle();
         this->token_min_len = token_min_len;
     }
 
     void set_token_max_len(size_t token_max_len)
     {
+        this->wait_idle();
         this->token_max_len = token_max_len;
     }
 
     py::dict get_batch()
     {
-        size_t batch_str_size = 0;
-        size_t batch_token_idx = 0;
-        while (this->text_pos <= this->text_len && batch_token_idx <= this->batch_size)
+        BatchBuffer& b = this->next_batch(true);
+        this->check_input();
+        if (b.token_idx == 0)
         {
-            if (slovorez_lexer_token_get(&this->lctx, (unsigned char)this->raw_text[this->text_pos++]))
-            {
-                const Token& token = this->lctx.rtoken;
-                const bool allowed_type = static_cast<uint64_t>(token.type) & this->filter_mask;
-                const bool allowed_size = this->token_min_len <= token.size && token.size <= this->token_max_len;
-                if (allowed_type && allowed_size)
-                {
-                    for (int i = 0; i < token.size; ++i)
-                    {
-                        memcpy(this->batch_str_buf + batch_str_size, token.data[i].data, token.data[i].size);
-                        batch_str_size += token.data[i].size;
-                    }
-                    this->batch_str_buf[batch_str_size++] = '\0';
-                    this->batch_types_buf[batch_token_idx++] = token.type;
-                }
-            }
+            return py::dict();
+        }
+        py::dict outbuf;
+        outbuf["text"_s] = py::str(b.str, b.str_size);
+        outbuf["types"_s] = this->types_view(b);
+        if (this->unique)
+        {
+            outbuf["counts"_s] = this->counts_view(b);
         }
-        if (batch_token_idx == 0)
+        return outbuf;
+    }
+
+    // Arrow-style batch: token i is data[offsets[i]:offsets[i + 1]], no
+    // separators. All arrays are views into the sentencer buffers and stay
+    // valid only until the next get_batch*() call.
+    py::dict get_batch_columnar()
+    {
+        BatchBuffer& b = this->next_batch(false);
+        this->check_input();
+        if (b.token_idx == 0)
         {
             return py::dict();
         }
         py::dict outbuf;
-        outbuf["text"_s] = py::str(this->batch_str_buf, batch_str_size);
-        outbuf["types"_s] = py::array_t<uint64_t>(
-            { (size_t)batch_token_idx },
-            { sizeof(uint64_t) },
-            reinterpret_cast<uint64_t*>(this->batch_types_buf),
+        outbuf["data"_s] = py::array_t<uint8_t>(
+            { (size_t)b.str_size },
+            { sizeof(uint8_t) },
+            reinterpret_cast<uint8_t*>(b.str),
             py::cast(this)
         );
+        outbuf["offsets"_s] = py::array_t<int64_t>(
+            { (size_t)b.token_idx + 1 },
+            { sizeof(int64_t) },
+            b.offsets,
+            py::cast(this)
+        );
+        outbuf["types"_s] = this->types_view(b);
+        if (this->unique)
+        {
+            outbuf["counts"_s] = this->counts_view(b);
+        }
         return outbuf;
     }
 
-    ~FromTextSentencer()
+    virtual ~BaseSentencer()
+    {
+        this->stop_prefetch();
+        this->buffers[0].release();
+        this->buffers[1].release();
+    }
+};
+
+class FromTextSentencer : public BaseSentencer {
+private:
+    // The text is lexed in place: `raw_text` points into memory owned by
+    // `source` (the UTF-8 form of a str, or an exported buffer), which is
+    // kept alive for the sentencer's lifetime.
+    py::object source;
+    Py_buffer view;
+    bool has_view = false;
+    const char* raw_text = nullptr;
+    size_t text_len = 0;
+    size_t text_pos = 0;
+
+protected:
+    void fill_batch() override
     {
-        if (this->raw_text != nullptr)
+        const unsigned char* data = (const unsigned char*)this->raw_text;
+        this->lex(data, this->text_len, this->text_pos, true);
+        if (this->text_pos >= this->text_len)
         {
-            free(this->raw_text);
-            this->raw_text = nullptr;
+            this->finish(data);
         }
-        if (this->batch_str_buf != nullptr)
+    }
+
+public:
+    // Accepts a str or any C-contiguous object exporting the buffer protocol
+    // (bytes, bytearray, memoryview, mmap, NumPy uint8 arrays, ...).
+    FromTextSentencer(py::object text) : source(text)
+    {
+        PyObject* obj = text.ptr();
+        if (PyUnicode_Check(obj))
         {
-            free(this->batch_str_buf);
-            this->batch_str_buf = nullptr;
+            Py_ssize_t size = 0;
+            this->raw_text = PyUnicode_AsUTF8AndSize(obj, &size);
+            if (this->raw_text == nullptr)
+            {
+                throw py::error_already_set();
+            }
+            this->text_len = (size_t)size;
+            return;
         }
-        if (this->batch_types_buf != nullptr)
+        if (PyObject_GetBuffer(obj, &this->view, PyBUF_C_CONTIGUOUS) != 0)
         {
-            free(this->batch_types_buf);
-            this->batch_types_buf = nullptr;
+            throw py::error_already_set();
         }
+        this->has_view = true;
+        this->raw_text = (const char*)this->view.buf;
+        this->text_len = (size_t)this->view.len;
+    }
+
+    ~FromTextSentencer()
+    {
+        this->stop_prefetch();
+        if (this->has_view)
+        {
+            PyBuffer_Release(&this->view);
+            this->has_view = false;
+        }
+        this->raw_text = nullptr;
     }
 };
 
-class FromFileSentencer {
+// Shards start right after an ASCII whitespace byte. Such a byte always ends
+// a token and never occurs inside a multi-byte UTF-8 sequence.
+static inline bool slovorez_is_shard_boundary(unsigned char c)
+{
+    return c == ' ' || c == '\n' || c == '\r' || c == '\t';
+}
+
+class FromFileSentencer : public BaseSentencer {
 private:
-    LexerContext lctx;
     FILE* f = nullptr;
-    char* batch_str_buf = nullptr;
-    TokenType* batch_types_buf = nullptr;
-    size_t batch_size = DEFAULT_BATCH_SIZE;
-    uint64_t filter_mask = 0xFFFFFFFFFFFFFFFF;
-    size_t token_min_len = DEFAULT_TOKEN_MIN_LEN;
-    size_t token_max_len = DEFAULT_TOKEN_MAX_LEN;
+    // Read-block mode: the file is consumed in DEFAULT_READ_BLOCK_SIZE chunks.
+    unsigned char* block_buf = nullptr;
+    size_t block_capacity = 0;
+    size_t block_len = 0;
+    size_t block_pos = 0;
+    size_t file_pos = 0;
+    bool file_eof = false;
+    // Memory-mapped mode: the whole file is a single contiguous window.
+    const unsigned char* map_data = nullptr;
+    size_t map_len = 0;
+    size_t map_pos = 0;
+    bool mapped = false;
+    // Byte range [range_begin, range_end) of the file this sentencer lexes,
+    // snapped to token boundaries.
+    size_t range_begin = 0;
+    size_t range_end = 0;
 
-public:
-    FromFileSentencer(const std::string& fpath)
+    // Moves `pos` forward to the first offset that directly follows a shard
+    // boundary byte (or to the end of the file). Applying the same rule to
+    // both ends of adjacent shards makes them tile the file exactly.
+    size_t snap_mapped(size_t pos) const
     {
-        this->f = fopen(fpath.c_str(), "r");
-        this->batch_str_buf = (char*)malloc((512 * this->batch_size + this->batch_size) * sizeof(char));
-        this->batch_types_buf = (TokenType*)malloc(this->batch_size * sizeof(TokenType));
-        slovorez_lexer_init(&this->lctx);
+        if (pos == 0 || pos >= this->map_len)
+        {
+            return std::min(pos, this->map_len);
+        }
+        while (pos < this->map_len && !slovorez_is_shard_boundary(this->map_data[pos - 1]))
+        {
+            ++pos;
+        }
+        return pos;
     }
 
-    void set_batch_size(size_t batch_size)
+    size_t snap_file(size_t pos, size_t size)
     {
-        this->batch_size = batch_size;
-        this->batch_str_buf = (char*)realloc(this->batch_str_buf, (512 * this->batch_size + this->batch_size) * sizeof(char));
-        this->batch_types_buf = (TokenType*)realloc(this->batch_types_buf, this->batch_size * sizeof(TokenType));
+        if (pos == 0 || pos >= size)
+        {
+            return std::min(pos, size);
+        }
+        slovorez_fseek(this->f, (int64_t)(pos - 1), SEEK_SET);
+        int c;
+        while ((c = fgetc(this->f)) != EOF && !slovorez_is_shard_boundary((unsigned char)c))
+        {
+            ++pos;
+        }
+        return std::min(pos, size);
     }
 
-    void set_filter(uint64_t filter_mask)
+    void set_range(size_t offset, int64_t length)
     {
-        this->filter_mask = filter_mask;
+        size_t size = 0;
+        if (this->mapped)
+        {
+            size = this->map_len;
+        }
+        else
+        {
+            slovorez_fseek(this->f, 0, SEEK_END);
+            size = (size_t)slovorez_ftell(this->f);
+        }
+        const size_t end = length < 0 ? size : std::min(size, offset + (size_t)length);
+        if (this->mapped)
+        {
+            this->range_begin = this->snap_mapped(offset);
+            this->range_end = this->snap_mapped(end);
+            this->map_pos = this->range_begin;
+        }
+        else
+        {
+            this->range_begin = this->snap_file(offset, size);
+            this->range_end = this->snap_file(end, size);
+            this->file_pos = this->range_begin;
+            slovorez_fseek(this->f, (int64_t)this->range_begin, SEEK_SET);
+        }
+        this->range_end = std::max(this->range_begin, this->range_end);
     }
 
-    void set_token_min_len(size_t token_min_len)
+    bool open_mmap(const std::string& fpath)
     {
-        this->token_min_len = token_min_len;
+#ifdef SLOVOREZ_HAS_MMAP
+        int fd = open(fpath.c_str(), O_RDONLY);
+        if (fd < 0)
+        {
+            return false;
+        }
+        struct stat st;
+        if (fstat(fd, &st) != 0)
+        {
+            close(fd);
+            return false;
+        }
+        this->map_len = (size_t)st.st_size;
+        if (this->map_len > 0)
+        {
+            void* addr = mmap(nullptr, this->map_len, PROT_READ, MAP_PRIVATE, fd, 0);
+            if (addr == MAP_FAILED)
+            {
+                close(fd);
+                this->map_len = 0;
+                return false;
+            }
+            madvise(addr, this->map_len, MADV_SEQUENTIAL);
+            this->map_data = (const unsigned char*)addr;
+        }
+        close(fd);
+        this->mapped = true;
+        return true;
+#else
+        (void)fpath;
+        return false;
+#endif
     }
 
-    void set_token_max_len(size_t token_max_len)
+protected:
+    void fill_batch() override
     {
-        this->token_max_len = token_max_len;
+        if (this->mapped)
+        {
+            this->lex(this->map_data, this->range_end, this->map_pos, true);
+            if (this->map_pos >= this->range_end)
+            {
+                this->finish(this->map_data);
+            }
+            return;
+        }
+        if (this->f == nullptr)
+        {
+            return;
+        }
+        while (true)
+        {
+            this->lex(this->block_buf, this->block_len, this->block_pos, this->file_eof);
+            if (this->batch_full())
+            {
+                return;
+            }
+            if (this->file_eof)
+            {
+                this->finish(this->block_buf);
+                return;
+            }
+            this->refill_block();
+        }
+    }
+
+    // Moves the bytes the lexer still needs to the front of the block buffer
+    // and reads the next block after them. The buffer doubles when a single
+    // token outgrows half of it.
+    void refill_block()
+    {
+        const size_t carry = this->window_carry(this->block_len, this->block_pos);
+        const size_t shift = this->block_len - carry;
+        memmove(this->block_buf, this->block_buf + shift, carry);
+        slovorez_lexer_rebase(&this->lctx, shift);
+        this->block_pos -= shift;
+        if (2 * carry > this->block_capacity)
+        {
+            this->block_capacity *= 2;
+            this->block_buf = (unsigned char*)realloc(this->block_buf, this->block_capacity);
+        }
+        const size_t want = std::min(this->range_end - this->file_pos, this->block_capacity - carry);
+        const size_t got = want > 0 ? fread(this->block_buf + carry, 1, want, this->f) : 0;
+        this->file_pos += got;
+        this->block_len = carry + got;
+        this->file_eof = got == 0;
+    }
+
+public:
+    // `offset` and `length` select a byte range of the file (length < 0 means
+    // up to EOF). Both ends are snapped forward to token boundaries, so
+    // sentencers over adjacent ranges together emit exactly the tokens of
+    // the whole file.
+    FromFileSentencer(const std::string& fpath, bool use_mmap = true, size_t offset = 0, int64_t length = -1)
+    {
+        if (!(use_mmap && this->open_mmap(fpath)))
+        {
+            this->f = fopen(fpath.c_str(), "rb");
+            if (this->f == nullptr)
+            {
+                return;
+            }
+            this->block_capacity = DEFAULT_READ_BLOCK_SIZE;
+            this->block_buf = (unsigned char*)malloc(this->block_capacity);
+        }
+        this->set_range(offset, length);
+    }
+
+    py::tuple get_range()
+    {
+        return py::make_tuple(this->range_begin, this->range_end);
     }
 
     bool is_fopen()
     {
-        return this->f != nullptr;
+        return this->mapped || this->f != nullptr;
     }
 
-    py::dict get_batch()
+    bool is_mmapped()
     {
-        if (this->f == nullptr)
+        return this->mapped;
+    }
+
+    ~FromFileSentencer()
+    {
+        this->stop_prefetch();
+#ifdef SLOVOREZ_HAS_MMAP
+        if (this->map_data != nullptr)
         {
-            return py::dict();
+            munmap((void*)this->map_data, this->map_len);
+            this->map_data = nullptr;
         }
-        size_t batch_str_size = 0;
-        size_t batch_token_idx = 0;
-        int c;
-        while ((c = fgetc(this->f)) != EOF && batch_token_idx <= this->batch_size)
+#endif
+        if (this->f != nullptr)
+        {
+            fclose(this->f);
+            this->f = nullptr;
+        }
+        if (this->block_buf != nullptr)
+        {
+            free(this->block_buf);
+            this->block_buf = nullptr;
+        }
+    }
+};
+
+// Lexes a byte stream pushed in chunks by another thread, e.g. a
+// decompressor. Chunks wait in a bounded queue, so the producer blocks in
+// feed() instead of running ahead of the lexer.
+class FromStreamSentencer : public BaseSentencer {
+private:
+    std::deque<std::string> chunks;
+    size_t queue_size = DEFAULT_STREAM_QUEUE_SIZE;
+    std::mutex stream_mtx;
+    std::condition_variable stream_cv;
+    bool input_closed = false;
+    std::string input_error;
+    unsigned char* block_buf = nullptr;
+    size_t block_capacity = 0;
+    size_t block_len = 0;
+    size_t block_pos = 0;
+    bool input_eof = false;
+
+protected:
+    void fill_batch() override
+    {
+        while (true)
         {
-            if (slovorez_lexer_token_get(&this->lctx, (unsigned char)c))
+            this->lex(this->block_buf, this->block_len, this->block_pos, this->input_eof);
+            if (this->batch_full())
             {
-                const Token& token = this->lctx.rtoken;
-                const bool allowed_type = static_cast<uint64_t>(token.type) & this->filter_mask;
-                const bool allowed_size = this->token_min_len <= token.size && token.size <= this->token_max_len;
-                if (allowed_type && allowed_size)
-                {
-                    for (int i = 0; i < token.size; ++i)
-                    {
-                        memcpy(this->batch_str_buf + batch_str_size, token.data[i].data, token.data[i].size);
-                        batch_str_size += token.data[i].size;
-                    }
-                    this->batch_str_buf[batch_str_size++] = '\0';
-                    this->batch_types_buf[batch_token_idx++] = token.type;
-                }
+                return;
             }
+            if (this->input_eof)
+            {
+                this->finish(this->block_buf);
+                return;
+            }
+            this->refill_block();
         }
-        if (batch_token_idx == 0)
+    }
+
+    // Same carry-over scheme as FromFileSentencer::refill_block, except the
+    // next block is the next queued chunk. Waits for the producer when the
+    // queue is empty and the input is still open.
+    void refill_block()
+    {
+        std::string chunk;
         {
-            return py::dict();
+            std::unique_lock<std::mutex> lock(this->stream_mtx);
+            this->stream_cv.wait(lock, [this] { return !this->chunks.empty() || this->input_closed; });
+            if (!this->chunks.empty() && this->input_error.empty())
+            {
+                chunk.swap(this->chunks.front());
+                this->chunks.pop_front();
+            }
         }
-        py::dict outbuf;
-        outbuf["text"_s] = py::str(this->batch_str_buf, batch_str_size);
-        outbuf["types"_s] = py::array_t<uint64_t>(
-            { (size_t)batch_token_idx },
-            { sizeof(uint64_t) },
-            reinterpret_cast<uint64_t*>(this->batch_types_buf),
-            py::cast(this)
-        );
-        return outbuf;
+        this->stream_cv.notify_all();
+
+        const size_t carry = this->window_carry(this->block_len, this->block_pos);
+        const size_t shift = this->block_len - carry;
+        memmove(this->block_buf, this->block_buf + shift, carry);
+        slovorez_lexer_rebase(&this->lctx, shift);
+        this->block_pos -= shift;
+        if (carry + chunk.size() > this->block_capacity)
+        {
+            this->block_capacity = std::max(2 * this->block_capacity, carry + chunk.size());
+            this->block_buf = (unsigned char*)realloc(this->block_buf, this->block_capacity);
+        }
+        memcpy(this->block_buf + carry, chunk.data(), chunk.size());
+        this->block_len = carry + chunk.size();
+        this->input_eof = chunk.empty();
     }
 
-    ~FromFileSentencer()
+    void check_input() override
     {
-        if (this->f != nullptr)
+        std::lock_guard<std::mutex> lock(this->stream_mtx);
+        if (!this->input_error.empty())
         {
-            fclose(this->f);
+            throw std::runtime_error(this->input_error);
+        }
+    }
+
+public:
+    // `queue_size` is the number of chunks the producer may run ahead.
+    FromStreamSentencer(size_t queue_size = DEFAULT_STREAM_QUEUE_SIZE) : queue_size(std::max<size_t>(1, queue_size))
+    {
+        this->block_capacity = DEFAULT_READ_BLOCK_SIZE;
+        this->block_buf = (unsigned char*)malloc(this->block_capacity);
+    }
+
+    // Queues a copy of `data`. Blocks without the GIL while the queue is
+    // full. Returns false once the input is closed, so the producer can stop.
+    bool feed(const py::buffer& data)
+    {
+        py::buffer_info info = data.request();
+        if (info.size == 0)
+        {
+            return !this->is_closed();
+        }
+        std::string chunk((const char*)info.ptr, (size_t)(info.size * info.itemsize));
+        py::gil_scoped_release release;
+        {
+            std::unique_lock<std::mutex> lock(this->stream_mtx);
+            this->stream_cv.wait(lock, [this] { return this->chunks.size() < this->queue_size || this->input_closed; });
+            if (this->input_closed)
+            {
+                return false;
+            }
+            this->chunks.push_back(std::move(chunk));
+        }
+        this->stream_cv.notify_all();
+        return true;
+    }
+
+    // Marks the end of the input. Chunks already queued are still lexed.
+    void close_input()
+    {
+        {
+            std::lock_guard<std::mutex> lock(this->stream_mtx);
+            this->input_closed = true;
         }
-        if (this->batch_str_buf != nullptr)
+        this->stream_cv.notify_all();
+    }
+
+    // Closes the input with an error that the next get_batch*() call raises
+    // as RuntimeError. Queued chunks are dropped.
+    void abort_input(const std::string& message)
+    {
         {
-            free(this->batch_str_buf);
-            this->batch_str_buf = nullptr;
+            std::lock_guard<std::mutex> lock(this->stream_mtx);
+            this->input_error = message.empty() ? std::string("input stream aborted") : message;
+            this->input_closed = true;
+            this->chunks.clear();
         }
-        if (this->batch_types_buf != nullptr)
+        this->stream_cv.notify_all();
+    }
+
+    bool is_closed()
+    {
+        std::lock_guard<std::mutex> lock(this->stream_mtx);
+        return this->input_closed;
+    }
+
+    ~FromStreamSentencer()
+    {
+        // Wake a prefetch worker waiting for input before joining it.
+        this->close_input();
+        this->stop_prefetch();
+        if (this->block_buf != nullptr)
         {
-            free(this->batch_types_buf);
-            this->batch_types_buf = nullptr;
+            free(this->block_buf);
+            this->block_buf = nullptr;
         }
     }
 };
 
-typedef struct FromTextStream {
-    FromTextSentencer &sentencer;
-    FromTextStream(FromTextSentencer& s) : sentencer(s) {}
-} FromTextStream;
+typedef struct SentencerStream {
+    BaseSentencer &sentencer;
+    bool columnar;
+    SentencerStream(BaseSentencer& s, bool columnar = false) : sentencer(s), columnar(columnar) {}
+} SentencerStream;
+
+static CharEncoder* char_encoder_from_vocab(const py::dict& vocab, size_t maxlen, int32_t unk_id, int32_t pad_id, size_t pad_context)
+{
+    CharEncoder* encoder = new CharEncoder(maxlen, unk_id, pad_id, pad_context);
+    for (auto item : vocab)
+    {
+        // Special tokens ("<PAD>", "EOW", ...) are never produced by a single
+        // input char, so only one-char keys take part in the lookup.
+        PyObject* key = item.first.ptr();
+        if (PyUnicode_Check(key) && PyUnicode_GET_LENGTH(key) == 1)
+        {
+            encoder->add(PyUnicode_READ_CHAR(key, 0), item.second.cast<int32_t>());
+        }
+    }
+    return encoder;
+}
+
+static py::tuple char_encoder_alloc(const CharEncoder& self, size_t n, size_t width, int32_t*& matrix, int32_t*& lengths)
+{
+    py::array_t<int32_t> matrix_arr({ n, width });
+    py::array_t<int32_t> lengths_arr((py::ssize_t)n);
+    matrix = matrix_arr.mutable_data();
+    lengths = lengths_arr.mutable_data();
+    std::fill(matrix, matrix + n * width, self.get_pad_id());
+    return py::make_tuple(matrix_arr, lengths_arr);
+}
+
+static py::tuple char_encoder_encode(const CharEncoder& self, const py::list& words)
+{
+    const size_t n = words.size();
+    size_t width = 0;
+    for (size_t i = 0; i < n; ++i)
+    {
+        PyObject* w = PyList_GET_ITEM(words.ptr(), i);
+        if (!PyUnicode_Check(w))
+        {
+            throw py::type_error("CharEncoder.encode expects a list of str");
+        }
+        width = std::max(width, (size_t)PyUnicode_GET_LENGTH(w));
+    }
+    width = self.batch_width(width);
+
+    int32_t* matrix = nullptr;
+    int32_t* lengths = nullptr;
+    py::tuple out = char_encoder_alloc(self, n, width, matrix, lengths);
+    for (size_t i = 0; i < n; ++i)
+    {
+        PyObject* w = PyList_GET_ITEM(words.ptr(), i);
+        const int kind = PyUnicode_KIND(w);
+        const void* data = PyUnicode_DATA(w);
+        const size_t len = std::min((size_t)PyUnicode_GET_LENGTH(w), self.get_maxlen());
+        int32_t* row = matrix + i * width;
+        for (size_t k = 0; k < len; ++k)
+        {
+            row[k] = self.lookup(PyUnicode_READ(kind, data, k));
+        }
+        lengths[i] = (int32_t)len;
+    }
+    return out;
+}
+
+static py::tuple char_encoder_encode_columnar(
+    const CharEncoder& self,
+    py::array_t<uint8_t, py::array::c_style | py::array::forcecast> data,
+    py::array_t<int64_t, py::array::c_style | py::array::forcecast> offsets,
+    py::object indices)
+{
+    const unsigned char* buf = data.data();
+    const int64_t* offs = offsets.data();
+    const size_t n_tokens = offsets.size() > 0 ? offsets.size() - 1 : 0;
+
+    std::vector<int64_t> selected;
+    if (indices.is_none())
+    {
+        selected.resize(n_tokens);
+        for (size_t i = 0; i < n_tokens; ++i)
+        {
+            selected[i] = (int64_t)i;
+        }
+    }
+    else
+    {
+        auto idx = py::array_t<int64_t, py::array::c_style | py::array::forcecast>::ensure(indices);
+        if (!idx)
+        {
+            throw py::type_error("indices must be convertible to an int64 array");
+        }
+        selected.assign(idx.data(), idx.data() + idx.size());
+        for (int64_t i : selected)
+        {
+            if (i < 0 || (size_t)i >= n_tokens)
+            {
+                throw py::index_error("token index out of range");
+            }
+        }
+    }
+
+    const size_t n = selected.size();
+    size_t width = 0;
+    {
+        py::gil_scoped_release release;
+        for (size_t i = 0; i < n; ++i)
+        {
+            const int64_t t = selected[i];
+            width = std::max(width, slovorez_utf8_strlen(buf + offs[t], (size_t)(offs[t + 1] - offs[t])));
+        }
+    }
+    width = self.batch_width(width);
 
-typedef struct FromFileStream {
-    FromFileSentencer &sentencer;
-    FromFileStream(FromFileSentencer& s) : sentencer(s) {}
-} FromFileStream;
+    int32_t* matrix = nullptr;
+    int32_t* lengths = nullptr;
+    py::tuple out = char_encoder_alloc(self, n, width, matrix, lengths);
+    {
+        py::gil_scoped_release release;
+        for (size_t i = 0; i < n; ++i)
+        {
+            const int64_t t = selected[i];
+            lengths[i] = (int32_t)self.encode_utf8(buf + offs[t], (size_t)(offs[t + 1] - offs[t]), matrix + i * width, width);
+        }
+    }
+    return out;
+}
 
 PYBIND11_MODULE(slovorezCXX, m)
 {
@@ -255,11 +1204,11 @@ PYBIND11_MODULE(slovorezCXX, m)
         )
     ;
 
-    py::class_<FromTextStream>(m, "fts_stream")
-        .def("__iter__", [](FromTextStream &self) { return self; })
-        .def("__next__", [](FromTextStream &self)
+    py::class_<SentencerStream>(m, "sentencer_stream")
+        .def("__iter__", [](SentencerStream &self) { return self; })
+        .def("__next__", [](SentencerStream &self)
             {
-                py::dict batch = self.sentencer.get_batch();
+                py::dict batch = self.columnar ? self.sentencer.get_batch_columnar() : self.sentencer.get_batch();
                 if (batch.empty())
                 {
                     throw py::stop_iteration();
@@ -269,52 +1218,60 @@ PYBIND11_MODULE(slovorezCXX, m)
         )
     ;
 
-    py::class_<FromTextSentencer>(m, "FTSentencer")
-        .def(py::init([](const std::string& s)
-                {
-                    return new FromTextSentencer(s.data(), s.size());
-                }
-            ),
-            py::arg("text")
-        )
-        .def("set_batch_size", &FromTextSentencer::set_batch_size)
-        .def("set_filter", &FromTextSentencer::set_filter)
-        .def("set_token_min_len", &FromTextSentencer::set_token_min_len)
-        .def("set_token_max_len", &FromTextSentencer::set_token_max_len)
-        .def("get_batch", &FromTextSentencer::get_batch)
-        .def_property_readonly("stream", [](FromTextSentencer& self)
+    py::class_<BaseSentencer>(m, "BaseSentencer")
+        .def("set_batch_size", &BaseSentencer::set_batch_size)
+        .def_property_readonly("buffer_bytes", &BaseSentencer::get_buffer_bytes)
+        .def("set_filter", &BaseSentencer::set_filter)
+        .def("set_token_min_len", &BaseSentencer::set_token_min_len)
+        .def("set_token_max_len", &BaseSentencer::set_token_max_len)
+        .def("set_lowercase", &BaseSentencer::set_lowercase)
+        .def("set_unique", &BaseSentencer::set_unique)
+        .def("set_prefetch", &BaseSentencer::set_prefetch)
+        .def("get_batch", &BaseSentencer::get_batch)
+        .def("get_batch_columnar", &BaseSentencer::get_batch_columnar)
+        .def_property_readonly("stream", [](BaseSentencer& self)
             {
-                return FromTextStream(self);
+                return SentencerStream(self);
             }
         )
-    ;
-
-    py::class_<FromFileStream>(m, "ffs_stream")
-        .def("__iter__", [](FromFileStream &self) { return self; })
-        .def("__next__", [](FromFileStream &self)
+        .def_property_readonly("columnar_stream", [](BaseSentencer& self)
             {
-                py::dict batch = self.sentencer.get_batch();
-                if (batch.empty())
-                {
-                    throw py::stop_iteration();
-                }
-                return batch;
+                return SentencerStream(self, true);
             }
         )
     ;
 
-    py::class_<FromFileSentencer>(m, "FFSentencer")
-        .def(py::init<const std::string&>(), py::arg("fpath"))
+    py::class_<FromTextSentencer, BaseSentencer>(m, "FTSentencer")
+        .def(py::init<py::object>(), py::arg("text"))
+    ;
+
+    py::class_<FromFileSentencer, BaseSentencer>(m, "FFSentencer")
+        .def(py::init<const std::string&, bool, size_t, int64_t>(),
+            py::arg("fpath"), py::arg("use_mmap") = true, py::arg("offset") = 0, py::arg("length") = -1
+        )
+        .def_property_readonly("range", &FromFileSentencer::get_range)
         .def("is_fopen", &FromFileSentencer::is_fopen)
-        .def("set_batch_size", &FromFileSentencer::set_batch_size)
-        .def("set_filter", &FromFileSentencer::set_filter)
-        .def("set_token_min_len", &FromFileSentencer::set_token_min_len)
-        .def("set_token_max_len", &FromFileSentencer::set_token_max_len)
-        .def("get_batch", &FromFileSentencer::get_batch)
-        .def_property_readonly("stream", [](FromFileSentencer& self)
-            {
-                return FromFileStream(self);
-            }
+        .def("is_mmapped", &FromFileSentencer::is_mmapped)
+    ;
+
+    py::class_<FromStreamSentencer, BaseSentencer>(m, "FSSentencer")
+        .def(py::init<size_t>(), py::arg("queue_size") = DEFAULT_STREAM_QUEUE_SIZE)
+        .def("feed", &FromStreamSentencer::feed, py::arg("data"))
+        .def("close_input", &FromStreamSentencer::close_input)
+        .def("abort_input", &FromStreamSentencer::abort_input, py::arg("message"))
+        .def("is_closed", &FromStreamSentencer::is_closed)
+    ;
+
+    py::class_<CharEncoder>(m, "CharEncoder")
+        .def(py::init(&char_encoder_from_vocab),
+            py::arg("vocab"), py::arg("maxlen"), py::arg("unk_id") = 1, py::arg("pad_id") = 0,
+            py::arg("pad_context") = 0
+        )
+        .def_property_readonly("maxlen", &CharEncoder::get_maxlen)
+        .def_property_readonly("pad_context", &CharEncoder::get_pad_context)
+        .def("encode", &char_encoder_encode, py::arg("words"))
+        .def("encode_columnar", &char_encoder_encode_columnar,
+            py::arg("data"), py::arg("offsets"), py::arg("indices") = py::none()
         )
     ;
 }
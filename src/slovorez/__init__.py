@@ -1,2 +1,2 @@
-from .core.tokenizer import Tokenizer, FTTokenizer, FFTokenizer
+from .core.tokenizer import Tokenizer, FTTokenizer, FFTokenizer, FSTokenizer
 from .slovorez import Slovorez
\ No newline at end of file
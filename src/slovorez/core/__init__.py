@@ -1 +1 @@
-from slovorez.core.tokenizer import Tokenizer, FTTokenizer, FFTokenizer
\ No newline at end of file
+from slovorez.core.tokenizer import Tokenizer, FTTokenizer, FFTokenizer, FSTokenizer
\ No newline at end of file
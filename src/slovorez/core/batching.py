@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+
+# ===========================================================================
+# TokenBudgetBatcher
+# ===========================================================================
+
+class TokenBudgetBatcher:
+    """Regroups words into inference batches capped by padded tokens.
+
+    A model call costs ``len(batch) * width`` tokens, where ``width`` is the
+    longest word in the batch plus ``pad_context`` (capped at ``maxlen``).
+    Words are collected across tokenizer batches into one bucket per width,
+    and a bucket is emitted as soon as it holds ``max_tokens // width`` words
+    (at most ``max_words``). Words in a batch therefore share one length and
+    are padded only by the ``pad_context`` positions the model needs after
+    every word, and batches have a bounded cost, whatever mix of lengths the
+    input delivers. ``flush()`` packs the remaining words, shortest first,
+    under the same caps.
+
+    A word already waiting in a bucket is not queued twice, so callers may
+    mark words as seen only once their batch has been run.
+
+    Args:
+        max_tokens:  cap on ``len(batch) * width`` per emitted batch.
+        maxlen:      model sequence length; longer words are truncated to it.
+        max_words:   optional cap on words per batch.
+        pad_context: pad positions the encoder adds after the longest word
+                     (``SlovorezTokenizer.pad_context``).
+
+    Example::
+
+        batcher = TokenBudgetBatcher(max_tokens=32768, maxlen=64, max_words=2048, pad_context=6)
+        for words in batcher.add(unseen):
+            run_inference(words)
+        for words in batcher.flush():
+            run_inference(words)
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        maxlen: int,
+        max_words: Optional[int] = None,
+        pad_context: int = 0,
+    ):
+        if max_tokens < 1:
+            raise ValueError(f"max_tokens must be positive, got {max_tokens}")
+        self.max_tokens  = max_tokens
+        self.maxlen      = maxlen
+        self.max_words   = max_words
+        self.pad_context = pad_context
+        self._buckets: dict[int, list[str]] = {}
+        self._pending: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _width(self, word: str) -> int:
+        return max(1, min(len(word) + self.pad_context, self.maxlen))
+
+    def _capacity(self, width: int) -> int:
+        cap = max(1, self.max_tokens // width)
+        if self.max_words is not None:
+            cap = min(cap, self.max_words)
+        return cap
+
+    def _emit(self, words: list[str]) -> list[str]:
+        self._pending.difference_update(words)
+        return words
+
+    def add(self, words: Iterable[str]) -> list[list[str]]:
+        """Queue words and return the batches that became full."""
+        ready   = []
+        buckets = self._buckets
+        pending = self._pending
+        for word in words:
+            if word in pending:
+                continue
+            pending.add(word)
+            width  = self._width(word)
+            bucket = buckets.setdefault(width, [])
+            bucket.append(word)
+            if len(bucket) >= self._capacity(width):
+                ready.append(self._emit(bucket))
+                buckets[width] = []
+        return ready
+
+    def flush(self) -> list[list[str]]:
+        """Return every queued word, packed into as few batches as the caps allow."""
+        ready: list[list[str]] = []
+        batch: list[str] = []
+        for width in sorted(self._buckets):
+            for word in self._buckets[width]:
+                # Widths only grow, so the newest word sets the batch width.
+                if batch and len(batch) + 1 > self._capacity(width):
+                    ready.append(self._emit(batch))
+                    batch = []
+                batch.append(word)
+        if batch:
+            ready.append(self._emit(batch))
+        self._buckets.clear()
+        return ready
+
+
+# ===========================================================================
+# MicroBatcher
+# ===========================================================================
+
+class MicroBatcher:
+    """Coalesces words from concurrent asyncio callers into shared batches.
+
+    ``submit()`` queues the words a caller needs and waits until they have
+    been processed. Queued words from every caller are handed together to
+    ``run_batch`` once ``max_wait`` seconds have passed since the first of
+    them arrived, or as soon as ``max_words`` are queued. ``run_batch`` is
+    blocking and runs on ``executor`` (one dedicated thread by default), so
+    the event loop stays responsive and batches run one at a time.
+
+    A word queued or being processed for one caller is not queued again for
+    another; both wait for the same run. If ``run_batch`` raises, every
+    caller waiting on that batch gets the exception. Cancelling a caller
+    does not cancel the batch it waits for.
+
+    Args:
+        run_batch: ``run_batch(words)`` -- processes a list of unique words.
+        max_wait:  seconds a queued word may wait for more company.
+        max_words: queued words that trigger an immediate flush.
+        executor:  where ``run_batch`` runs; a single-thread pool if None.
+
+    Example::
+
+        batcher = MicroBatcher(model.infer_words, max_wait=0.005, max_words=2048)
+        await batcher.submit(["пароходы", "плыли"])
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[list[str]], None],
+        max_wait: float = 0.005,
+        max_words: int = 2048,
+        executor: Optional[Executor] = None,
+    ):
+        if max_wait < 0:
+            raise ValueError(f"max_wait must be non-negative, got {max_wait}")
+        if max_words < 1:
+            raise ValueError(f"max_words must be positive, got {max_words}")
+        self.run_batch = run_batch
+        self.max_wait  = max_wait
+        self.max_words = max_words
+        self.executor  = executor or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="slovorez-batch"
+        )
+        self._queued: list[str] = []
+        self._futures: dict[str, asyncio.Future] = {}   # queued or running
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # The loop only keeps weak references to tasks; a running batch
+        # must not be collected while callers still wait on it.
+        self._tasks: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._queued)
+
+    async def submit(self, words: Iterable[str]) -> None:
+        """Queue ``words`` and return once all of them have been processed."""
+        loop    = asyncio.get_running_loop()
+        waiting = []
+        for word in words:
+            future = self._futures.get(word)
+            if future is None:
+                future = loop.create_future()
+                self._futures[word] = future
+                self._queued.append(word)
+            waiting.append(future)
+
+        if len(self._queued) >= self.max_words:
+            self._flush()
+        elif self._queued and self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        if waiting:
+            # wait() leaves the shared futures alone if this caller is cancelled.
+            await asyncio.wait(waiting)
+            errors = [future.exception() for future in waiting]
+            error  = next((e for e in errors if e is not None), None)
+            if error is not None:
+                raise error
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._queued:
+            return
+        words, self._queued = self._queued, []
+        task = asyncio.get_running_loop().create_task(self._run(words))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, words: list[str]) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.executor, self.run_batch, words)
+            error = None
+        except Exception as e:
+            error = e
+        for word in words:
+            future = self._futures.pop(word)
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
@@ -2,13 +2,35 @@ from __future__ import annotations
 
 import json
 import logging
+import os
+import struct
+import zlib
+from multiprocessing import shared_memory
 from pathlib import Path
-from typing import Union
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+from slovorez.io.columnar import encode_chunk, is_columnar, read_words, repair_tail
 
 logger = logging.getLogger(__name__)
 
 _FLUSH_SIZE = 8192
 
+# ---------------------------------------------------------------------------
+# Seen-set sidecar (``<log>.seen``)
+# ---------------------------------------------------------------------------
+#
+# Header, then the words of the log, each UTF-8 and NUL-terminated:
+#   magic, version, covered (log bytes indexed), log mtime_ns at that size,
+#   body size, CRC-32 of the last _SIDECAR_CRC_WINDOW log bytes indexed.
+
+SIDECAR_SUFFIX       = ".seen"
+_SIDECAR_MAGIC       = b"SLVSEEN\0"
+_SIDECAR_VERSION     = 1
+_SIDECAR_HEADER      = struct.Struct("<8sIQqQI")
+_SIDECAR_CRC_WINDOW  = 4096
+
 # ---------------------------------------------------------------------------
 # Confidence threshold for automatic promotion to validated dict
 # ---------------------------------------------------------------------------
@@ -16,6 +38,590 @@ _FLUSH_SIZE = 8192
 _VALIDATED_CONFIDENCE_THRESHOLD = 0.85
 
 
+def _scan_log(path: Path, offset: int = 0) -> tuple[list[str], int, int]:
+    """Read the ``"word"`` of every complete JSONL line from byte ``offset`` on.
+
+    A last line without its newline is still being written and is left for
+    the next scan. Malformed lines are skipped with a warning.
+
+    Returns:
+        (words, end, skipped): words in log order, the byte offset after the
+        last complete line, and the number of malformed lines.
+    """
+    words: list[str] = []
+    skipped = 0
+    with open(path, "rb") as f:
+        f.seek(offset)
+        end = offset
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            pos  = end
+            end += len(line)
+            if not line.strip():
+                continue
+            try:
+                words.append(json.loads(line)["word"])
+            except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError):
+                logger.warning(f"Skipping malformed line at byte {pos} in {path.name}")
+                skipped += 1
+    return words, end, skipped
+
+
+def _log_crc(f, covered: int) -> int:
+    start = max(0, covered - _SIDECAR_CRC_WINDOW)
+    f.seek(start)
+    return zlib.crc32(f.read(covered - start))
+
+
+class SeenSidecar:
+    """Binary snapshot of the words in a JSONL log, kept next to it as ``<log>.seen``.
+
+    The sidecar covers a prefix of the log: the words of its first
+    ``covered`` bytes. ``load()`` returns them in one bulk read, along with
+    the offset where the log must be scanned from -- the end of the log
+    when the sidecar is current (same size and mtime), ``covered`` when the
+    log has only grown since, or 0 when it was rewritten, truncated or the
+    sidecar is damaged. ``append()`` extends it after a write to the log,
+    so it is maintained incrementally by every ``LogWriter``.
+
+    The log stays the source of truth; deleting the sidecar only costs one
+    full scan.
+
+    Args:
+        log_path: path to the JSONL log.
+    """
+
+    def __init__(self, log_path: Union[str, Path]):
+        self.log_path = Path(log_path)
+        self.path     = self.log_path.with_name(self.log_path.name + SIDECAR_SUFFIX)
+
+    def _read_header(self, f) -> Optional[tuple[int, int, int, int]]:
+        raw = f.read(_SIDECAR_HEADER.size)
+        if len(raw) != _SIDECAR_HEADER.size:
+            return None
+        magic, version, covered, mtime_ns, body_size, crc = _SIDECAR_HEADER.unpack(raw)
+        if magic != _SIDECAR_MAGIC or version != _SIDECAR_VERSION:
+            return None
+        return covered, mtime_ns, body_size, crc
+
+    def load(self) -> tuple[list[str], int]:
+        """Return (words, offset): the indexed words and where to resume scanning the log."""
+        try:
+            log_stat = os.stat(self.log_path)
+            with open(self.path, "rb") as f:
+                header = self._read_header(f)
+                if header is None:
+                    return [], 0
+                covered, mtime_ns, body_size, crc = header
+                if covered > log_stat.st_size:
+                    return [], 0
+                if not (covered == log_stat.st_size and mtime_ns == log_stat.st_mtime_ns):
+                    with open(self.log_path, "rb") as log:
+                        if _log_crc(log, covered) != crc:
+                            return [], 0
+                body = f.read(body_size)
+        except OSError:
+            return [], 0
+        if len(body) != body_size:
+            return [], 0
+        words = body.decode("utf-8").split("\0")
+        words.pop()   # empty string after the last terminator
+        return words, covered
+
+    def append(self, words: list[str], start: int, end: int) -> bool:
+        """Record ``words``, read from log bytes [start, end), if the sidecar covers exactly ``start``.
+
+        Otherwise (another process wrote to the log in between, or the
+        sidecar is missing) the sidecar is left as is and the next ``load()``
+        scans the gap. Returns whether the sidecar was extended.
+        """
+        try:
+            with open(self.path, "r+b") as f:
+                header = self._read_header(f)
+                if header is None or header[0] != start:
+                    return False
+                body_size = header[2]
+                chunk = "".join(w + "\0" for w in words).encode("utf-8", "surrogatepass")
+                f.seek(_SIDECAR_HEADER.size + body_size)
+                f.write(chunk)
+                f.truncate()
+                # The header goes last: a crash before it leaves the old, valid one.
+                self._write_header(f, end, body_size + len(chunk))
+        except FileNotFoundError:
+            if start != 0:
+                return False
+            self.rebuild(words, end)
+        except OSError as e:
+            logger.warning(f"Could not update {self.path.name}: {e}")
+            return False
+        return True
+
+    def rebuild(self, words: list[str], covered: int) -> None:
+        """Replace the sidecar with ``words``, covering the first ``covered`` log bytes."""
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        body = "".join(w + "\0" for w in words).encode("utf-8", "surrogatepass")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(b"\0" * _SIDECAR_HEADER.size)
+                f.write(body)
+                self._write_header(f, covered, len(body))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write {self.path.name}: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+    def _write_header(self, f, covered: int, body_size: int) -> None:
+        with open(self.log_path, "rb") as log:
+            crc = _log_crc(log, covered)
+            mtime_ns = os.fstat(log.fileno()).st_mtime_ns
+        f.seek(0)
+        f.write(_SIDECAR_HEADER.pack(
+            _SIDECAR_MAGIC, _SIDECAR_VERSION, covered, mtime_ns, body_size, crc
+        ))
+
+
+# ===========================================================================
+# FingerprintSet
+# ===========================================================================
+
+# splitmix64 constants.
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1  = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2  = np.uint64(0x94D049BB133111EB)
+
+INDEX_BACKENDS = ("set", "fingerprint")
+
+_FINGERPRINT_MAX_LOAD  = 0.75
+_FINGERPRINT_MIN_SLOTS = 1024
+_FINGERPRINT_CHUNK     = 65536   # keys per vectorized pass; bounds the temporaries
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer over a uint64 array (wrapping arithmetic)."""
+    x = x ^ (x >> np.uint64(30))
+    x *= _MIX_1
+    x ^= x >> np.uint64(27)
+    x *= _MIX_2
+    x ^= x >> np.uint64(31)
+    return x
+
+
+def fingerprint_words(words: list[str]) -> np.ndarray:
+    """64-bit fingerprints of ``words``, computed for the whole list at once.
+
+    Each char contributes ``mix64(code point, position)`` to a wrapping sum
+    per word, which is mixed again with the word length. Never 0 (the
+    empty-slot marker of ``FingerprintSet``). Deterministic across
+    processes and runs, unlike ``hash()``.
+
+    Returns:
+        uint64 array of shape (len(words),).
+    """
+    if len(words) > _FINGERPRINT_CHUNK:
+        return np.concatenate([
+            fingerprint_words(words[i:i + _FINGERPRINT_CHUNK])
+            for i in range(0, len(words), _FINGERPRINT_CHUNK)
+        ])
+    n       = len(words)
+    lengths = np.fromiter(map(len, words), dtype=np.int64, count=n)
+    codes   = np.frombuffer(
+        "".join(words).encode("utf-32-le", "surrogatepass"), dtype=np.uint32
+    ).astype(np.uint64)
+
+    starts = np.cumsum(lengths) - lengths
+    column = (np.arange(len(codes)) - np.repeat(starts, lengths)).astype(np.uint64)
+    terms  = _mix64(((codes << np.uint64(32)) | column) + _GOLDEN)
+
+    sums  = np.zeros(n, dtype=np.uint64)
+    chars = lengths > 0
+    if codes.size:
+        sums[chars] = np.add.reduceat(terms, starts[chars])
+    fingerprints = _mix64(sums ^ (lengths.astype(np.uint64) * _GOLDEN))
+    fingerprints[fingerprints == 0] = 1
+    return fingerprints
+
+
+def _utf8_lengths(words: list[str]) -> np.ndarray:
+    """UTF-8 byte length of each word (lone surrogates count 3, as "surrogatepass" encodes them)."""
+    lengths = np.zeros(len(words), dtype=np.int64)
+    for i in range(0, len(words), _FINGERPRINT_CHUNK):
+        chunk = words[i:i + _FINGERPRINT_CHUNK]
+        chars = np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk))
+        codes = np.frombuffer("".join(chunk).encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+        if not codes.size:
+            continue
+        width = 1 + (codes >= 0x80) + (codes >= 0x800) + (codes >= 0x10000)
+        ends  = np.concatenate(([0], np.cumsum(width, dtype=np.int64)))[np.cumsum(chars)]
+        lengths[i:i + len(chunk)] = np.diff(ends, prepend=0)
+    return lengths
+
+
+class FingerprintSet:
+    """Set of words stored as 64-bit fingerprints in a NumPy hash table.
+
+    A compact alternative to ``set[str]`` for large seen-sets: 8 bytes per
+    slot with linear probing at a load factor of at most 0.75, i.e. 8-11
+    bytes per word (a Python ``set[str]`` of short words takes 80-100), and
+    lookups and inserts run over whole batches. 100M words fit in a table of
+    2^27 slots -- 1 GiB; growing to it briefly holds the old table as well.
+
+    Words are not stored, only fingerprints, so membership can err one way:
+    an unseen word whose fingerprint equals one of ``n`` stored words is
+    reported as present. With well-mixed 64-bit fingerprints that happens
+    with probability at most ``n / 2**64`` per lookup -- 5.4e-12 for 100M
+    words, or about one wrongly skipped word in 180 billion lookups. Present
+    words are never reported absent.
+
+    Lookups may run in other threads while one thread adds words: a grown
+    table is filled aside and swapped in with one assignment, and inserts
+    into the live table only fill empty slots, so a word once present is
+    never reported absent mid-update.
+
+    ``share()`` publishes a read-only copy in shared memory; it pickles as
+    a reference to that block, so worker processes attach to one table
+    instead of each unpickling a private copy.
+
+    Example::
+
+        seen = FingerprintSet()
+        seen.update(["пароходы", "плыли"])
+        seen.isin(["пароходы", "реке"])   # array([ True, False])
+    """
+
+    def __init__(self, capacity: int = 0):
+        slots = _FINGERPRINT_MIN_SLOTS
+        while slots * _FINGERPRINT_MAX_LOAD < capacity:
+            slots *= 2
+        self._table = np.zeros(slots, dtype=np.uint64)
+        self._size  = 0
+        self._shm: Optional[shared_memory.SharedMemory] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, word: str) -> bool:
+        return bool(self.isin([word])[0])
+
+    @property
+    def nbytes(self) -> int:
+        return self._table.nbytes
+
+    def copy(self) -> FingerprintSet:
+        clone = FingerprintSet.__new__(FingerprintSet)
+        clone._table = self._table.copy()
+        clone._size  = self._size
+        clone._shm   = None
+        return clone
+
+    # ------------------------------------------------------------------
+    # Shared memory
+    # ------------------------------------------------------------------
+
+    def share(self) -> FingerprintSet:
+        """Return a read-only copy backed by a new shared memory block.
+
+        The creator must ``close()`` and ``unlink()`` it once every process
+        using it is done; other processes only ``close()``.
+        """
+        shm   = shared_memory.SharedMemory(create=True, size=max(1, self._table.nbytes))
+        table = np.ndarray(self._table.shape, dtype=np.uint64, buffer=shm.buf)
+        table[:] = self._table
+        return FingerprintSet._from_shared(shm, table, self._size)
+
+    @classmethod
+    def _from_shared(
+        cls, shm: shared_memory.SharedMemory, table: np.ndarray, size: int
+    ) -> FingerprintSet:
+        table.flags.writeable = False
+        shared = cls.__new__(cls)
+        shared._table = table
+        shared._size  = size
+        shared._shm   = shm
+        return shared
+
+    def close(self) -> None:
+        """Detach from the shared memory block (no-op for a private set)."""
+        if self._shm is not None:
+            self._table = np.zeros(0, dtype=np.uint64)   # drop the view before unmapping
+            self._shm.close()
+
+    def unlink(self) -> None:
+        """Free the shared memory block; only its creator calls this."""
+        if self._shm is not None:
+            self._shm.unlink()
+            self._shm = None
+
+    def __reduce__(self):
+        if self._shm is None:
+            return super().__reduce__()
+        return _attach_fingerprints, (self._shm.name, len(self._table), self._size)
+
+    def isin(self, words: list[str]) -> np.ndarray:
+        """Boolean mask: which of ``words`` are in the set."""
+        return self._contains(fingerprint_words(words))
+
+    def update(self, words: Iterable[str]) -> None:
+        """Add ``words`` to the set."""
+        words = list(words)
+        if words:
+            self.add_fingerprints(fingerprint_words(words))
+
+    def add_fingerprints(self, fingerprints: np.ndarray) -> None:
+        """Add precomputed ``fingerprint_words`` values."""
+        fingerprints = np.sort(fingerprints)
+        if fingerprints.size:
+            distinct = np.empty(fingerprints.size, dtype=bool)
+            distinct[0]  = True
+            distinct[1:] = fingerprints[1:] != fingerprints[:-1]
+            fingerprints = fingerprints[distinct]
+        fingerprints = fingerprints[~self._contains(fingerprints)]
+        needed = self._size + fingerprints.size
+        table  = self._table
+        if needed > len(table) * _FINGERPRINT_MAX_LOAD:
+            table = self._grown(needed)
+        for i in range(0, len(fingerprints), _FINGERPRINT_CHUNK):
+            _insert(table, fingerprints[i:i + _FINGERPRINT_CHUNK])
+        self._table, self._size = table, needed
+
+    def _contains(self, fingerprints: np.ndarray) -> np.ndarray:
+        if not fingerprints.size:
+            return np.zeros(0, dtype=bool)
+        table = self._table   # one table for the whole lookup, even if a grow swaps it
+        return np.concatenate([
+            _find(table, fingerprints[i:i + _FINGERPRINT_CHUNK])[1]
+            for i in range(0, len(fingerprints), _FINGERPRINT_CHUNK)
+        ])
+
+    def _grown(self, needed: int) -> np.ndarray:
+        """A larger table holding the stored fingerprints; the live one is untouched."""
+        old   = self._table
+        slots = len(old)
+        while slots * _FINGERPRINT_MAX_LOAD < needed:
+            slots *= 2
+        table  = np.zeros(slots, dtype=np.uint64)
+        stored = old[old != 0]
+        for i in range(0, len(stored), _FINGERPRINT_CHUNK):
+            _insert(table, stored[i:i + _FINGERPRINT_CHUNK])
+        return table
+
+
+def _find(table: np.ndarray, fingerprints: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Probe for each fingerprint: (slot of it or of the first empty slot, found mask)."""
+    mask   = len(table) - 1
+    slots  = (fingerprints & np.uint64(mask)).astype(np.int64)
+    found  = np.zeros(len(fingerprints), dtype=bool)
+    active = np.arange(len(fingerprints))
+    while active.size:
+        held = table[slots[active]]
+        hit  = held == fingerprints[active]
+        found[active[hit]] = True
+        active = active[~(hit | (held == 0))]
+        slots[active] = (slots[active] + 1) & mask
+    return slots, found
+
+
+def _insert(table: np.ndarray, fingerprints: np.ndarray) -> None:
+    # Absent, distinct fingerprints only. Several may probe to the same
+    # empty slot: the last write wins and the others probe on.
+    while fingerprints.size:
+        slots, _ = _find(table, fingerprints)
+        table[slots] = fingerprints
+        won = table[slots] == fingerprints
+        fingerprints = fingerprints[~won]
+
+
+def _attach_fingerprints(name: str, slots: int, size: int) -> FingerprintSet:
+    shm   = shared_memory.SharedMemory(name=name)
+    table = np.ndarray((slots,), dtype=np.uint64, buffer=shm.buf)
+    return FingerprintSet._from_shared(shm, table, size)
+
+
+# ===========================================================================
+# WordTable
+# ===========================================================================
+
+class WordTable:
+    """Read-only exact set of words, laid out in flat arrays for shared memory.
+
+    Words are stored as one UTF-8 blob with an offset array, plus their
+    ``fingerprint_words`` values in sorted order with the matching word
+    positions. A lookup finds candidates by fingerprint, in a vectorized
+    binary search over the whole batch, and confirms them by comparing
+    bytes, so -- unlike ``FingerprintSet`` -- a word is reported present
+    only if it was stored. About 24 bytes per word plus its UTF-8 text.
+
+    ``share()`` publishes a copy in shared memory that pickles as a
+    reference, like ``FingerprintSet.share()``.
+
+    Args:
+        words: distinct words to store.
+
+    Example::
+
+        table = WordTable(["пароходы", "плыли"])
+        table.isin(["пароходы", "реке"])   # array([ True, False])
+    """
+
+    def __init__(self, words: Iterable[str] = ()):
+        words        = list(words)
+        fingerprints = fingerprint_words(words) if words else np.zeros(0, dtype=np.uint64)
+        order        = np.argsort(fingerprints, kind="stable")
+        offsets      = np.zeros(len(words) + 1, dtype=np.int64)
+        np.cumsum(_utf8_lengths(words), out=offsets[1:])
+
+        self._fingerprints = fingerprints[order]
+        self._order        = order.astype(np.int64)
+        self._offsets      = offsets
+        self._blob         = np.frombuffer(
+            "".join(words).encode("utf-8", "surrogatepass"), dtype=np.uint8
+        )
+        self._shm: Optional[shared_memory.SharedMemory] = None
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def __contains__(self, word: str) -> bool:
+        return bool(self.isin([word])[0])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self._arrays())
+
+    def _arrays(self) -> tuple[np.ndarray, ...]:
+        return self._fingerprints, self._order, self._offsets, self._blob
+
+    def isin(self, words: list[str]) -> np.ndarray:
+        """Boolean mask: which of ``words`` are in the table."""
+        if len(words) > _FINGERPRINT_CHUNK:
+            return np.concatenate([
+                self.isin(words[i:i + _FINGERPRINT_CHUNK])
+                for i in range(0, len(words), _FINGERPRINT_CHUNK)
+            ])
+        found = np.zeros(len(words), dtype=bool)
+        n     = len(self._fingerprints)
+        if not words or not n:
+            return found
+
+        stored  = self._fingerprints
+        queried = fingerprint_words(words)
+        # Sorted needles let each binary search start where the last ended.
+        by_fp   = np.argsort(queried)
+        pos     = np.empty(len(words), dtype=np.int64)
+        pos[by_fp] = np.minimum(np.searchsorted(stored, queried[by_fp]), n - 1)
+        hits    = np.flatnonzero(stored[pos] == queried)
+        if not hits.size:
+            return found
+
+        # Compare the bytes of each hit with the stored word it points to.
+        positions = self._order[pos[hits]]
+        starts    = self._offsets[positions]
+        lengths   = self._offsets[positions + 1] - starts
+        hit_words = [words[i] for i in hits.tolist()]
+        q_lengths = _utf8_lengths(hit_words)
+        q_blob    = np.frombuffer(
+            "".join(hit_words).encode("utf-8", "surrogatepass"), dtype=np.uint8
+        )
+        q_starts  = np.cumsum(q_lengths) - q_lengths
+
+        same  = lengths == q_lengths
+        equal = same.copy()
+        check = np.flatnonzero(same & (lengths > 0))
+        if check.size:
+            spans  = lengths[check]
+            firsts = np.cumsum(spans) - spans
+            within = np.arange(int(spans.sum())) - np.repeat(firsts, spans)
+            differ = (
+                self._blob[np.repeat(starts[check], spans) + within]
+                != q_blob[np.repeat(q_starts[check], spans) + within]
+            )
+            equal[check] = np.add.reduceat(differ, firsts) == 0
+        found[hits[equal]] = True
+
+        # Words sharing a fingerprint sit next to each other; a miss on the
+        # first of them checks the rest.
+        for k in np.flatnonzero(~equal).tolist():
+            i, p = int(hits[k]), int(pos[hits[k]]) + 1
+            word = words[i].encode("utf-8", "surrogatepass")
+            while p < n and stored[p] == queried[i]:
+                j = self._order[p]
+                if self._blob[self._offsets[j]:self._offsets[j + 1]].tobytes() == word:
+                    found[i] = True
+                    break
+                p += 1
+        return found
+
+    # ------------------------------------------------------------------
+    # Shared memory
+    # ------------------------------------------------------------------
+
+    def share(self) -> WordTable:
+        """Return a copy backed by a new shared memory block.
+
+        The creator must ``close()`` and ``unlink()`` it once every process
+        using it is done; other processes only ``close()``.
+        """
+        shm    = shared_memory.SharedMemory(create=True, size=max(1, self.nbytes))
+        shared = WordTable._from_shared(shm, len(self), self._blob.nbytes)
+        for target, source in zip(shared._arrays(), self._arrays()):
+            target.flags.writeable = True
+            target[:] = source
+            target.flags.writeable = False
+        return shared
+
+    @classmethod
+    def _from_shared(cls, shm: shared_memory.SharedMemory, n: int, blob_bytes: int) -> WordTable:
+        # Block layout: fingerprints, order, offsets, blob.
+        arrays = []
+        at = 0
+        for dtype, count in ((np.uint64, n), (np.int64, n), (np.int64, n + 1), (np.uint8, blob_bytes)):
+            array = np.ndarray((count,), dtype=dtype, buffer=shm.buf, offset=at)
+            array.flags.writeable = False
+            arrays.append(array)
+            at += array.nbytes
+
+        shared = cls.__new__(cls)
+        shared._fingerprints, shared._order, shared._offsets, shared._blob = arrays
+        shared._shm = shm
+        return shared
+
+    def close(self) -> None:
+        """Detach from the shared memory block (no-op for a private table)."""
+        if self._shm is not None:
+            # Drop the views before unmapping.
+            self._fingerprints = np.zeros(0, dtype=np.uint64)
+            self._order        = np.zeros(0, dtype=np.int64)
+            self._offsets      = np.zeros(1, dtype=np.int64)
+            self._blob         = np.zeros(0, dtype=np.uint8)
+            self._shm.close()
+
+    def unlink(self) -> None:
+        """Free the shared memory block; only its creator calls this."""
+        if self._shm is not None:
+            self._shm.unlink()
+            self._shm = None
+
+    def __reduce__(self):
+        if self._shm is None:
+            return super().__reduce__()
+        return _attach_word_table, (self._shm.name, len(self), self._blob.nbytes)
+
+
+def _attach_word_table(name: str, n: int, blob_bytes: int) -> WordTable:
+    return WordTable._from_shared(shared_memory.SharedMemory(name=name), n, blob_bytes)
+
+
+def drop_seen(
+    seen: Union[frozenset[str], FingerprintSet, WordTable], words: list[str]
+) -> list[str]:
+    """Words not in ``seen``, a ``PersistenceIndex`` snapshot, in their original order."""
+    if isinstance(seen, (FingerprintSet, WordTable)):
+        if not words:
+            return []
+        return [w for w, present in zip(words, seen.isin(words)) if not present]
+    return [w for w in words if w not in seen]
+
+
 # ===========================================================================
 # PersistenceIndex
 # ===========================================================================
@@ -24,31 +630,54 @@ class PersistenceIndex:
     """Tracks which words have already been processed, across sessions.
 
     The seen-set is the single source of truth for deduplication. It is built
-    at startup by scanning the JSONL log file (words only -- morphemes are not
-    loaded). New words are registered via ``mark_seen()``.
+    at startup from the JSONL log file (words only -- morphemes are not
+    loaded): bulk-read from the log's ``SeenSidecar`` and completed by scanning
+    the part of the log the sidecar does not cover yet. New words are
+    registered via ``mark_seen()``.
+
+    Worker processes never receive the index itself: ``share_snapshot()``
+    publishes the seen-set once in shared memory -- a ``WordTable``, or the
+    ``FingerprintSet`` with the fingerprint backend -- and each worker looks
+    words up in that one copy, without any heavy state (morpheme data, file
+    handles, etc.).
 
-    This class is intentionally lightweight so it can be serialized to a
-    ``frozenset`` and passed to worker processes without carrying any heavy
-    state (morpheme data, file handles, etc.).
+    The ``"fingerprint"`` backend keeps the seen-set in a ``FingerprintSet``
+    instead of a ``set[str]`` -- about a tenth of the memory, batched
+    lookups, and a bounded false-positive rate (see ``FingerprintSet``).
 
     Owns no I/O -- writing is delegated to ``LogWriter``.
 
     Args:
         min_len: minimum word length accepted for inference.
         max_len: maximum word length accepted for inference.
+        backend: ``"set"`` (exact) or ``"fingerprint"`` (compact).
 
     Example::
 
         index = PersistenceIndex.from_jsonl("predictions.jsonl")
-        snapshot = index.snapshot()           # frozenset -- safe to pickle
         unseen = index.filter_unseen(words)
         index.mark_seen(unseen)
+
+        table = index.share_snapshot()        # WordTable in shared memory
+        try:
+            ...                               # pass ``table`` to the workers
+        finally:
+            table.close()
+            table.unlink()
     """
 
-    def __init__(self, min_len: int = 1, max_len: int = 64):
-        self._seen:  set[str] = set()
+    def __init__(self, min_len: int = 1, max_len: int = 64, backend: str = "set"):
+        if backend not in INDEX_BACKENDS:
+            raise ValueError(f"Unknown index backend: '{backend}'")
+        self._seen: Union[set[str], FingerprintSet] = (
+            set() if backend == "set" else FingerprintSet()
+        )
         self.min_len = min_len
         self.max_len = max_len
+        self.backend = backend
+        # Log bytes already merged into the seen-set, for reload_from_jsonl().
+        self._log_path:   Optional[Path] = None
+        self._log_offset: int = 0
 
     # ------------------------------------------------------------------
     # Construction
@@ -60,49 +689,81 @@ class PersistenceIndex:
         path: Union[str, Path],
         min_len: int = 1,
         max_len: int = 64,
+        sidecar: bool = True,
+        backend: str = "set",
     ) -> PersistenceIndex:
-        """Build an index by scanning word keys from an existing JSONL file.
+        """Build an index from the word keys of an existing JSONL file.
 
         Only the ``"word"`` field is read per line -- morpheme data is ignored.
-        Malformed lines are skipped with a warning so a partially-written file
-        does not block startup.
+        With ``sidecar`` the words indexed in ``<path>.seen`` are loaded in
+        one read and only the rest of the log is parsed; the sidecar is then
+        brought up to date (or built, on first use). Malformed lines are
+        skipped with a warning so a partially-written file does not block
+        startup.
 
         Args:
             path:    path to the JSONL log file (need not exist yet).
             min_len: forwarded to the constructor.
             max_len: forwarded to the constructor.
+            sidecar: use and maintain the ``SeenSidecar`` of the log.
+            backend: forwarded to the constructor.
 
         Returns:
             A populated ``PersistenceIndex`` instance.
         """
-        index = cls(min_len=min_len, max_len=max_len)
+        index = cls(min_len=min_len, max_len=max_len, backend=backend)
         p = Path(path)
+        index._log_path = p
 
         if not p.is_file():
             return index
 
-        loaded = skipped = 0
+        seen_sidecar = SeenSidecar(p) if sidecar else None
+        indexed, offset = seen_sidecar.load() if seen_sidecar else ([], 0)
+        words, end, skipped = _scan_log(p, offset)
 
-        with open(p, "r", encoding="utf-8") as f:
-            for lineno, line in enumerate(f, start=1):
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    index._seen.add(json.loads(line)["word"])
-                    loaded += 1
-                except (json.JSONDecodeError, KeyError):
-                    logger.warning(
-                        f"Skipping malformed line {lineno} in {p.name}"
-                    )
-                    skipped += 1
+        index._seen.update(indexed)
+        index._seen.update(words)
+        index._log_offset = end
+
+        if seen_sidecar is not None and end > offset:
+            if offset == 0:
+                seen_sidecar.rebuild(words, end)
+            else:
+                seen_sidecar.append(words, offset, end)
 
         logger.info(
-            f"PersistenceIndex: loaded {loaded:,} keys from {p.name}"
+            f"PersistenceIndex: loaded {len(indexed) + len(words):,} keys from {p.name}"
+            + (f" ({len(indexed):,} from {seen_sidecar.path.name})" if indexed else "")
             + (f" ({skipped} lines skipped)" if skipped else "")
         )
         return index
 
+    @classmethod
+    def from_log(
+        cls,
+        path: Union[str, Path],
+        min_len: int = 1,
+        max_len: int = 64,
+        backend: str = "set",
+    ) -> PersistenceIndex:
+        """Build an index from a prediction log in either format.
+
+        A columnar log (``.slvc``) is read through its word column only; any
+        other path goes to ``from_jsonl``.
+        """
+        if not is_columnar(path):
+            return cls.from_jsonl(path, min_len, max_len, backend=backend)
+
+        index = cls(min_len=min_len, max_len=max_len, backend=backend)
+        p = Path(path)
+        index._log_path = p
+        if p.is_file():
+            words, index._log_offset = read_words(p)
+            index._seen.update(words)
+            logger.info(f"PersistenceIndex: loaded {len(words):,} keys from {p.name}")
+        return index
+
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
@@ -122,6 +783,9 @@ class PersistenceIndex:
         seen    = self._seen
         min_len = self.min_len
         max_len = self.max_len
+        if isinstance(seen, FingerprintSet):
+            candidates = list(dict.fromkeys(w for w in words if min_len <= len(w) <= max_len))
+            return sorted(drop_seen(seen, candidates), key=len)
         unseen  = {w for w in words if min_len <= len(w) <= max_len and w not in seen}
         return sorted(unseen, key=len)
 
@@ -133,25 +797,74 @@ class PersistenceIndex:
         """
         self._seen.update(words)
 
-    def snapshot(self) -> frozenset[str]:
-        """Return an immutable copy of the seen-set for passing to workers.
+    def snapshot(self) -> Union[frozenset[str], FingerprintSet]:
+        """Return a copy of the seen-set for passing to workers.
 
-        The returned ``frozenset`` is safe to pickle and share across
-        ``multiprocessing.Process`` boundaries.
+        The returned ``frozenset`` (or ``FingerprintSet`` with the fingerprint
+        backend) is safe to pickle and share across ``multiprocessing.Process``
+        boundaries. Filter words against it with ``drop_seen()``.
         """
+        if isinstance(self._seen, FingerprintSet):
+            return self._seen.copy()
         return frozenset(self._seen)
 
+    def share_snapshot(
+        self, extra_words: Iterable[str] = ()
+    ) -> Union[FingerprintSet, WordTable]:
+        """Publish the seen-set, plus ``extra_words``, in shared memory for workers.
+
+        Workers receive the returned table as a reference and look words up
+        in the one shared copy, so neither spawn time nor memory grows with
+        their number. The ``"set"`` backend publishes a ``WordTable`` and
+        stays exact; the ``"fingerprint"`` backend publishes its
+        ``FingerprintSet``. The caller owns the block: ``close()`` and
+        ``unlink()`` it when the workers are done.
+
+        Args:
+            extra_words: more words to exclude, e.g. the base dictionary keys.
+        """
+        if not isinstance(self._seen, FingerprintSet):
+            return WordTable(self._seen.union(extra_words)).share()
+        extra_words = list(extra_words)
+        known = self._seen.copy() if extra_words else self._seen
+        known.update(extra_words)
+        return known.share()
+
     def reload_from_jsonl(self, path: Union[str, Path]) -> None:
-        """Rescan the JSONL file and merge any new keys into the seen-set.
+        """Merge keys appended to the JSONL file since it was last read.
 
         Intended to be called after a multiprocessing run completes, so the
         main-process index reflects results written by worker processes.
+        Only the bytes past the previous read are parsed, unless the file is
+        a different one or has shrunk.
 
         Args:
             path: path to the JSONL log file.
         """
-        fresh = PersistenceIndex.from_jsonl(path, self.min_len, self.max_len)
-        self._seen.update(fresh._seen)
+        p = Path(path)
+        if not p.is_file():
+            return
+        offset = self._log_offset
+        if p != self._log_path or p.stat().st_size < offset:
+            offset = 0
+        words, self._log_offset, _ = _scan_log(p, offset)
+        self._log_path = p
+        self._seen.update(words)
+
+    def reload_from_log(self, path: Union[str, Path]) -> None:
+        """``reload_from_jsonl`` for a prediction log in either format."""
+        if not is_columnar(path):
+            self.reload_from_jsonl(path)
+            return
+        p = Path(path)
+        if not p.is_file():
+            return
+        offset = self._log_offset
+        if p != self._log_path or p.stat().st_size < offset:
+            offset = 0
+        words, self._log_offset = read_words(p, offset)
+        self._log_path = p
+        self._seen.update(words)
 
     def __len__(self) -> int:
         return len(self._seen)
@@ -162,17 +875,25 @@ class PersistenceIndex:
 # ===========================================================================
 
 class LogWriter:
-    """Buffered append-only writer for JSONL prediction logs.
+    """Buffered append-only writer for prediction logs.
 
     Accumulates result dicts in memory and flushes to disk either when the
     buffer reaches ``_FLUSH_SIZE`` or when ``flush()`` is called explicitly.
+    Each flush also extends the log's ``SeenSidecar``, so the next
+    ``PersistenceIndex.from_jsonl`` does not have to parse the new lines.
+
+    A path ending in ``.slvc`` selects the binary columnar format instead
+    (see ``slovorez.io.columnar``): each flush appends one chunk, and its
+    word column loads without a sidecar. A torn chunk left at the end of the
+    log by a failed or killed flush is cut off before the next append.
 
     Owns no deduplication logic -- that is ``PersistenceIndex``'s job.
     Owns no morpheme lookup -- that is ``MorphemeRegistry``'s job.
 
     Args:
-        path: path to the JSONL output file. Parent directories are created
-              automatically.
+        path:    path to the output file, JSONL or ``.slvc``. Parent
+                 directories are created automatically.
+        sidecar: maintain the ``<path>.seen`` sidecar (JSONL only).
 
     Example::
 
@@ -181,10 +902,14 @@ class LogWriter:
         writer.flush()          # ensure everything is on disk
     """
 
-    def __init__(self, path: Union[str, Path]):
+    def __init__(self, path: Union[str, Path], sidecar: bool = True):
         self._path = Path(path)
         self._path.parent.mkdir(parents=True, exist_ok=True)
         self._buffer: list[dict] = []
+        self._columnar = is_columnar(self._path)
+        self._sidecar  = SeenSidecar(self._path) if sidecar and not self._columnar else None
+        # Whether the columnar log is known to end on a chunk boundary.
+        self._tail_ok  = not self._columnar
 
     # ------------------------------------------------------------------
     # Public API
@@ -217,16 +942,54 @@ class LogWriter:
     # Internal
     # ------------------------------------------------------------------
 
+    def _encode(self, records: list[dict]) -> bytes:
+        if self._columnar:
+            return encode_chunk(records)
+        return "".join(
+            json.dumps(record, ensure_ascii=False) + "\n" for record in records
+        ).encode("utf-8")
+
+    def _encode_buffer(self) -> bytes:
+        """Encode the buffer, dropping only the records the format cannot hold."""
+        try:
+            return self._encode(self._buffer)
+        except (TypeError, ValueError):
+            pass
+        kept: list[dict] = []
+        for record in self._buffer:
+            try:
+                self._encode([record])
+            except (TypeError, ValueError) as e:
+                logger.error(f"LogWriter: dropping a record for {self._path.name}: {e}")
+                continue
+            kept.append(record)
+        self._buffer = kept
+        return self._encode(kept)
+
     def _flush_buffer(self) -> None:
+        data = self._encode_buffer()
+        if not self._buffer:
+            return
         try:
-            with open(self._path, "a", encoding="utf-8") as f:
-                for record in self._buffer:
-                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            if not self._tail_ok:
+                removed = repair_tail(self._path)
+                if removed:
+                    logger.warning(f"LogWriter: cut a torn {removed}-byte chunk off {self._path.name}")
+                self._tail_ok = True
+            with open(self._path, "ab") as f:
+                start = f.tell()
+                f.write(data)
+                end = f.tell()
         except OSError as e:
+            # The buffer is kept, so the next flush retries the write.
             logger.error(f"LogWriter: failed to write to {self._path}: {e}")
+            self._tail_ok = not self._columnar
             raise
-        finally:
-            self._buffer.clear()
+        # A gap means another process appended meanwhile; the sidecar
+        # then stays behind and the next load scans the difference.
+        if self._sidecar is not None and end - start == len(data):
+            self._sidecar.append([record["word"] for record in self._buffer], start, end)
+        self._buffer.clear()
 
 
 # ===========================================================================
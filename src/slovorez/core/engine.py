@@ -1,4 +1,6 @@
 import logging
+import os
+from pathlib import Path
 import numpy as np
 import onnxruntime as ort
 
@@ -10,14 +12,123 @@ _PROVIDER_PRIORITY = [
     "CPUExecutionProvider",
 ]
 
+_EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel":   ort.ExecutionMode.ORT_PARALLEL,
+}
+
+_OPTIMIZATION_LEVELS = {
+    "disable":  ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic":    ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all":      ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+# Keys accepted in ``session_options`` (from_pretrained / config.json).
+_SESSION_OPTION_DEFAULTS = {
+    "intra_op_num_threads":     0,          # 0 = let ONNX Runtime decide
+    "inter_op_num_threads":     0,
+    "execution_mode":           "sequential",
+    "graph_optimization_level": "all",
+    "optimized_model_cache":    True,
+}
+
+_INT8_SUFFIX = ".int8"
+
+# ONNX tensor types predict() can bind to NumPy buffers.
+_ORT_NUMPY_TYPES = {
+    "tensor(float)":   np.float32,
+    "tensor(float16)": np.float16,
+    "tensor(double)":  np.float64,
+    "tensor(int32)":   np.int32,
+    "tensor(int64)":   np.int64,
+}
+
+# Providers that compile nodes into blobs ONNX Runtime cannot serialize.
+_NON_SERIALIZABLE_PROVIDERS = {"TensorrtExecutionProvider", "TensorRTExecutionProvider"}
+
+
+def _local_providers(providers: list[str]) -> list[str]:
+    # The Azure provider only proxies remote calls; the first provider that
+    # executes the graph locally is the one a session effectively runs on.
+    return [p for p in providers if p != "AzureExecutionProvider"] or providers
+
+
+def resolve_session_options(options: dict | None) -> dict:
+    """Validate ``session_options`` and fill in defaults.
+
+    Raises:
+        ValueError: on unknown keys or values.
+    """
+    options = dict(options or {})
+    unknown = set(options) - set(_SESSION_OPTION_DEFAULTS)
+    if unknown:
+        raise ValueError(
+            f"Unknown session option(s): {sorted(unknown)}. "
+            f"Expected any of: {sorted(_SESSION_OPTION_DEFAULTS)}"
+        )
+    resolved = {**_SESSION_OPTION_DEFAULTS, **options}
+    if resolved["execution_mode"] not in _EXECUTION_MODES:
+        raise ValueError(
+            f"Unknown execution_mode: '{resolved['execution_mode']}'. "
+            f"Expected one of: {list(_EXECUTION_MODES)}"
+        )
+    if resolved["graph_optimization_level"] not in _OPTIMIZATION_LEVELS:
+        raise ValueError(
+            f"Unknown graph_optimization_level: '{resolved['graph_optimization_level']}'. "
+            f"Expected one of: {list(_OPTIMIZATION_LEVELS)}"
+        )
+    return resolved
+
+
+def int8_weights_path(model_path: str | Path) -> Path:
+    """Default location of the INT8 variant, e.g. ``slovorez-v1.int8.onnx``.
+
+    Built by ``slovorez.core.quantization``.
+    """
+    weights = Path(model_path)
+    return weights.with_name(f"{weights.stem}{_INT8_SUFFIX}{weights.suffix}")
+
 
 class ModelResource:
-    def __init__(self, model_path: str, device: str = "auto"):
+    """ONNX Runtime session over a model file, created lazily on first use.
+
+    Args:
+        model_path:      path to the ``.onnx`` weights.
+        device:          ``"auto"`` | ``"cuda"`` | ``"cpu"``.
+        session_options: dict with any of ``intra_op_num_threads``,
+            ``inter_op_num_threads``, ``execution_mode`` ("sequential" |
+            "parallel"), ``graph_optimization_level`` ("disable" | "basic" |
+            "extended" | "all") and ``optimized_model_cache`` (bool). Plain
+            values only, so the dict can live in config.json and be passed
+            to worker processes.
+
+    With ``optimized_model_cache`` the graph optimized for the selected
+    provider is saved next to the weights (see ``optimized_model_path``)
+    and loaded as-is by later sessions, which skip graph optimization.
+    The cache is rebuilt when the weights are newer than it.
+
+    ``predict`` runs through an ONNX Runtime I/O binding: the output is
+    written into a buffer owned by the resource, grown to the largest batch
+    seen, so steady-state inference allocates no arrays. The returned
+    array is a view of that buffer and is overwritten by the next call; a
+    resource must not be shared between threads.
+    """
+
+    def __init__(self, model_path: str, device: str = "auto", session_options: dict | None = None):
         self.model_path = model_path
         self.device = device
+        self.session_options = resolve_session_options(session_options)
         self.initialized_device: str | None = None
         self._session: ort.InferenceSession | None = None
         self._input_name: str | None = None
+        self._binding: ort.IOBinding | None = None
+        self._output_name: str | None = None
+        self._output_tail: tuple[int, ...] = ()
+        self._output_seq: int | None = None
+        self._input_dtype: np.dtype | None = None
+        self._input_buffer  = np.empty(0)
+        self._output_buffer = np.empty(0)
 
     def _build_providers(self) -> list[str]:
         available = ort.get_available_providers()
@@ -37,17 +148,121 @@ class ModelResource:
     
         return list(dict.fromkeys(gpu_providers + available + ["CPUExecutionProvider"]))
 
+    def _build_session_options(self) -> ort.SessionOptions:
+        options = ort.SessionOptions()
+        options.intra_op_num_threads     = int(self.session_options["intra_op_num_threads"])
+        options.inter_op_num_threads     = int(self.session_options["inter_op_num_threads"])
+        options.execution_mode           = _EXECUTION_MODES[self.session_options["execution_mode"]]
+        options.graph_optimization_level = _OPTIMIZATION_LEVELS[
+            self.session_options["graph_optimization_level"]
+        ]
+        return options
+
+    def _cache_level(self) -> str:
+        # "all" adds layout transforms tuned to the current CPU, which ONNX
+        # Runtime warns against serializing. The cache keeps the portable
+        # "extended" graph and "all" is re-applied, cheaply, on load.
+        level = self.session_options["graph_optimization_level"]
+        return "extended" if level == "all" else level
+
+    def optimized_model_path(self, provider: str) -> Path:
+        """Cache file for the graph optimized for ``provider``.
+
+        Fused ops are provider- and version-specific, so both are part of
+        the name, e.g. ``slovorez-v1.opt-extended-cpu-ort1.21.0.onnx``.
+        """
+        weights = Path(self.model_path)
+        tag     = provider.removesuffix("ExecutionProvider").lower()
+        return weights.with_name(
+            f"{weights.stem}.opt-{self._cache_level()}-{tag}-ort{ort.__version__}.onnx"
+        )
+
+    def _load_cached(self, cache_path: Path, providers: list[str]) -> ort.InferenceSession:
+        options = self._build_session_options()
+        if self.session_options["graph_optimization_level"] != "all":
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        return ort.InferenceSession(str(cache_path), sess_options=options, providers=providers)
+
+    def _cache_path(self, providers: list[str]) -> Path | None:
+        """Optimized model cache for ``providers``, or None if it is not used."""
+        use_cache = (
+            self.session_options["optimized_model_cache"]
+            and self.session_options["graph_optimization_level"] != "disable"
+            and not _NON_SERIALIZABLE_PROVIDERS.intersection(providers)
+        )
+        if not use_cache:
+            return None
+        return self.optimized_model_path(_local_providers(providers)[0])
+
+    def _cache_is_current(self, cache_path: Path) -> bool:
+        return cache_path.is_file() and cache_path.stat().st_mtime >= os.path.getmtime(self.model_path)
+
+    def needs_optimized_model(self) -> bool:
+        """Whether the next session would optimize the graph and write the cache first.
+
+        Lets a caller build the cache once, e.g. in a short-lived process,
+        before starting several workers that would each optimize it.
+        """
+        cache_path = self._cache_path(self._build_providers())
+        return cache_path is not None and not self._cache_is_current(cache_path)
+
+    def _create_session(self, providers: list[str]) -> ort.InferenceSession:
+        cache_path = self._cache_path(providers)
+        if cache_path is None:
+            return ort.InferenceSession(
+                self.model_path, sess_options=self._build_session_options(), providers=providers
+            )
+
+        if self._cache_is_current(cache_path):
+            try:
+                session = self._load_cached(cache_path, providers)
+                logger.info(f"Loaded optimized model from cache: {cache_path.name}")
+                return session
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable optimized model cache {cache_path}: {e}")
+
+        # Written under a per-process name and renamed into place, so
+        # workers starting together never read a half-written file.
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        options  = self._build_session_options()
+        options.graph_optimization_level = _OPTIMIZATION_LEVELS[self._cache_level()]
+        options.optimized_model_filepath = str(tmp_path)
+        try:
+            session = ort.InferenceSession(self.model_path, sess_options=options, providers=providers)
+            os.replace(tmp_path, cache_path)
+            logger.info(f"Saved optimized model to cache: {cache_path.name}")
+        except Exception as e:
+            logger.warning(f"Optimized model cache disabled ({cache_path.parent}): {e}")
+            tmp_path.unlink(missing_ok=True)
+            return ort.InferenceSession(
+                self.model_path, sess_options=self._build_session_options(), providers=providers
+            )
+
+        if self.session_options["graph_optimization_level"] == "all":
+            return self._load_cached(cache_path, providers)
+        return session
+
+    @property
+    def on_gpu(self) -> bool:
+        """Whether inference runs on a GPU provider.
+
+        Before a session exists this is judged from the configured providers,
+        without creating one -- so a parent process can plan GPU workers
+        without initializing the device before it forks them.
+        """
+        if self.initialized_device is not None:
+            return self.initialized_device in _PROVIDER_PRIORITY[:-1]
+        return _local_providers(self._build_providers())[0] in _PROVIDER_PRIORITY[:-1]
+
     def get_session(self) -> ort.InferenceSession:
         if self._session is not None:
             return self._session
 
         providers = self._build_providers()
         try:
-            self._session = ort.InferenceSession(
-                self.model_path,
-                providers=providers,
-            )
+            self._session = self._create_session(providers)
             self._input_name = self._session.get_inputs()[0].name
+            self._init_binding(self._session)
             self.initialized_device = self._session.get_providers()[0]
             logger.info(f"Session initialized with provider: {self.initialized_device}")
         except Exception as e:
@@ -56,6 +271,65 @@ class ModelResource:
 
         return self._session
 
+    def _init_binding(self, session: ort.InferenceSession) -> None:
+        # Binding needs the output shape up front: (batch, seq_len) from the
+        # input, unless declared, plus fixed trailing dims. Graphs that do
+        # not declare those fall back to session.run().
+        model_input  = session.get_inputs()[0]
+        model_output = session.get_outputs()[0]
+        tail = model_output.shape[2:]
+        if (
+            model_input.type not in _ORT_NUMPY_TYPES
+            or model_output.type not in _ORT_NUMPY_TYPES
+            or len(model_output.shape) < 2
+            or not all(isinstance(dim, int) for dim in tail)
+        ):
+            logger.info("Output shape is not static past (batch, seq_len); I/O binding disabled")
+            return
+        self._binding       = session.io_binding()
+        self._output_name   = model_output.name
+        self._output_tail   = tuple(tail)
+        self._output_seq    = model_output.shape[1] if isinstance(model_output.shape[1], int) else None
+        self._input_dtype   = np.dtype(_ORT_NUMPY_TYPES[model_input.type])
+        self._output_buffer = np.empty(0, dtype=_ORT_NUMPY_TYPES[model_output.type])
+        self._input_buffer  = np.empty(0, dtype=self._input_dtype)
+
+    @staticmethod
+    def _view(buffer: np.ndarray, shape: tuple[int, ...]) -> tuple[np.ndarray, np.ndarray]:
+        # Grow to the largest request seen; smaller ones reuse the front of it.
+        size = int(np.prod(shape))
+        if buffer.size < size:
+            buffer = np.empty(size, dtype=buffer.dtype)
+        return buffer, buffer[:size].reshape(shape)
+
     def predict(self, x: np.ndarray) -> np.ndarray:
+        """Run the model on a (batch, seq_len) matrix of char ids.
+
+        Returns:
+            Model output of shape (batch, seq_len, num_tags). With I/O
+            binding this is a view of a reused buffer, valid until the next
+            ``predict`` call -- copy it to keep it longer.
+        """
         session = self.get_session()
-        return session.run(None, {self._input_name: x})[0]
\ No newline at end of file
+        if self._binding is None:
+            return session.run(None, {self._input_name: x})[0]
+
+        if x.dtype != self._input_dtype or not x.flags.c_contiguous:
+            # Staged through a reused buffer rather than a fresh astype() copy.
+            self._input_buffer, staged = self._view(self._input_buffer, x.shape)
+            np.copyto(staged, x, casting="unsafe")
+            x = staged
+        seq_len = self._output_seq or x.shape[1]
+        self._output_buffer, out = self._view(
+            self._output_buffer, (x.shape[0], seq_len, *self._output_tail)
+        )
+
+        binding = self._binding
+        binding.bind_input(
+            self._input_name, "cpu", 0, x.dtype, x.shape, x.ctypes.data
+        )
+        binding.bind_output(
+            self._output_name, "cpu", 0, out.dtype, out.shape, out.ctypes.data
+        )
+        session.run_with_iobinding(binding)
+        return out
\ No newline at end of file
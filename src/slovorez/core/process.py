@@ -3,6 +3,8 @@ from __future__ import annotations
 import numpy as np
 from typing import Generator
 
+import slovorezCXX
+
 from slovorez.core.vocab import PAD_ID, UNK_ID, PAD_TOKEN, UNK_TOKEN
 from slovorez.core.vocab.morpheme import MORPHEME_TYPE_VOCAB
 
@@ -11,14 +13,46 @@ from slovorez.core.vocab.morpheme import MORPHEME_TYPE_VOCAB
 # Internal helpers
 # ---------------------------------------------------------------------------
 
-def _pad_batch(tokenized_list: list[list[int]], maxlen: int = 64) -> np.ndarray:
-    current_max = max(len(t) for t in tokenized_list)
-    actual_len = min(current_max, maxlen)
-    arr = np.zeros((len(tokenized_list), actual_len), dtype=np.int32)
-    for i, tokens in enumerate(tokenized_list):
-        t_len = min(len(tokens), actual_len)
-        arr[i, :t_len] = tokens[:t_len]
-    return arr
+def _build_char_lut(char_vocab: dict[str, int], unk_id: int) -> np.ndarray:
+    """Dense code point -> char id table for the single-char entries of ``char_vocab``.
+
+    The last slot holds ``unk_id`` and stands for every code point past the
+    table, so lookups clip instead of bounds-checking.
+    """
+    chars = {ord(c): i for c, i in char_vocab.items() if len(c) == 1}
+    lut = np.full(max(chars, default=0) + 2, unk_id, dtype=np.int32)
+    lut[list(chars)] = list(chars.values())
+    return lut
+
+
+def _encode_lut(
+    words: list[str],
+    lut: np.ndarray,
+    maxlen: int = 64,
+    pad_context: int = 0,
+    pad_id: int = 0,
+) -> np.ndarray:
+    """Encode words through ``lut`` into a padded int32 matrix, without per-char Python work.
+
+    The batch is joined into one UTF-32 buffer, mapped through the table in
+    one gather and scattered into the matrix by each char's (row, column).
+    Chars at columns past the matrix width are dropped (truncation).
+    """
+    n       = len(words)
+    lengths = np.fromiter(map(len, words), dtype=np.int64, count=n)
+    width   = min(int(lengths.max(initial=0)) + pad_context, maxlen)
+    out     = np.full((n, width), pad_id, dtype=np.int32)
+
+    codes = np.frombuffer("".join(words).encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    ids   = lut[np.minimum(codes, len(lut) - 1)]
+
+    # Flat index of each char in ``out``: row * width + position in its word.
+    starts = np.cumsum(lengths) - lengths
+    column = np.arange(len(codes)) - np.repeat(starts, lengths)
+    keep   = column < width
+    flat   = np.repeat(np.arange(n) * width, lengths) + column
+    out.ravel()[flat[keep]] = ids[keep]
+    return out
 
 
 def _decode_word_bies(
@@ -85,6 +119,167 @@ def _decode_word_bies(
     return segments, has_errors
 
 
+def reduce_logits(logits: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Collapse (batch, seq_len, num_tags) logits to the best tag per char.
+
+    Returns:
+        (tag_ids, confidences): uint8 tag ids (uint16 beyond 256 tags) and
+        float16 scores of those tags, both of shape (batch, seq_len). This is
+        all ``decode_tags_detail`` needs, at a fraction of the logits' size.
+    """
+    tag_dtype = np.uint8 if logits.shape[-1] <= 256 else np.uint16
+    tag_ids   = np.argmax(logits, axis=-1).astype(tag_dtype)
+    max_confs = np.max(logits, axis=-1).astype(np.float16)
+    return tag_ids, max_confs
+
+
+# BIES prefix codes used by the batch decoder. Tags without a BIES prefix
+# ("<PAD>", "<UNK>") are _TAG_SKIP: their char is dropped from the output.
+_TAG_SKIP, _TAG_B, _TAG_I, _TAG_E, _TAG_S = range(5)
+_TAG_PREFIX_CODES = {"B-": _TAG_B, "I-": _TAG_I, "E-": _TAG_E, "S-": _TAG_S}
+
+
+def _build_tag_tables(
+    rev_bies_vocab: dict[int, str],
+    morpheme_type_vocab: dict[str, int],
+    num_tags: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Map tag ids to (prefix code, morpheme type id) lookup arrays.
+
+    Ids missing from ``rev_bies_vocab`` decode as "S-ROOT", like in
+    ``_decode_word_bies``.
+    """
+    size = max(num_tags, max(rev_bies_vocab, default=-1) + 1)
+    prefixes = np.empty(size, dtype=np.int8)
+    types    = np.empty(size, dtype=np.int64)
+    for tag_id in range(size):
+        tag = rev_bies_vocab.get(tag_id, "S-ROOT")
+        prefixes[tag_id] = _TAG_PREFIX_CODES.get(tag[:2], _TAG_SKIP)
+        types[tag_id]    = morpheme_type_vocab.get(tag[2:], 0)
+    return prefixes, types
+
+
+def _run_means(values: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Mean of each run ``values[starts[k]:starts[k] + counts[k]]``.
+
+    Runs are grouped by length and averaged with ``np.mean(axis=1)``, which
+    sums in the same (pairwise) order as ``np.mean`` over a single run, so
+    every mean is bit-identical to the per-run call. Empty runs yield NaN.
+    """
+    means = np.full(len(starts), np.nan, dtype=np.result_type(values.dtype, np.float16))
+    for length in np.unique(counts).tolist():
+        if length == 0:
+            continue
+        sel = counts == length
+        means[sel] = values[starts[sel][:, None] + np.arange(length)].mean(axis=1)
+    return means
+
+
+def _mean_confidences(confidences: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Per-row ``np.mean(confidences[i, :lengths[i]])`` for the whole batch."""
+    seq_len = confidences.shape[1]
+    flat    = confidences[np.arange(seq_len) < lengths[:, None]]
+    starts  = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+    return _run_means(flat, starts, lengths)
+
+
+def _decode_batch_bies(
+    words: list[str],
+    tag_ids: np.ndarray,
+    confidences: np.ndarray,
+    tag_prefixes: np.ndarray,
+    tag_types: np.ndarray,
+) -> list[tuple[list[tuple[str, int, float]], bool]]:
+    """Batch equivalent of ``_decode_word_bies(..., repair=True)``.
+
+    Morpheme boundaries, types and mean confidences are found with array ops
+    over the (batch, seq_len) tag and confidence matrices; Python only
+    slices the words into the resulting segments. Output is identical to
+    calling ``_decode_word_bies`` word by word.
+
+    The repair rules reduce to one state bit per char -- whether a B- opened
+    a morpheme that no later E- or S- has closed yet:
+      - B- starts a morpheme, flushing an open one as an error;
+      - I-/E- extend an open morpheme (E- closes it), otherwise they become a
+        single-char morpheme and mark an error;
+      - S- flushes an open morpheme as an error and is a morpheme of its own;
+      - a morpheme still open at the end of the word is flushed as an error.
+    While a morpheme is open no other segment can start, so every segment is
+    a run of consecutive kept chars that begins at a "start" char.
+    """
+    n = len(words)
+    if n == 0:
+        return []
+
+    seq_len = tag_ids.shape[1]
+    lengths = np.minimum(np.fromiter(map(len, words), dtype=np.int64, count=n), seq_len)
+    cols    = np.arange(seq_len)
+    active  = cols < lengths[:, None]
+
+    prefix  = np.where(active, tag_prefixes[tag_ids], _TAG_SKIP)
+    is_b    = prefix == _TAG_B
+    is_ie   = (prefix == _TAG_I) | (prefix == _TAG_E)
+    is_s    = prefix == _TAG_S
+
+    # Open state after each char: the last B-/E-/S- at or before it is a B-.
+    event   = is_b | (prefix == _TAG_E) | is_s
+    last    = np.maximum.accumulate(np.where(event, cols, -1), axis=1)
+    open_after  = (last >= 0) & np.take_along_axis(is_b, np.maximum(last, 0), axis=1)
+    open_before = np.zeros_like(open_after)
+    open_before[:, 1:] = open_after[:, :-1]
+
+    is_start  = is_b | is_s | (is_ie & ~open_before)
+    is_member = is_ie & open_before
+    kept      = is_start | is_member
+
+    errors = (
+        ((is_b | is_s) & open_before).any(axis=1)
+        | (is_ie & ~open_before).any(axis=1)
+        | open_after[np.arange(n), np.maximum(lengths - 1, 0)] & (lengths > 0)
+    )
+
+    # Flattened kept chars in row-major order; each segment is a run of them.
+    rows, kept_cols = np.nonzero(kept)
+    starts_flat = np.flatnonzero(is_start[rows, kept_cols])
+
+    seg_rows  = rows[starts_flat]
+    seg_first = kept_cols[starts_flat]
+    ends_flat = np.append(starts_flat[1:], rows.size)
+    seg_last  = kept_cols[ends_flat - 1]
+    seg_count = ends_flat - starts_flat
+
+    # The old decoder averaged Python floats, i.e. float64.
+    confs64  = confidences[rows, kept_cols].astype(np.float64)
+    seg_conf = _run_means(confs64, starts_flat, seg_count)
+    seg_type   = tag_types[tag_ids[seg_rows, seg_first]]
+    contiguous = seg_last - seg_first + 1 == seg_count
+
+    bounds = np.searchsorted(seg_rows, np.arange(n + 1))
+
+    seg_first_l = seg_first.tolist()
+    seg_end_l   = (seg_last + 1).tolist()
+    seg_type_l  = seg_type.tolist()
+    seg_conf_l  = seg_conf.tolist()
+    contig_l    = contiguous.tolist()
+    bounds_l    = bounds.tolist()
+    errors_l    = errors.tolist()
+
+    decoded = []
+    for i, word in enumerate(words):
+        segments = []
+        for k in range(bounds_l[i], bounds_l[i + 1]):
+            if contig_l[k]:
+                text = word[seg_first_l[k]:seg_end_l[k]]
+            else:
+                # A skipped tag inside the morpheme dropped some of its chars.
+                text = "".join(
+                    word[j] for j in range(seg_first_l[k], seg_end_l[k]) if kept[i, j]
+                )
+            segments.append((text, seg_type_l[k], seg_conf_l[k]))
+        decoded.append((segments, errors_l[i]))
+    return decoded
+
+
 # ---------------------------------------------------------------------------
 # SlovorezTokenizer
 # ---------------------------------------------------------------------------
@@ -102,6 +297,15 @@ class SlovorezTokenizer:
         maxlen:      maximum sequence length. Loaded from config["model_specs"]["maxlen"].
         do_lower:    lowercase words before encoding. False is recommended --
                      do lowercasing upstream before tokenization for best throughput.
+        pad_context: pad positions kept after the longest word of a batch.
+                     The model was trained on padded words and tags the last
+                     chars of a word differently unless it sees its receptive
+                     field of padding after them. None pads every batch to
+                     ``maxlen``, which is always safe.
+                     Loaded from config["model_specs"]["pad_context"].
+        backend:     ``"native"`` encodes in ``slovorezCXX.CharEncoder``;
+                     ``"python"`` encodes with a NumPy code point lookup
+                     table, giving the same matrix.
     """
 
     def __init__(
@@ -110,17 +314,32 @@ class SlovorezTokenizer:
         bies_vocab: dict[str, int],
         maxlen: int = 64,
         do_lower: bool = False,
+        backend: str = "native",
+        pad_context: int | None = None,
     ):
-        self.char_vocab = char_vocab
-        self.bies_vocab = bies_vocab
-        self.maxlen     = maxlen
-        self.do_lower   = do_lower
+        if backend not in ("native", "python"):
+            raise ValueError(f"Unknown encoder backend: '{backend}'")
+
+        self.char_vocab  = char_vocab
+        self.bies_vocab  = bies_vocab
+        self.maxlen      = maxlen
+        self.do_lower    = do_lower
+        self.backend     = backend
+        self.pad_context = maxlen if pad_context is None else pad_context
 
         self.rev_char_vocab: dict[int, str] = {v: k for k, v in char_vocab.items()}
         self.rev_bies_vocab: dict[int, str] = {v: k for k, v in bies_vocab.items()}
+        self._tag_prefixes, self._tag_types = _build_tag_tables(
+            self.rev_bies_vocab, MORPHEME_TYPE_VOCAB, len(bies_vocab)
+        )
 
         self._unk_id = char_vocab.get(UNK_TOKEN, UNK_ID)
         self._pad_id = char_vocab.get(PAD_TOKEN, PAD_ID)
+        self._char_lut = _build_char_lut(char_vocab, self._unk_id)
+        self._encoder = slovorezCXX.CharEncoder(
+            char_vocab, maxlen, unk_id=self._unk_id, pad_id=self._pad_id,
+            pad_context=self.pad_context,
+        )
 
     # ------------------------------------------------------------------
     # Construction
@@ -133,7 +352,8 @@ class SlovorezTokenizer:
         Expected keys:
             config["mapping"]["tokenizer_vocab"],
             config["mapping"]["label2id"],
-            config["model_specs"]["maxlen"].
+            config["model_specs"]["maxlen"],
+            config["model_specs"]["pad_context"] (optional).
 
         Example::
 
@@ -146,6 +366,7 @@ class SlovorezTokenizer:
             char_vocab=mapping["tokenizer_vocab"],
             bies_vocab=mapping["label2id"],
             maxlen=maxlen,
+            pad_context=config["model_specs"].get("pad_context"),
         )
 
     def to_config(self) -> dict:
@@ -168,7 +389,8 @@ class SlovorezTokenizer:
                 "label2id":        self.bies_vocab,
             },
             "model_specs": {
-                "maxlen": self.maxlen,
+                "maxlen":      self.maxlen,
+                "pad_context": self.pad_context,
             },
         }
 
@@ -180,14 +402,36 @@ class SlovorezTokenizer:
         """Encode a list of words into a padded int32 matrix of char indices.
 
         Returns:
-            np.ndarray of shape (len(words), min(max_word_len, maxlen)), dtype=int32.
+            np.ndarray of shape (len(words), min(max_word_len + pad_context, maxlen)),
+            dtype=int32.
         """
-        get_char = self.char_vocab.get
-        unk_id   = self._unk_id
         if self.do_lower:
             words = [w.lower() for w in words]
-        char_tokenized = [[get_char(c, unk_id) for c in w] for w in words]
-        return _pad_batch(char_tokenized, self.maxlen)
+        if self.backend == "native":
+            return self._encoder.encode(list(words))[0]
+        return _encode_lut(words, self._char_lut, self.maxlen, self.pad_context, self._pad_id)
+
+    def encode_columnar(
+        self,
+        batch: dict,
+        indices: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Encode tokens of a columnar sentencer batch without decoding them.
+
+        Reads straight from the ``get_batch_columnar()`` buffer, so no Python
+        string is built per token. Lowercasing must be done by the sentencer
+        (``set_lowercase(True)``); ``do_lower`` does not apply here.
+
+        Args:
+            batch:   dict with ``"data"`` and ``"offsets"`` arrays.
+            indices: optional token indices to encode, in output row order.
+
+        Returns:
+            (matrix, lengths): int32 array of shape
+            (n, min(max_word_len + pad_context, maxlen)) and int32 array of
+            encoded lengths.
+        """
+        return self._encoder.encode_columnar(batch["data"], batch["offsets"], indices)
 
     # ------------------------------------------------------------------
     # Decoding
@@ -208,6 +452,30 @@ class SlovorezTokenizer:
             for row in encoded
         ]
 
+    def _decode_segments(
+        self,
+        words: list[str],
+        tag_ids: np.ndarray,
+        max_confs: np.ndarray,
+        repair: bool,
+    ) -> list[tuple[list[tuple[str, int, float]], bool]]:
+        """Segment a batch: vectorized with repair, word by word without."""
+        if not repair:
+            return [
+                _decode_word_bies(
+                    word, word_tag_ids, word_confs,
+                    self.rev_bies_vocab, MORPHEME_TYPE_VOCAB, repair=False,
+                )
+                for word, word_tag_ids, word_confs in zip(words, tag_ids, max_confs)
+            ]
+        if tag_ids.size and int(tag_ids.max()) >= len(self._tag_prefixes):
+            self._tag_prefixes, self._tag_types = _build_tag_tables(
+                self.rev_bies_vocab, MORPHEME_TYPE_VOCAB, int(tag_ids.max()) + 1
+            )
+        return _decode_batch_bies(
+            words, tag_ids, max_confs, self._tag_prefixes, self._tag_types
+        )
+
     def decode_predictions_detail(
         self,
         words: list[str],
@@ -222,19 +490,34 @@ class SlovorezTokenizer:
         """
         tag_ids   = np.argmax(logits, axis=-1)
         max_confs = np.max(logits, axis=-1)
+        yield from self.decode_tags_detail(words, tag_ids, max_confs, model_name, repair)
 
-        for i, word in enumerate(words):
-            segments, repaired = _decode_word_bies(
-                word,
-                tag_ids[i],
-                max_confs[i],
-                self.rev_bies_vocab,
-                MORPHEME_TYPE_VOCAB,
-                repair=repair,
-            )
+    def decode_tags_detail(
+        self,
+        words: list[str],
+        tag_ids: np.ndarray,
+        max_confs: np.ndarray,
+        model_name: str,
+        repair: bool = True,
+    ) -> Generator[dict, None, None]:
+        """Same as ``decode_predictions_detail``, from already reduced logits.
 
-            word_conf = float(np.mean(max_confs[i, :len(word)]))
+        Args:
+            tag_ids:   int array (batch, seq_len) -- argmax over the tag axis.
+            max_confs: float array (batch, seq_len) -- score of that tag.
+
+        Example::
 
+            tag_ids, max_confs = reduce_logits(logits)   # e.g. in another process
+            results = list(tokenizer.decode_tags_detail(words, tag_ids, max_confs, "slovorez-v1"))
+        """
+        decoded = self._decode_segments(words, tag_ids, max_confs, repair)
+        lengths = np.minimum(
+            np.fromiter(map(len, words), dtype=np.int64, count=len(words)), max_confs.shape[1]
+        )
+        word_confs = _mean_confidences(max_confs, lengths).tolist()
+
+        for word, (segments, repaired), word_conf in zip(words, decoded, word_confs):
             yield {
                 "word":       word,
                 "morphemes":  segments,
@@ -266,11 +549,4 @@ class SlovorezTokenizer:
         tag_ids   = np.argmax(logits, axis=-1)
         max_confs = np.max(logits, axis=-1)
 
-        for word, word_tag_ids, word_confs in zip(words, tag_ids, max_confs):
-            yield _decode_word_bies(
-                list(word),
-                word_tag_ids,
-                word_confs,
-                self.rev_bies_vocab,
-                MORPHEME_TYPE_VOCAB,
-            )
+        yield from self._decode_segments(words, tag_ids, max_confs, repair=True)
@@ -0,0 +1,455 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from slovorez.core.batching import TokenBudgetBatcher
+from slovorez.core.engine import ModelResource, int8_weights_path
+from slovorez.core.process import SlovorezTokenizer
+from slovorez.core.tokenizer import open_file_tokenizer
+from slovorez.io.loaders import load_json
+from slovorez.utils import resolve_model_dir, resolve_path, MODEL_CONFIG_NAME
+from slovorezCXX import TokenType
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Quantization consts
+# ---------------------------------------------------------------------------
+
+QUANTIZATION_METHODS = ("static", "dynamic")
+
+_CALIBRATION_WORDS      = 8192
+_CALIBRATION_BATCH      = 512
+_BENCHMARK_TOKEN_BUDGET = 32768
+_BENCHMARK_MODEL_BATCH  = 2048
+_BENCHMARK_REPEATS      = 3
+
+# Metrics reported in config["results"]["test_metrics"] and by the report.
+_REPORT_METRICS = ("accuracy", "bndrs_precision", "bndrs_recall", "bndrs_f1", "sequence_accuracy")
+
+
+def _require_onnx():
+    try:
+        import onnx
+        from onnxruntime import quantization
+    except ImportError:
+        raise ImportError(
+            "Quantizing models requires the 'onnx' package: pip install .[quant]"
+        ) from None
+    return onnx, quantization
+
+
+# ===========================================================================
+# Graph conversion
+# ===========================================================================
+
+def _upcast_float16(model):
+    """Rewrite a float16 graph to compute in float32, in place.
+
+    The ONNX Runtime quantizer only handles float32 activations. Float16
+    initializers are widened, ``Cast(to=float16)`` nodes become casts to
+    float32, and a final cast restores the declared output type, so the
+    quantized model keeps the input/output signature of the original.
+    """
+    onnx, _ = _require_onnx()
+    from onnx import TensorProto, helper, numpy_helper
+
+    graph = model.graph
+    for i, tensor in enumerate(graph.initializer):
+        if tensor.data_type == TensorProto.FLOAT16:
+            widened = numpy_helper.to_array(tensor).astype(np.float32)
+            graph.initializer[i].CopyFrom(numpy_helper.from_array(widened, tensor.name))
+
+    for node in graph.node:
+        for attr in node.attribute:
+            if node.op_type == "Cast" and attr.name == "to" and attr.i == TensorProto.FLOAT16:
+                attr.i = TensorProto.FLOAT
+            elif attr.type == onnx.AttributeProto.TENSOR and attr.t.data_type == TensorProto.FLOAT16:
+                attr.t.CopyFrom(numpy_helper.from_array(
+                    numpy_helper.to_array(attr.t).astype(np.float32), attr.t.name
+                ))
+
+    for info in graph.value_info:
+        if info.type.tensor_type.elem_type == TensorProto.FLOAT16:
+            info.type.tensor_type.elem_type = TensorProto.FLOAT
+
+    for output in graph.output:
+        if output.type.tensor_type.elem_type != TensorProto.FLOAT16:
+            continue
+        widened = f"{output.name}__float32"
+        for node in graph.node:
+            node.output[:] = [widened if name == output.name else name for name in node.output]
+            node.input[:]  = [widened if name == output.name else name for name in node.input]
+        graph.node.append(helper.make_node(
+            "Cast", [widened], [output.name], to=TensorProto.FLOAT16, name=f"{output.name}__cast"
+        ))
+    return model
+
+
+def _make_calibration_reader(
+    tokenizer: SlovorezTokenizer,
+    words: list[str],
+    input_name: str,
+    batch_size: int,
+):
+    _, quantization = _require_onnx()
+
+    class _WordCalibrationReader(quantization.CalibrationDataReader):
+        # Batches are sorted by length, the way TokenBudgetBatcher feeds the
+        # model, so activation ranges match production inputs.
+        def __init__(self):
+            ordered = sorted(words, key=len)
+            self._batches = iter([
+                {input_name: tokenizer.encode_batch(ordered[i:i + batch_size])}
+                for i in range(0, len(ordered), batch_size)
+            ])
+
+        def get_next(self):
+            return next(self._batches, None)
+
+    return _WordCalibrationReader()
+
+
+def quantize_model(
+    model_path: Union[str, Path],
+    output_path: Union[str, Path, None] = None,
+    method: str = "static",
+    calibration_words: Optional[list[str]] = None,
+    tokenizer: Optional[SlovorezTokenizer] = None,
+) -> Path:
+    """Write an INT8 variant of an ONNX model for CPU inference.
+
+    ``"static"`` quantizes every Conv but the final classifier to INT8 in
+    QDQ form, with activation ranges calibrated (MinMax) on
+    ``calibration_words``; ONNX Runtime runs these as fused INT8 kernels.
+    ``"dynamic"`` needs no calibration data and quantizes weights only; its
+    ``ConvInteger`` kernels are usually slower than float on CPU, so it is
+    mainly a reference for accuracy.
+
+    Args:
+        model_path:        float ONNX weights (float16 graphs are upcast first).
+        output_path:       where to write; defaults to ``int8_weights_path()``.
+        method:            one of ``QUANTIZATION_METHODS``.
+        calibration_words: representative lowercase words, required for
+                           ``"static"`` (a few thousand are enough).
+        tokenizer:         encodes the calibration words; required for
+                           ``"static"``.
+
+    Returns:
+        Path of the written model.
+
+    Example::
+
+        words = load_calibration_words("corpus.txt")
+        quantize_model("models/slovorez-v1/slovorez-v1.onnx",
+                       calibration_words=words, tokenizer=tokenizer)
+    """
+    if method not in QUANTIZATION_METHODS:
+        raise ValueError(
+            f"Unknown quantization method: '{method}'. Expected one of: {list(QUANTIZATION_METHODS)}"
+        )
+    if method == "static" and (not calibration_words or tokenizer is None):
+        raise ValueError("Static quantization needs calibration_words and a tokenizer")
+
+    onnx, quantization = _require_onnx()
+    model_path  = Path(model_path)
+    output_path = Path(output_path) if output_path is not None else int8_weights_path(model_path)
+
+    model = _upcast_float16(onnx.load(str(model_path)))
+    float_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.float.tmp")
+    tmp_path   = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+    onnx.save(model, str(float_path))
+    try:
+        if method == "dynamic":
+            quantization.quantize_dynamic(
+                str(float_path), str(tmp_path),
+                op_types_to_quantize=["Conv"],
+                weight_type=quantization.QuantType.QInt8,
+            )
+        else:
+            # The last Conv produces the tag scores; INT8 there costs far
+            # more accuracy than it saves time.
+            convs = [node.name for node in model.graph.node if node.op_type == "Conv"]
+            reader = _make_calibration_reader(
+                tokenizer, calibration_words, model.graph.input[0].name, _CALIBRATION_BATCH
+            )
+            quantization.quantize_static(
+                str(float_path), str(tmp_path), reader,
+                quant_format=quantization.QuantFormat.QDQ,
+                op_types_to_quantize=["Conv"],
+                nodes_to_exclude=convs[-1:],
+                activation_type=quantization.QuantType.QUInt8,
+                weight_type=quantization.QuantType.QInt8,
+                calibrate_method=quantization.CalibrationMethod.MinMax,
+            )
+        os.replace(tmp_path, output_path)
+    finally:
+        float_path.unlink(missing_ok=True)
+        tmp_path.unlink(missing_ok=True)
+
+    logger.info(f"Saved {method} INT8 model: {output_path}")
+    return output_path
+
+
+def load_calibration_words(
+    corpus_path: Union[str, Path],
+    limit: int = _CALIBRATION_WORDS,
+    max_len: int = 64,
+) -> list[str]:
+    """Collect up to ``limit`` unique lowercase Russian words from a corpus.
+
+    Plain and compressed files are read the same way ``process_file`` reads
+    them.
+    """
+    tokenizer_cxx = open_file_tokenizer(corpus_path)
+    tokenizer_cxx.set_filter(TokenType.RUWORD)
+    tokenizer_cxx.set_lowercase(True)
+    tokenizer_cxx.set_unique(True)
+
+    words: dict[str, None] = {}
+    try:
+        batch = tokenizer_cxx.get_batch()
+        while batch and len(words) < limit:
+            for token in batch["text"].split('\0')[:-1]:
+                if len(token) <= max_len:
+                    words[token] = None
+            batch = tokenizer_cxx.get_batch()
+    finally:
+        tokenizer_cxx.close()
+    return list(words)[:limit]
+
+
+# ===========================================================================
+# Evaluation
+# ===========================================================================
+
+def _char_tags(morphemes: list) -> list[tuple[str, int]]:
+    tags = []
+    for morpheme in morphemes:
+        text, type_id = morpheme[0], morpheme[1]
+        if len(text) == 1:
+            tags.append(("S", type_id))
+            continue
+        tags.append(("B", type_id))
+        tags.extend(("I", type_id) for _ in range(len(text) - 2))
+        tags.append(("E", type_id))
+    return tags
+
+
+def _boundaries(morphemes: list) -> set[int]:
+    cuts, pos = set(), 0
+    for morpheme in morphemes[:-1]:
+        pos += len(morpheme[0])
+        cuts.add(pos)
+    return cuts
+
+
+def score_segmentations(predicted: dict[str, list], reference: dict[str, list]) -> dict[str, float]:
+    """Score segmentations against a reference, on the words both share.
+
+    Both dicts map a word to its morphemes ``[(text, type_id, ...), ...]``
+    (the output of ``Slovorez.predict`` or a base dictionary). Metrics
+    follow ``config["results"]["test_metrics"]``:
+
+      - ``accuracy``          -- share of chars with the right BIES tag and type.
+      - ``bndrs_precision``, ``bndrs_recall``, ``bndrs_f1`` -- over morpheme
+        boundaries inside words, micro-averaged.
+      - ``sequence_accuracy`` -- share of words segmented entirely right.
+    """
+    words = [word for word in reference if word in predicted]
+    chars = correct_chars = exact = 0
+    true_cuts = pred_cuts = hit_cuts = 0
+
+    for word in words:
+        ref_tags, pred_tags = _char_tags(reference[word]), _char_tags(predicted[word])
+        chars         += len(ref_tags)
+        correct_chars += sum(r == p for r, p in zip(ref_tags, pred_tags))
+        exact         += ref_tags == pred_tags
+
+        ref_cuts, pred_cut_set = _boundaries(reference[word]), _boundaries(predicted[word])
+        true_cuts += len(ref_cuts)
+        pred_cuts += len(pred_cut_set)
+        hit_cuts  += len(ref_cuts & pred_cut_set)
+
+    precision = hit_cuts / pred_cuts if pred_cuts else 1.0
+    recall    = hit_cuts / true_cuts if true_cuts else 1.0
+    f1        = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "words":             len(words),
+        "accuracy":          correct_chars / chars if chars else 0.0,
+        "bndrs_precision":   precision,
+        "bndrs_recall":      recall,
+        "bndrs_f1":          f1,
+        "sequence_accuracy": exact / len(words) if words else 0.0,
+    }
+
+
+def segment_words(
+    model: ModelResource,
+    tokenizer: SlovorezTokenizer,
+    words: list[str],
+    repeats: int = _BENCHMARK_REPEATS,
+) -> tuple[dict[str, list], float]:
+    """Segment ``words`` and time it the way the pipeline batches them.
+
+    Returns:
+        (segmentations, words_per_second) -- the rate covers encoding,
+        inference and decoding, best of ``repeats`` runs after a warm-up.
+    """
+    batcher = TokenBudgetBatcher(
+        _BENCHMARK_TOKEN_BUDGET, tokenizer.maxlen,
+        max_words=_BENCHMARK_MODEL_BATCH, pad_context=tokenizer.pad_context,
+    )
+    batches = batcher.add(words) + batcher.flush()
+    model.predict(tokenizer.encode_batch(batches[0][:8]))  # session start-up is not timed
+
+    best = float("inf")
+    segmentations: dict[str, list] = {}
+    for _ in range(max(1, repeats)):
+        start = time.perf_counter()
+        for batch in batches:
+            logits = model.predict(tokenizer.encode_batch(batch))
+            for word, (morphemes, _) in zip(batch, tokenizer.decode_predictions(batch, logits)):
+                segmentations[word] = morphemes
+        best = min(best, time.perf_counter() - start)
+    return segmentations, len(words) / best if best > 0 else 0.0
+
+
+def compare_precisions(
+    model_name_or_path: Union[str, Path],
+    corpus_path: Union[str, Path],
+    reference_path: Union[str, Path, None] = None,
+    method: str = "static",
+    rebuild: bool = False,
+    limit: int = 50000,
+    session_options: Optional[dict] = None,
+) -> dict:
+    """Benchmark a model against its INT8 variant on CPU.
+
+    The INT8 model is built first if missing (or ``rebuild``), calibrated
+    on words from ``corpus_path``. Both models segment the same unique
+    words of the corpus. With ``reference_path`` (a JSON dict in base
+    dictionary format) both are scored against it; without, both are
+    scored against the float predictions -- float trivially at 1.0, INT8 by
+    its agreement with float -- so the two columns measure the same thing.
+
+    Returns:
+        Dict with ``model``, ``method``, ``words``, ``reference``,
+        ``recorded`` (the float model's ``config.json`` test metrics, shown
+        apart from the comparison) and, for ``"float"`` and ``"int8"``:
+        ``path``, ``words_per_sec``, ``metrics``.
+    """
+    model_dir = resolve_model_dir(model_name_or_path)
+    config    = load_json(model_dir / MODEL_CONFIG_NAME)
+    resources = config.get("resources", {})
+    tokenizer = SlovorezTokenizer.from_config(config)
+    maxlen    = config["model_specs"]["maxlen"]
+
+    float_path = model_dir / resources.get("weights", f"{config['model_specs']['name']}.onnx")
+    int8_path  = int8_weights_path(float_path)
+    if "weights_int8" in resources:
+        int8_path = model_dir / resources["weights_int8"]
+
+    words = load_calibration_words(corpus_path, limit=limit, max_len=maxlen)
+    if rebuild or not int8_path.is_file():
+        quantize_model(
+            float_path, int8_path, method=method,
+            calibration_words=words[:_CALIBRATION_WORDS], tokenizer=tokenizer,
+        )
+
+    float_model = ModelResource(str(float_path), device="cpu", session_options=session_options)
+    int8_model  = ModelResource(str(int8_path), device="cpu", session_options=session_options)
+    float_segs, float_wps = segment_words(float_model, tokenizer, words)
+    int8_segs, int8_wps   = segment_words(int8_model, tokenizer, words)
+
+    if reference_path is not None:
+        reference     = load_json(resolve_path(reference_path))
+        float_metrics = score_segmentations(float_segs, reference)
+        int8_metrics  = score_segmentations(int8_segs, reference)
+        reference_name = str(reference_path)
+    else:
+        float_metrics  = score_segmentations(float_segs, float_segs)
+        int8_metrics   = score_segmentations(int8_segs, float_segs)
+        reference_name = None
+
+    return {
+        "model":     config["model_specs"]["name"],
+        "method":    method,
+        "words":     len(words),
+        "reference": reference_name,
+        "recorded":  dict(config.get("results", {}).get("test_metrics", {})),
+        "float": {"path": str(float_path), "words_per_sec": float_wps, "metrics": float_metrics},
+        "int8":  {"path": str(int8_path), "words_per_sec": int8_wps, "metrics": int8_metrics},
+    }
+
+
+def format_report(report: dict) -> str:
+    """Render ``compare_precisions()`` output as a plain-text table."""
+    if report["reference"] is None:
+        source = "agreement with the float predictions on the corpus"
+    else:
+        source = f"both scored against {report['reference']}"
+
+    float_, int8 = report["float"], report["int8"]
+    rows = [("words/s", f"{float_['words_per_sec']:,.0f}", f"{int8['words_per_sec']:,.0f}")]
+    for name in _REPORT_METRICS:
+        if name in float_["metrics"] or name in int8["metrics"]:
+            rows.append((
+                name,
+                f"{float_['metrics'][name]:.4f}" if name in float_["metrics"] else "-",
+                f"{int8['metrics'][name]:.4f}" if name in int8["metrics"] else "-",
+            ))
+
+    width = max(len(name) for name, _, _ in rows)
+    lines = [
+        f"{report['model']}: float vs INT8 ({report['method']}), "
+        f"{report['words']:,} unique corpus words",
+        f"metrics -- {source}",
+        f"{'':<{width}}  {'float':>10}  {'int8':>10}",
+    ]
+    lines += [f"{name:<{width}}  {f:>10}  {q:>10}" for name, f, q in rows]
+    lines.append(f"speed-up  {int8['words_per_sec'] / float_['words_per_sec']:.2f}x")
+
+    recorded = [
+        (name, report["recorded"][name])
+        for name in _REPORT_METRICS if name in report.get("recorded", {})
+    ]
+    if recorded:
+        # A different test set from the comparison above, so not a column of it.
+        width = max(len(name) for name, _ in recorded)
+        lines.append("")
+        lines.append("float model on its own test set (config.json test_metrics)")
+        lines += [f"{name:<{width}}  {value:>10.4f}" for name, value in recorded]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m slovorez.core.quantization",
+        description="Build the INT8 variant of a model and compare it with the float model.",
+    )
+    parser.add_argument("model", help="model directory or name")
+    parser.add_argument("--corpus", required=True, help="text used for calibration and benchmarking")
+    parser.add_argument("--reference", help="JSON dict in base dictionary format to score against")
+    parser.add_argument("--method", choices=QUANTIZATION_METHODS, default="static")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the INT8 model if present")
+    parser.add_argument("--limit", type=int, default=50000, help="max unique words to benchmark")
+    args = parser.parse_args(argv)
+
+    report = compare_precisions(
+        args.model, args.corpus, args.reference,
+        method=args.method, rebuild=args.rebuild, limit=args.limit,
+    )
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    main()
@@ -1,18 +1,67 @@
+import codecs
+import mmap
+import threading
 import slovorezCXX
 from pathlib import Path
-from typing import Union
+from typing import Iterable, Optional, Union
+from slovorez.io.compression import detect_compression, open_decompressed
 from slovorez.utils import resolve_path
 
+_STREAM_BLOCK_SIZE = 1 << 20
+_BLANK_SCAN_BYTES  = 4096
+
+
+def _is_blank(view: memoryview) -> bool:
+    """Whether a UTF-8 buffer holds only whitespace, as ``str.strip()`` sees it.
+
+    Decodes a block at a time and stops at the first non-whitespace char,
+    so a buffer of text costs one small block, not a copy of the buffer.
+    """
+    if not view.c_contiguous:
+        return False   # left to the sentencer, which rejects it
+    data    = view.cast("B")
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+    for start in range(0, data.nbytes, _BLANK_SCAN_BYTES):
+        if decoder.decode(data[start:start + _BLANK_SCAN_BYTES]).strip():
+            return False
+    return not decoder.decode(b"", final=True).strip()
+
+
+def columnar_tokens(batch: dict, indices: Optional[Iterable[int]] = None) -> list[str]:
+    """Materialize tokens of a columnar batch as Python strings.
+
+    Token ``i`` is ``batch["data"][offsets[i]:offsets[i + 1]]``. Pass
+    ``indices`` to decode only the tokens that survived upstream filtering.
+    """
+    data    = batch["data"].tobytes()
+    offsets = batch["offsets"].tolist()
+    if indices is None:
+        indices = range(len(offsets) - 1)
+    return [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in indices]
+
+
 class BaseTokenizer:
     def get_batch_tokens(self, tolower=False):
         batch = self.get_batch()
+        if not batch:
+            return []
         text = batch["text"]
         if tolower:
             text = text.lower()
-        return batch.split('\0')[:-1]
+        return text.split('\0')[:-1]
+
+    def close(self) -> None:
+        """Release background resources. Only stream tokenizers hold any."""
 
 class FFTokenizer(slovorezCXX.FFSentencer, BaseTokenizer):
-    def __init__(self, file_path: Union[str, Path], validated: bool=False):
+    def __init__(
+        self,
+        file_path: Union[str, Path],
+        validated: bool=False,
+        use_mmap: bool=True,
+        offset: int=0,
+        length: Optional[int]=None,
+    ):
                
         if not validated:
             abs_path = resolve_path(file_path)
@@ -21,27 +70,118 @@ class FFTokenizer(slovorezCXX.FFSentencer, BaseTokenizer):
         else:
             abs_path = file_path
 
-        super().__init__(str(abs_path))
+        super().__init__(str(abs_path), use_mmap, offset, -1 if length is None else length)
         
         if not self.is_fopen():
             raise PermissionError(f"Cannot open file: {abs_path}")
         
         self.file_path = abs_path
 
+TextSource = Union[str, bytes, bytearray, memoryview, mmap.mmap]
+
+
 class FTTokenizer(slovorezCXX.FTSentencer, BaseTokenizer):
-    def __init__(self, text: str, validated: bool=False):
+    """Lexes in-memory text. Besides ``str``, any C-contiguous buffer of
+    UTF-8 bytes (bytes, bytearray, memoryview, mmap) is lexed in place,
+    without a copy; the buffer is held until the tokenizer is released.
+    """
+    def __init__(self, text: TextSource, validated: bool=False):
         if not validated:    
-            if not isinstance(text, str):
-                raise TypeError(f"expected str, not {type(text).__name__}")
-
-            if not text.strip():
-                raise ValueError("Text cannot be empty")
+            if isinstance(text, str):
+                if not text.strip():
+                    raise ValueError("Text cannot be empty")
+            else:
+                try:
+                    view = memoryview(text)
+                except TypeError:
+                    raise TypeError(
+                        f"expected str or bytes-like object, not {type(text).__name__}"
+                    ) from None
+                with view:
+                    if view.nbytes == 0 or _is_blank(view):
+                        raise ValueError("Text cannot be empty")
         
         super().__init__(text)
         
     def is_fopen(self):
         return True
 
+class FSTokenizer(slovorezCXX.FSSentencer, BaseTokenizer):
+    """Lexes a compressed file (gzip, bz2, xz or zstd) without unpacking it
+    to disk. A background thread decompresses ``block_size`` blocks and
+    feeds them to the native sentencer through a queue of ``queue_size``
+    blocks; the codecs release the GIL, so decompression overlaps with
+    lexing. Call ``close()`` when abandoning the tokenizer before its end.
+    """
+    def __init__(
+        self,
+        file_path: Union[str, Path],
+        validated: bool=False,
+        compression: Optional[str]=None,
+        block_size: int=_STREAM_BLOCK_SIZE,
+        queue_size: int=8,
+    ):
+        if not validated:
+            abs_path = resolve_path(file_path)
+            if not abs_path.exists():
+                raise FileNotFoundError(f"File not found: {abs_path}")
+        else:
+            abs_path = file_path
+
+        super().__init__(queue_size)
+
+        self.file_path   = abs_path
+        self.compression = compression or detect_compression(abs_path)
+        self._reader     = open_decompressed(abs_path, self.compression)
+        self._block_size = block_size
+        self._thread     = threading.Thread(
+            target=self._pump, name="slovorez-decompress", daemon=True
+        )
+        self._thread.start()
+
+    def _pump(self) -> None:
+        try:
+            with self._reader:
+                while True:
+                    block = self._reader.read(self._block_size)
+                    if not block or not self.feed(block):
+                        break
+            self.close_input()
+        except BaseException as e:
+            self.abort_input(f"{type(e).__name__} while decompressing {self.file_path}: {e}")
+
+    def close(self) -> None:
+        """Stop the decompression thread. Batches already queued are kept."""
+        self.close_input()
+        self._thread.join()
+
+    def is_fopen(self):
+        return True
+
+
+def open_file_tokenizer(
+    file_path: Union[str, Path],
+    validated: bool=False,
+    offset: int=0,
+    length: Optional[int]=None,
+) -> Union[FFTokenizer, FSTokenizer]:
+    """Open a tokenizer over a file: ``FSTokenizer`` for compressed files,
+    ``FFTokenizer`` over the byte range [offset, offset + length) otherwise.
+    Compressed files cannot be range-read, so they require the whole file.
+    """
+    abs_path = Path(file_path) if validated else resolve_path(file_path)
+    if not validated and not abs_path.exists():
+        raise FileNotFoundError(f"File not found: {abs_path}")
+
+    compression = detect_compression(abs_path)
+    if compression is None:
+        return FFTokenizer(abs_path, validated=True, offset=offset, length=length)
+
+    if offset != 0 or length is not None:
+        raise ValueError(f"Cannot read a byte range of a {compression} file: {abs_path}")
+    return FSTokenizer(abs_path, validated=True, compression=compression)
+
+
 class Tokenizer:
     """
     Factory: creating a class based on the source data
@@ -50,7 +190,7 @@ class Tokenizer:
         abs_path = resolve_path(source)
 
         if abs_path.is_file():
-            instance = FFTokenizer(abs_path, validated=True)
+            instance = open_file_tokenizer(abs_path, validated=True)
         else:
             instance = FTTokenizer(str(source), validated=True)
         
@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import stat
+import struct
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Union
+
+if TYPE_CHECKING:
+    from slovorez.core.tokenizer import TextSource
+    from slovorez.slovorez import Slovorez
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Protocol
+# ---------------------------------------------------------------------------
+#
+# Every message is one frame: a 4-byte big-endian payload length, then the
+# payload. A request payload is an op byte and its argument, a response
+# payload a status byte and its body:
+#
+#   request   b"P" + UTF-8 text    -> b"+" + JSON {word: [[morpheme, type_id, confidence], ...]}
+#             b"F"                 -> b"+"            (buffered predictions written to the log)
+#   rejected input (ValueError)    -> b"?" + UTF-8 message
+#   error                          -> b"-" + UTF-8 message
+#
+# A connection carries any number of request/response pairs, in order.
+
+_HEADER    = struct.Struct(">I")
+_MAX_FRAME = 1 << 30
+
+OP_PREDICT = b"P"
+OP_FLUSH   = b"F"
+_OK        = b"+"
+_ERROR     = b"-"
+_INVALID   = b"?"
+
+
+def default_socket_path() -> Path:
+    """Per-user socket path: ``$XDG_RUNTIME_DIR/slovorez.sock``, else in the temp dir."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "slovorez.sock"
+    return Path(tempfile.gettempdir()) / f"slovorez-{os.getuid()}.sock"
+
+
+def _encode_result(result: dict[str, list[tuple[str, int, float]]]) -> bytes:
+    return json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _decode_result(body: bytes) -> dict[str, list[tuple[str, int, float]]]:
+    return {
+        word: [tuple(morpheme) for morpheme in morphemes]
+        for word, morphemes in json.loads(body).items()
+    }
+
+# ===========================================================================
+# Server
+# ===========================================================================
+
+class SlovorezDaemon:
+    """Serves a warm ``Slovorez`` pipeline over a local Unix socket.
+
+    The model session, seen-set and morpheme registry are loaded once, so a
+    short job pays for a socket round trip instead of ``from_pretrained``.
+    Requests from all connections go through ``Slovorez.apredict``: words
+    unseen by concurrent requests are inferred together, and a word is
+    inferred once whichever client asked first.
+
+    Buffered predictions are written to the log on ``flush`` requests and
+    when the daemon stops (SIGINT/SIGTERM).
+
+    Args:
+        model:       a loaded pipeline; owned by the daemon from now on.
+        socket_path: where to listen; ``default_socket_path()`` if None. A
+                     stale socket left by a dead daemon is replaced; any
+                     other file there is left alone and the daemon refuses
+                     to start.
+
+    Example::
+
+        model = Slovorez.from_pretrained("models/slovorez-v1")
+        SlovorezDaemon(model, "/run/user/1000/slovorez.sock").serve_forever()
+    """
+
+    def __init__(self, model: Slovorez, socket_path: Union[str, Path, None] = None):
+        self.model       = model
+        self.socket_path = Path(socket_path) if socket_path is not None else default_socket_path()
+
+    def serve_forever(self) -> None:
+        """Listen until SIGINT or SIGTERM, then flush the log and remove the socket."""
+        asyncio.run(self.serve())
+
+    async def serve(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Listen until ``stop`` is set (or a SIGINT/SIGTERM arrives if None)."""
+        loop = asyncio.get_running_loop()
+        if stop is None:
+            stop = asyncio.Event()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, stop.set)
+
+        self._remove_stale_socket()
+        await loop.run_in_executor(None, self.model.warm_up)
+        server = await asyncio.start_unix_server(self._handle, sock=self._bind())
+        logger.info(f"Slovorez daemon listening on {self.socket_path}")
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            self.socket_path.unlink(missing_ok=True)
+            await loop.run_in_executor(None, self.model.flush)
+            logger.info("Slovorez daemon stopped.")
+
+    def _bind(self) -> socket.socket:
+        # Created owner-only (0600) by the umask: a chmod after bind would
+        # leave a window in which other users could connect.
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)
+        try:
+            sock.bind(str(self.socket_path))
+        except BaseException:
+            sock.close()
+            raise
+        finally:
+            os.umask(umask)
+        return sock
+
+    def _remove_stale_socket(self) -> None:
+        try:
+            mode = os.lstat(self.socket_path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(f"{self.socket_path} exists and is not a socket")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(str(self.socket_path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                self.socket_path.unlink(missing_ok=True)
+                return
+        raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(_HEADER.size)
+                except asyncio.IncompleteReadError:
+                    break   # client closed the connection
+                (length,) = _HEADER.unpack(header)
+                if not 0 < length <= _MAX_FRAME:
+                    self._respond(writer, _ERROR, f"Bad frame length: {length}".encode())
+                    break
+                payload  = await reader.readexactly(length)
+                op, body = payload[:1], payload[1:]
+                try:
+                    if op == OP_PREDICT:
+                        response = _encode_result(await self.model.apredict(body))
+                    elif op == OP_FLUSH:
+                        await asyncio.get_running_loop().run_in_executor(None, self.model.flush)
+                        response = b""
+                    else:
+                        raise ValueError(f"Unknown op: {op!r}")
+                except ValueError as e:
+                    # Bad input, e.g. empty text: the client re-raises it as is.
+                    self._respond(writer, _INVALID, str(e).encode())
+                except Exception as e:
+                    logger.exception(f"Request {op!r} failed")
+                    self._respond(writer, _ERROR, f"{type(e).__name__}: {e}".encode())
+                else:
+                    self._respond(writer, _OK, response)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, status: bytes, body: bytes) -> None:
+        writer.write(_HEADER.pack(len(body) + 1) + status)
+        writer.write(body)
+
+# ===========================================================================
+# Client
+# ===========================================================================
+
+class SlovorezClient:
+    """Thin client for a running ``SlovorezDaemon``, with ``Slovorez.predict``'s signature.
+
+    Holds one connection, opened on first use. Not thread-safe -- give each
+    thread its own client (connections are cheap).
+
+    Args:
+        socket_path: the daemon's socket; ``default_socket_path()`` if None.
+        timeout:     seconds to wait on the socket, None to wait indefinitely.
+
+    Example::
+
+        with SlovorezClient() as client:
+            client.predict("Пароходы плыли по реке")
+    """
+
+    def __init__(self, socket_path: Union[str, Path, None] = None, timeout: Optional[float] = None):
+        self.socket_path = Path(socket_path) if socket_path is not None else default_socket_path()
+        self.timeout     = timeout
+        self._sock: Optional[socket.socket] = None
+
+    def predict(self, text: TextSource) -> dict[str, list[tuple[str, int, float]]]:
+        """Segment all Russian words in text into morphemes. See ``Slovorez.predict``.
+
+        Raises:
+            ValueError: if text is empty or whitespace-only, as ``Slovorez.predict`` does.
+        """
+        if isinstance(text, str):
+            text = text.encode("utf-8")
+        return _decode_result(self._request(OP_PREDICT, text))
+
+    def flush(self) -> None:
+        """Have the daemon write its buffered predictions to the log."""
+        self._request(OP_FLUSH, b"")
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self) -> SlovorezClient:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _connect(self) -> socket.socket:
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(str(self.socket_path))
+            except OSError:
+                sock.close()
+                raise
+            self._sock = sock
+        return self._sock
+
+    def _request(self, op: bytes, body) -> bytes:
+        body = memoryview(body).cast("B")
+        if len(body) + 1 > _MAX_FRAME:
+            raise ValueError(f"Request of {len(body)} bytes exceeds the {_MAX_FRAME}-byte frame limit")
+        sock = self._connect()
+        try:
+            sock.sendall(_HEADER.pack(len(body) + 1) + op)
+            sock.sendall(body)
+            (length,) = _HEADER.unpack(self._recv_exactly(sock, _HEADER.size))
+            payload   = self._recv_exactly(sock, length)
+        except BaseException:
+            # A half-read response would desync the connection.
+            self.close()
+            raise
+        if payload[:1] == _INVALID:
+            raise ValueError(bytes(payload[1:]).decode("utf-8", "replace"))
+        if payload[:1] != _OK:
+            raise RuntimeError(f"Slovorez daemon error: {bytes(payload[1:]).decode('utf-8', 'replace')}")
+        return payload[1:]
+
+    @staticmethod
+    def _recv_exactly(sock: socket.socket, size: int) -> bytearray:
+        buffer = bytearray(size)
+        view   = memoryview(buffer)
+        while view:
+            n = sock.recv_into(view)
+            if n == 0:
+                raise ConnectionError("Slovorez daemon closed the connection")
+            view = view[n:]
+        return buffer
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m slovorez.daemon",
+        description="Keep a Slovorez model loaded and serve predictions over a Unix socket.",
+    )
+    parser.add_argument("model", help="model directory or name")
+    parser.add_argument("--socket", help="socket path (default: $XDG_RUNTIME_DIR/slovorez.sock)")
+    parser.add_argument("--output", help="predictions log (default: from the model config)")
+    parser.add_argument("--base-dict", help="static base dictionary (default: from the model config)")
+    parser.add_argument("--device", choices=("auto", "cuda", "cpu"), default="auto")
+    parser.add_argument("--quantized", action="store_true", help="serve the INT8 CPU model")
+    parser.add_argument("--max-wait", type=float, default=0.005,
+                        help="seconds a request waits for others to share its inference batch")
+    args = parser.parse_args(argv)
+
+    from slovorez.slovorez import Slovorez
+
+    model = Slovorez.from_pretrained(
+        args.model,
+        output_path=args.output,
+        base_dict_path=args.base_dict,
+        device=args.device,
+        quantized=args.quantized,
+    )
+    model.set_micro_batching(max_wait=args.max_wait)
+    SlovorezDaemon(model, args.socket).serve_forever()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    main()
@@ -1 +1,3 @@
-from .loaders import load_json, to_json, append_to_jsonl
\ No newline at end of file
+from .loaders import load_json, to_json, append_to_jsonl
+from .compression import detect_compression, open_decompressed
+from .columnar import COLUMNAR_SUFFIX, is_columnar, read_words, read_records, jsonl_to_columnar, columnar_to_jsonl
@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import struct
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from slovorez.utils import resolve_path
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Format
+# ---------------------------------------------------------------------------
+#
+# A columnar log is a sequence of self-contained chunks, one per LogWriter
+# flush, so appending is safe and two logs concatenate into a valid one.
+# Each chunk is a header followed by its columns, in this order:
+#
+#   header          magic, version, records n, morphemes m, and the byte sizes
+#                   of the three string sections below
+#   models          model names, UTF-8, NUL-terminated (the chunk's dictionary)
+#   words           words, UTF-8, NUL-terminated
+#   morphemes       morpheme texts, UTF-8, NUL-terminated, in record order
+#   confidence      float32[n]  word confidence (rounded to 4 digits when read)
+#   model_id        uint16[n]   index into the chunk's model names
+#   flags           uint8[n]    bit 0 repaired, bit 1 validated
+#   morpheme_count  uint16[n]
+#   morpheme_type   uint8[m]
+#   morpheme_conf   float64[m]
+#
+# Integers are little-endian. The word column can be read alone. Morphemes
+# keep their own text: the decoder drops chars with a skip tag, so they do
+# not always spell the word.
+
+COLUMNAR_SUFFIX = ".slvc"
+
+_MAGIC   = b"SLVC"
+_VERSION = 1
+_HEADER  = struct.Struct("<4sHHIIIII")
+
+_REPAIRED  = 1
+_VALIDATED = 2
+
+_RECORD_COLUMNS = (
+    ("confidence",     np.dtype("<f4")),
+    ("model_id",       np.dtype("<u2")),
+    ("flags",          np.dtype("u1")),
+    ("morpheme_count", np.dtype("<u2")),
+)
+_MORPHEME_COLUMNS = (
+    ("morpheme_type", np.dtype("u1")),
+    ("morpheme_conf", np.dtype("<f8")),
+)
+_RECORD_BYTES   = sum(dtype.itemsize for _, dtype in _RECORD_COLUMNS)
+_MORPHEME_BYTES = sum(dtype.itemsize for _, dtype in _MORPHEME_COLUMNS)
+
+_CONVERT_CHUNK = 8192   # records per chunk written by jsonl_to_columnar
+
+
+def is_columnar(path: Union[str, Path]) -> bool:
+    """Whether ``path`` names a columnar log, by its ``COLUMNAR_SUFFIX``."""
+    return Path(path).suffix == COLUMNAR_SUFFIX
+
+
+def _join(strings: Iterable[str]) -> bytes:
+    return "".join(s + "\0" for s in strings).encode("utf-8")
+
+
+def _split(data: bytes) -> list[str]:
+    strings = data.decode("utf-8").split("\0")
+    strings.pop()   # empty string after the last terminator
+    return strings
+
+# ===========================================================================
+# Writing
+# ===========================================================================
+
+def encode_chunk(records: list[dict]) -> bytes:
+    """Encode prediction dicts (as written by ``LogWriter``) into one chunk.
+
+    Keys other than word, morphemes, confidence, model, repaired and
+    validated are not stored.
+
+    Raises:
+        ValueError: if a morpheme type id does not fit in a byte.
+    """
+    models: dict[str, int] = {}
+    texts:  list[str] = []
+    columns: dict[str, list] = {name: [] for name, _ in _RECORD_COLUMNS + _MORPHEME_COLUMNS}
+
+    for record in records:
+        for text, type_id, conf in record["morphemes"]:
+            if not 0 <= type_id < 256:
+                raise ValueError(f"Morpheme type id of {record['word']!r} out of range: {type_id}")
+            texts.append(text)
+            columns["morpheme_type"].append(type_id)
+            columns["morpheme_conf"].append(conf)
+        columns["confidence"].append(record["confidence"])
+        columns["model_id"].append(models.setdefault(record["model"], len(models)))
+        columns["flags"].append(
+            (_REPAIRED if record["repaired"] else 0) | (_VALIDATED if record["validated"] else 0)
+        )
+        columns["morpheme_count"].append(len(record["morphemes"]))
+
+    words_data     = _join(record["word"] for record in records)
+    models_data    = _join(models)
+    morphemes_data = _join(texts)
+    parts = [
+        _HEADER.pack(
+            _MAGIC, _VERSION, 0, len(records), len(texts),
+            len(models_data), len(words_data), len(morphemes_data),
+        ),
+        models_data,
+        words_data,
+        morphemes_data,
+    ]
+    for name, dtype in _RECORD_COLUMNS + _MORPHEME_COLUMNS:
+        parts.append(np.asarray(columns[name], dtype=dtype).tobytes())
+    return b"".join(parts)
+
+# ===========================================================================
+# Reading
+# ===========================================================================
+
+def _read_header(f, path: Path, pos: int) -> tuple[int, int, int, int, int, int]:
+    """Read the chunk header at ``pos``: (end, n, m, models_bytes, words_bytes, morphemes_bytes)."""
+    f.seek(pos)
+    magic, version, _, n, m, models_bytes, words_bytes, morphemes_bytes = _HEADER.unpack(
+        f.read(_HEADER.size)
+    )
+    if magic != _MAGIC:
+        raise ValueError(f"{path.name}: no columnar chunk at byte {pos}")
+    if version != _VERSION:
+        raise ValueError(f"{path.name}: unsupported columnar version {version} at byte {pos}")
+    end = (
+        pos + _HEADER.size + models_bytes + words_bytes + morphemes_bytes
+        + n * _RECORD_BYTES + m * _MORPHEME_BYTES
+    )
+    return end, n, m, models_bytes, words_bytes, morphemes_bytes
+
+
+def _iter_chunks(
+    path: Path, offset: int = 0, words_only: bool = False
+) -> Iterator[tuple[int, dict]]:
+    """Yield (end offset, columns) for each complete chunk from byte ``offset`` on.
+
+    A chunk that runs past the end of the file is still being written and
+    ends the iteration. With ``words_only`` the other columns are skipped
+    unread and the dict holds just ``"words"``.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        pos  = offset
+        while pos + _HEADER.size <= size:
+            end, n, m, models_bytes, words_bytes, morphemes_bytes = _read_header(f, path, pos)
+            if end > size:
+                break
+
+            if words_only:
+                f.seek(models_bytes, os.SEEK_CUR)
+                yield end, {"words": _split(f.read(words_bytes))}
+                pos = end
+                continue
+
+            data  = f.read(end - pos - _HEADER.size)
+            at    = models_bytes + words_bytes
+            chunk = {
+                "models":    _split(data[:models_bytes]),
+                "words":     _split(data[models_bytes:at]),
+                "morphemes": _split(data[at:at + morphemes_bytes]),
+            }
+            at += morphemes_bytes
+            for columns, count in ((_RECORD_COLUMNS, n), (_MORPHEME_COLUMNS, m)):
+                for name, dtype in columns:
+                    chunk[name] = np.frombuffer(data, dtype=dtype, count=count, offset=at)
+                    at += count * dtype.itemsize
+            yield end, chunk
+            pos = end
+
+
+def repair_tail(path: Union[str, Path]) -> int:
+    """Cut a partly written chunk off the end of a columnar log.
+
+    A writer that died mid-flush leaves a torn chunk; a chunk appended after
+    it would be read as part of it. Call this before appending to a log
+    that no one else is writing.
+
+    Returns:
+        The number of bytes removed (0 if the log ends on a chunk boundary
+        or does not exist).
+    """
+    path = Path(path)
+    if not path.is_file():
+        return 0
+    with open(path, "r+b") as f:
+        size = os.fstat(f.fileno()).st_size
+        pos  = 0
+        while pos + _HEADER.size <= size:
+            end = _read_header(f, path, pos)[0]
+            if end > size:
+                break
+            pos = end
+        if pos < size:
+            f.truncate(pos)
+    return size - pos
+
+
+def read_words(path: Union[str, Path], offset: int = 0) -> tuple[list[str], int]:
+    """Read only the word column of a columnar log.
+
+    Args:
+        path:   the log.
+        offset: byte offset of the first chunk to read (a previous ``end``).
+
+    Returns:
+        (words, end): words in log order and the offset after the last
+        complete chunk.
+    """
+    words: list[str] = []
+    end = offset
+    for end, chunk in _iter_chunks(Path(path), offset, words_only=True):
+        words.extend(chunk["words"])
+    return words, end
+
+
+def read_records(path: Union[str, Path]) -> Iterator[dict]:
+    """Yield the prediction dicts of a columnar log, as ``stream_jsonl`` does for JSONL.
+
+    Example::
+
+        for record in read_records("predictions.slvc"):
+            print(record["word"], record["morphemes"])
+    """
+    for _, chunk in _iter_chunks(resolve_path(path)):
+        models     = chunk["models"]
+        confidence = chunk["confidence"].tolist()
+        model_id   = chunk["model_id"].tolist()
+        flags      = chunk["flags"].tolist()
+        counts     = chunk["morpheme_count"].tolist()
+        m_text     = chunk["morphemes"]
+        m_type     = chunk["morpheme_type"].tolist()
+        m_conf     = chunk["morpheme_conf"].tolist()
+
+        j = 0
+        for i, word in enumerate(chunk["words"]):
+            morphemes = [
+                [m_text[k], m_type[k], m_conf[k]] for k in range(j, j + counts[i])
+            ]
+            j += counts[i]
+            yield {
+                "word":       word,
+                "morphemes":  morphemes,
+                "confidence": round(confidence[i], 4),
+                "model":      models[model_id[i]],
+                "repaired":   bool(flags[i] & _REPAIRED),
+                "validated":  bool(flags[i] & _VALIDATED),
+            }
+
+# ---------------------------------------------------------------------------
+# Conversion
+# ---------------------------------------------------------------------------
+
+def jsonl_to_columnar(
+    src: Union[str, Path], dst: Union[str, Path], chunk_records: int = _CONVERT_CHUNK
+) -> int:
+    """Convert a JSONL prediction log to the columnar format.
+
+    Malformed lines are skipped with a warning. Returns the number of
+    records written.
+    """
+    src, dst = resolve_path(src), resolve_path(dst)
+    written = 0
+    batch: list[dict] = []
+    with open(src, "r", encoding="utf-8") as f_in, open(dst, "wb") as f_out:
+        for lineno, line in enumerate(f_in, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                batch.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed line {lineno} in {src.name}")
+                continue
+            if len(batch) >= chunk_records:
+                f_out.write(encode_chunk(batch))
+                written += len(batch)
+                batch = []
+        if batch:
+            f_out.write(encode_chunk(batch))
+            written += len(batch)
+    return written
+
+
+def columnar_to_jsonl(src: Union[str, Path], dst: Union[str, Path]) -> int:
+    """Convert a columnar log back to JSONL, as ``LogWriter`` writes it.
+
+    Returns the number of records written.
+    """
+    written = 0
+    with open(resolve_path(dst), "w", encoding="utf-8") as f:
+        for record in read_records(src):
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            written += 1
+    return written
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m slovorez.io.columnar",
+        description="Convert prediction logs between JSONL and the columnar format.",
+    )
+    parser.add_argument("src", help="input log (.jsonl or .slvc)")
+    parser.add_argument("dst", help="output log; the direction follows the input's suffix")
+    args = parser.parse_args(argv)
+
+    if is_columnar(args.src):
+        n = columnar_to_jsonl(args.src, args.dst)
+    else:
+        n = jsonl_to_columnar(args.src, args.dst)
+    print(f"{n:,} records written to {args.dst}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    main()
@@ -0,0 +1,74 @@
+import bz2
+import gzip
+import lzma
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+from slovorez.utils import resolve_path
+
+# Leading bytes of each supported container format.
+_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+)
+_MAGIC_LEN = max(len(magic) for magic, _ in _MAGIC)
+
+COMPRESSIONS = tuple(name for _, name in _MAGIC)
+
+
+def detect_compression(path: Union[str, Path]) -> Optional[str]:
+    """Return the compression format of a file by its magic bytes.
+
+    Returns one of ``COMPRESSIONS`` ("gzip", "bz2", "xz", "zstd"), or None
+    for plain files. The file extension is not consulted.
+    """
+    with open(resolve_path(path), "rb") as f:
+        head = f.read(_MAGIC_LEN)
+    for magic, name in _MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def _open_zstd(path: Path) -> BinaryIO:
+    try:
+        from compression import zstd  # Python 3.14+
+        return zstd.open(path, "rb")
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "Reading zstd files requires the 'zstandard' package: pip install .[zstd]"
+        ) from None
+    return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+
+
+def open_decompressed(path: Union[str, Path], compression: Optional[str] = None) -> BinaryIO:
+    """Open a compressed file as a binary stream of the decompressed bytes.
+
+    Args:
+        path:        path to the compressed file.
+        compression: one of ``COMPRESSIONS``; detected from the magic bytes
+                     when None.
+
+    Example::
+
+        with open_decompressed("corpus.txt.gz") as f:
+            block = f.read(1 << 20)
+    """
+    abs_path = resolve_path(path)
+    if compression is None:
+        compression = detect_compression(abs_path)
+
+    if compression == "gzip":
+        return gzip.open(abs_path, "rb")
+    if compression == "bz2":
+        return bz2.open(abs_path, "rb")
+    if compression == "xz":
+        return lzma.open(abs_path, "rb")
+    if compression == "zstd":
+        return _open_zstd(abs_path)
+    raise ValueError(f"Unsupported compression: {compression!r}. Expected one of {COMPRESSIONS}")
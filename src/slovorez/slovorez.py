@@ -1,17 +1,24 @@
 from __future__ import annotations
 
-import queue
 import logging
 import multiprocessing
+import os
+import queue
+import threading
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
 
 import numpy as np
 
-from slovorez.core.engine import ModelResource
-from slovorez.core.process import SlovorezTokenizer
-from slovorez.core.cache import LogWriter, MorphemeRegistry, PersistenceIndex
-from slovorez.core.tokenizer import FFTokenizer, FTTokenizer
+from slovorez.core.batching import MicroBatcher, TokenBudgetBatcher
+from slovorez.core.engine import ModelResource, int8_weights_path
+from slovorez.core.process import SlovorezTokenizer, reduce_logits
+from slovorez.core.cache import (
+    FingerprintSet, LogWriter, MorphemeRegistry, PersistenceIndex, WordTable, drop_seen,
+    fingerprint_words,
+)
+from slovorez.core.tokenizer import FTTokenizer, TextSource, open_file_tokenizer
+from slovorez.io.compression import detect_compression
 from slovorez.io.loaders import load_json
 from slovorez.utils import resolve_model_dir, resolve_path, MODEL_CONFIG_NAME
 from slovorezCXX import TokenType
@@ -24,8 +31,107 @@ logger = logging.getLogger(__name__)
 
 _DEFAULT_BATCH_SIZE  = 65536
 _DEFAULT_MODEL_BATCH = 2048
-_DEFAULT_QUEUE_LIMIT = 16
+_DEFAULT_TOKEN_BUDGET = 32768
 _DEFAULT_MAX_WORKERS = 8
+_MIN_SHARD_BYTES     = 1 << 20
+_DEFAULT_QUEUE_SIZE  = 16
+_DEFAULT_MAX_WAIT    = 0.005   # seconds apredict() holds words for other callers
+
+# Core partition between tokenizer and inference workers on CPU.
+_CORES_PER_TOKENIZER      = 4   # one tokenizer worker per this many cores
+_INFERENCE_WORKER_THREADS = 2   # ORT intra-op threads per inference worker
+
+# Rough per-item costs used to turn a memory budget into pipeline sizes.
+_LEXER_TOKEN_BYTES = 256   # two native batch buffers + dedup slots + the Python str, per token
+_QUEUE_WORD_BYTES  = 96    # a word as a Python str inside a queued item
+_MIN_BATCH_SIZE    = 1024
+
+
+def _plan_shards(file_size: int, max_workers: int) -> list[tuple[int, int]]:
+    """Split a file into up to ``max_workers`` contiguous (offset, length) ranges.
+
+    Ranges are raw byte cuts -- the C++ sentencer snaps both ends of each
+    range to a token boundary, so adjacent shards never split a word.
+    Files smaller than ``_MIN_SHARD_BYTES`` per worker get fewer shards.
+    """
+    n = max(1, min(max_workers, file_size // _MIN_SHARD_BYTES))
+    bounds = [file_size * i // n for i in range(n + 1)]
+    return [(bounds[i], bounds[i + 1] - bounds[i]) for i in range(n)]
+
+
+def _available_cores() -> int:
+    """Cores this process may run on (its affinity mask where supported)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _plan_cores(
+    n_cores: int,
+    max_workers: int,
+    on_gpu: bool,
+    inference_workers: Optional[int] = None,
+    intra_op_threads: int = 0,
+) -> tuple[int, int, int]:
+    """Split cores into (tokenizer workers, inference workers, threads per inference worker).
+
+    On GPU one inference worker drives the device (or ``inference_workers``
+    of them), keeps the configured ``intra_op_threads`` and leaves the other
+    cores to tokenizer workers. On CPU one core in ``_CORES_PER_TOKENIZER``
+    (at least one) goes to tokenizer workers and the rest to inference
+    workers of ``intra_op_threads`` threads each (``_INFERENCE_WORKER_THREADS``
+    if unset), or to exactly ``inference_workers`` workers sharing them.
+    Tokenizer workers never exceed ``max_workers``.
+    """
+    n_cores = max(1, n_cores)
+    if on_gpu:
+        n_infer = inference_workers or 1
+        n_tok   = max(1, min(max_workers, n_cores - n_infer))
+        return n_tok, n_infer, intra_op_threads
+
+    n_tok       = max(1, min(max_workers, n_cores // _CORES_PER_TOKENIZER))
+    infer_cores = max(1, n_cores - n_tok)
+    if inference_workers:
+        n_infer = inference_workers
+        threads = intra_op_threads or max(1, infer_cores // n_infer)
+    else:
+        threads = intra_op_threads or min(_INFERENCE_WORKER_THREADS, infer_cores)
+        n_infer = max(1, infer_cores // threads)
+    return n_tok, n_infer, threads
+
+
+def _plan_memory(
+    memory_budget: int,
+    n_workers: int,
+    batch_size: int,
+    model_batch: int,
+    maxlen: int,
+    n_tags: int,
+) -> tuple[int, int, int]:
+    """Derive (batch_size, model_batch, queue_size) that fit ``memory_budget`` bytes.
+
+    Half of the budget goes to the lexer batches of the ``n_workers`` CPU
+    workers, the other half to the items in flight between processes: an
+    encoded batch (int32 char ids) in ``gpu_queue`` and its tag ids and
+    float16 scores in ``result_queue``. Requested sizes are only ever lowered. Model
+    weights, the ONNX Runtime arena and the seen-word sets are not covered.
+    """
+    lexer_share = memory_budget // 2
+    queue_share = memory_budget - lexer_share
+
+    per_worker = lexer_share // (max(1, n_workers) * _LEXER_TOKEN_BYTES)
+    if per_worker < _MIN_BATCH_SIZE:
+        logger.warning(
+            f"memory_budget={memory_budget} is too small for {n_workers} worker(s); "
+            f"using the minimum batch size {_MIN_BATCH_SIZE}."
+        )
+    batch_size = min(batch_size, max(_MIN_BATCH_SIZE, per_worker))
+
+    tag_bytes   = 1 if n_tags <= 256 else 2
+    word_bytes  = maxlen * (4 + tag_bytes + 2) + 2 * _QUEUE_WORD_BYTES
+    model_batch = max(1, min(model_batch, batch_size, queue_share // (2 * word_bytes)))
+    queue_size  = max(1, queue_share // (model_batch * word_bytes))
+    return batch_size, model_batch, queue_size
 
 # ---------------------------------------------------------------------------
 # Worker functions
@@ -35,14 +141,22 @@ def _gpu_worker(
     model_path: str,
     gpu_queue: multiprocessing.Queue,
     result_queue: multiprocessing.Queue,
+    device: str = "auto",
+    session_options: Optional[dict] = None,
 ) -> None:
     """Inference worker: loads the ONNX model and runs predict in a loop.
 
-    Receives (words, encoded) from ``gpu_queue``, returns (words, logits)
-    to ``result_queue``. Logits are cast to float16 to halve IPC payload.
-    Terminates on receiving None from the queue.
+    Several of these may share ``gpu_queue`` and ``result_queue``; each
+    takes the next batch as soon as it is free. Receives (words, encoded)
+    from ``gpu_queue``, returns (words, tag_ids,
+    max_confs) to ``result_queue``: logits are reduced here to a uint8 tag
+    and a float16 score per char, so the full (batch, seq_len, num_tags)
+    tensor never crosses the process boundary.
+    Terminates on receiving None from the queue. The session is built with
+    the parent's device and session options, so it reuses the optimized
+    model cache instead of re-optimizing the graph.
     """
-    model = ModelResource(model_path)
+    model = ModelResource(model_path, device=device, session_options=session_options)
 
     while True:
         item = gpu_queue.get()
@@ -50,61 +164,149 @@ def _gpu_worker(
             break
 
         words, encoded = item
-        logits = model.predict(encoded)
-        result_queue.put((words, logits.astype(np.float16)))
+        tag_ids, max_confs = reduce_logits(model.predict(encoded))
+        result_queue.put((words, tag_ids, max_confs))
+
+
+def _cache_worker(model_path: str, device: str, session_options: dict) -> None:
+    """Builds the optimized model cache in a throwaway process.
+
+    The parent then never creates a session of its own: on GPU that would
+    initialize CUDA before the inference workers are forked from it, and
+    keep a spare copy of the model in memory for the whole run.
+    """
+    ModelResource(model_path, device=device, session_options=session_options).get_session()
 
 
 def _cpu_worker(
-    task_queue: multiprocessing.Queue,
+    file_path: str,
+    offset: int,
+    length: Optional[int],
+    batch_size: int,
+    known_words: Union[FingerprintSet, WordTable],
+    min_len: int,
+    max_len: int,
+    worker_id: int,
+    inboxes: list[multiprocessing.Queue],
     gpu_queue: multiprocessing.Queue,
-    cache_snapshot: frozenset[str],
-    base_dict_keys: frozenset[str],
     tokenizer_config: dict,
     model_batch: int,
-    min_len: int,
-    max_len: int,
+    token_budget: int,
+    dedup_stats,
 ) -> None:
-    """Tokenization worker: filters and encodes word batches for the GPU.
+    """Tokenization worker: lexes one file shard and feeds its share of new words to inference.
 
-    Applies three filters before a word reaches the GPU:
-      1. Length must be within [min_len, max_len].
-      2. Must not be in the base dictionary (pre-validated, no inference needed).
-      3. Must not have been seen in a prior session (cache_snapshot) or
-         earlier in this worker's own run (local_seen).
+    The worker owns the byte range [offset, offset + length) of the input
+    file (snapped to token boundaries by the C++ sentencer), so lexing
+    scales with the number of workers. A compressed file is a single shard
+    (offset 0, length None) streamed through a decompression thread.
 
-    ``cache_snapshot`` and ``base_dict_keys`` are frozen at worker spawn time
-    and treated as read-only throughout the worker's lifetime.
+    Applies three filters before a word is passed on:
+      1. Length must be within [min_len, max_len].
+      2. Must not be in the base dictionary (pre-validated, no inference needed)
+         or have been seen in a prior session -- both are in ``known_words``.
+      3. Must not have been seen earlier in this worker's own run (local_seen).
+
+    ``known_words`` is frozen at worker spawn time and read-only: a table in
+    shared memory that every worker attaches to (see
+    ``PersistenceIndex.share_snapshot``), so none holds its own copy. Batches come
+    out of the C++ sentencer already lowercased and deduplicated.
+
+    Another shard may hold the same new words, so each word has one owner:
+    the worker ``fingerprint_words(word) % len(inboxes)``. Words owned by
+    other workers are sent to their ``inboxes`` entry; between its own
+    batches the worker drains its inbox, drops words of its share already
+    forwarded (owned_seen), regroups the rest by length into batches of at
+    most ``token_budget`` padded tokens and ``model_batch`` words and sends
+    them encoded to ``gpu_queue``. Every new word of the run therefore
+    reaches inference once, with no central stage. Inboxes are unbounded,
+    so workers never wait on each other; each also feeds the bounded
+    ``gpu_queue``, which paces them all.
+
+    Sends None to every other inbox when its shard is done, and returns
+    once it has received theirs. Adds (words received, words forwarded)
+    for its share to ``dedup_stats``.
     """
-    tokenizer   = SlovorezTokenizer.from_config(tokenizer_config)
     local_seen: set[str] = set()
-    pending:    list[str] = []
+    owned_seen: set[str] = set()
+    n_owners  = len(inboxes)
+    inbox     = inboxes[worker_id]
+    pending   = n_owners - 1   # None sentinels still expected from other workers
+    received  = forwarded = 0
 
-    def _flush() -> None:
-        if pending:
-            encoded = tokenizer.encode_batch(pending)
-            gpu_queue.put((list(pending), encoded))
-            pending.clear()
+    tokenizer = SlovorezTokenizer.from_config(tokenizer_config)
+    batcher   = TokenBudgetBatcher(
+        token_budget, tokenizer.maxlen, max_words=model_batch, pad_context=tokenizer.pad_context
+    )
+
+    def _send(ready: list[list[str]]) -> None:
+        nonlocal forwarded
+        for words in ready:
+            forwarded += len(words)
+            gpu_queue.put((words, tokenizer.encode_batch(words)))
+
+    def _take(words: list[str]) -> None:
+        nonlocal received
+        received += len(words)
+        fresh = [word for word in words if word not in owned_seen]
+        owned_seen.update(fresh)
+        _send(batcher.add(fresh))
+
+    def _drain(block: bool) -> None:
+        nonlocal pending
+        while pending:
+            try:
+                words = inbox.get(block=block)
+            except queue.Empty:
+                return
+            if words is None:
+                pending -= 1
+            else:
+                _take(words)
+
+    tokenizer_cxx = open_file_tokenizer(file_path, validated=True, offset=offset, length=length)
+    tokenizer_cxx.set_batch_size(batch_size)
+    tokenizer_cxx.set_filter(TokenType.RUWORD)
+    tokenizer_cxx.set_lowercase(True)
+    tokenizer_cxx.set_unique(True)
+    tokenizer_cxx.set_prefetch(True)
+
+    batch = tokenizer_cxx.get_batch()
+    while batch:
+        tokens = batch["text"].split('\0')[:-1]
+
+        fresh = [
+            token for token in tokens
+            if min_len <= len(token) <= max_len and token not in local_seen
+        ]
+        fresh = drop_seen(known_words, fresh)
+        local_seen.update(fresh)
+        if n_owners == 1:
+            _take(fresh)
+        elif fresh:
+            shares: list[list[str]] = [[] for _ in range(n_owners)]
+            owners = (fingerprint_words(fresh) % np.uint64(n_owners)).tolist()
+            for word, owner in zip(fresh, owners):
+                shares[owner].append(word)
+            for owner, share in enumerate(shares):
+                if share and owner != worker_id:
+                    inboxes[owner].put(share)
+            _take(shares[worker_id])
+        _drain(block=False)
 
-    while True:
-        batch = task_queue.get()
-        if batch is None:
-            break
+        batch = tokenizer_cxx.get_batch()
 
-        tokens = batch["text"].lower().split('\0')[:-1]
+    known_words.close()
 
-        for token in tokens:
-            if (
-                min_len <= len(token) <= max_len
-                and token not in base_dict_keys
-                and token not in cache_snapshot
-                and token not in local_seen
-            ):
-                local_seen.add(token)
-                pending.append(token)
-                if len(pending) >= model_batch:
-                    _flush()
+    for owner, other in enumerate(inboxes):
+        if owner != worker_id:
+            other.put(None)
+    _drain(block=True)
+    _send(batcher.flush())
 
-    _flush()
+    with dedup_stats.get_lock():
+        dedup_stats[0] += received
+        dedup_stats[1] += forwarded
 
 
 def _writer_worker(
@@ -113,11 +315,14 @@ def _writer_worker(
     tokenizer_config: dict,
     model_name: str,
 ) -> None:
-    """Writer worker: decodes logits and persists results to disk.
-
-    Uses ``LogWriter`` for buffered JSONL output. No deduplication is
-    performed here -- the CPU workers guarantee uniqueness upstream.
-    Terminates on receiving None from the queue.
+    """Writer worker: decodes tag ids into morphemes and persists results to disk.
+
+    Receives (words, tag_ids, max_confs) -- logits already reduced by the
+    inference workers (``reduce_logits``) -- and runs the vectorized BIES
+    decoder (``decode_tags_detail``) on each batch. Uses ``LogWriter`` for
+    buffered output. No deduplication is
+    performed here -- the CPU worker owning a word sends it to inference
+    once per run. Terminates on receiving None from the queue.
     """
     writer    = LogWriter(output_path)
     tokenizer = SlovorezTokenizer.from_config(tokenizer_config)
@@ -127,8 +332,8 @@ def _writer_worker(
         if item is None:
             break
 
-        words, logits = item
-        results = list(tokenizer.decode_predictions_detail(words, logits, model_name))
+        words, tag_ids, max_confs = item
+        results = list(tokenizer.decode_tags_detail(words, tag_ids, max_confs, model_name))
         writer.write(results)
 
     writer.flush()
@@ -166,6 +371,10 @@ class Slovorez:
         self._registry   = registry
         self._writer     = writer
         self._model_name = model_name
+        self._micro_batcher: Optional[MicroBatcher] = None
+        # predict() and apredict()'s inference thread may overlap; the model
+        # reuses its output buffer and the registry/writer are not thread-safe.
+        self._infer_lock = threading.Lock()
 
     @classmethod
     def from_pretrained(
@@ -174,6 +383,9 @@ class Slovorez:
         output_path: Union[str, Path, None] = None,
         base_dict_path: Union[str, Path, None] = None,
         device: str = "auto",
+        session_options: Optional[dict] = None,
+        quantized: bool = False,
+        index_backend: str = "set",
     ) -> Slovorez:
         """Load a Slovorez model from a local directory.
 
@@ -187,8 +399,10 @@ class Slovorez:
             └── slovorez-v1/
                 ├── config.json          # required
                 ├── slovorez-v1.onnx     # weights -- path from config["resources"]["weights"]
+                ├── slovorez-v1.int8.onnx  # optional INT8 variant (quantized=True)
                 ├── base_dict.json       # optional static dictionary
-                └── predictions.jsonl   # default output location
+                ├── predictions.jsonl   # default output location
+                └── predictions.jsonl.seen  # seen-set sidecar, rebuilt if missing
 
         Args:
             model_name_or_path: path to the model directory (absolute or
@@ -196,9 +410,23 @@ class Slovorez:
                 ``"slovorez-test"`` works if the directory is resolvable.
             output_path: override where predictions are written. Defaults to
                 ``config["resources"]["output"]`` resolved inside the model dir.
+                A ``.slvc`` path selects the binary columnar log format
+                (``slovorez.io.columnar``) over JSONL.
             base_dict_path: override the static base dictionary path. Defaults
                 to ``config["resources"]["base_dict"]`` if present.
             device: ``"auto"`` | ``"cuda"`` | ``"cpu"``.
+            session_options: ONNX Runtime settings (``intra_op_num_threads``,
+                ``inter_op_num_threads``, ``execution_mode``,
+                ``graph_optimization_level``, ``optimized_model_cache``),
+                applied over ``config["session_options"]``. See ``ModelResource``.
+            quantized: load the INT8 CPU variant of the weights instead:
+                ``config["resources"]["weights_int8"]`` if set, else
+                ``<weights stem>.int8.onnx``. Build it with
+                ``python -m slovorez.core.quantization <model_dir> --corpus <text>``.
+                Predictions are logged under the model name + ``"-int8"``.
+            index_backend: seen-set storage, ``"set"`` or ``"fingerprint"``
+                (64-bit hashes, ~10x smaller for very large logs; see
+                ``PersistenceIndex``).
 
         Example::
 
@@ -208,6 +436,11 @@ class Slovorez:
                 "models/slovorez-v1",
                 output_path="runs/experiment-1/predictions.jsonl",
             )
+            model = Slovorez.from_pretrained(
+                "models/slovorez-v1",
+                session_options={"intra_op_num_threads": 4, "graph_optimization_level": "extended"},
+            )
+            model = Slovorez.from_pretrained("models/slovorez-v1", device="cpu", quantized=True)
         """
         model_dir   = resolve_model_dir(model_name_or_path)
         config      = load_json(model_dir / MODEL_CONFIG_NAME)
@@ -225,6 +458,17 @@ class Slovorez:
                 f"'{weights_filename}'"
             )
 
+        if quantized:
+            model_path = int8_weights_path(model_path)
+            if "weights_int8" in resources:
+                model_path = model_dir / resources["weights_int8"]
+            if not model_path.is_file():
+                raise FileNotFoundError(
+                    f"INT8 model weights not found: {model_path}. Build them with: "
+                    f"python -m slovorez.core.quantization {model_dir} --corpus <text file>"
+                )
+            model_name = f"{model_name}-int8"
+
         # --- output path -----------------------------------------------------
         if output_path is not None:
             resolved_output = resolve_path(output_path)
@@ -253,13 +497,19 @@ class Slovorez:
             registry = MorphemeRegistry.from_base_dict(resolved_dict_path)
 
         # --- persistence index (seen-set rebuilt from log file) --------------
-        index = PersistenceIndex.from_jsonl(
+        index = PersistenceIndex.from_log(
             resolved_output,
             max_len=model_specs["maxlen"],
+            backend=index_backend,
         )
 
+        # --- inference session settings ---------------------------------------
+        resolved_session_options = {**config.get("session_options", {}), **(session_options or {})}
+
         return cls(
-            model      = ModelResource(str(model_path), device=device),
+            model      = ModelResource(
+                str(model_path), device=device, session_options=resolved_session_options
+            ),
             tokenizer  = SlovorezTokenizer.from_config(config),
             index      = index,
             registry   = registry,
@@ -271,7 +521,7 @@ class Slovorez:
     # Inference
     # ------------------------------------------------------------------
 
-    def predict(self, text: str) -> dict[str, list[tuple[str, int, float]]]:
+    def predict(self, text: TextSource) -> dict[str, list[tuple[str, int, float]]]:
         """Segment all Russian words in text into morphemes.
 
         Words present in the registry (base dict or validated dict) are
@@ -280,7 +530,9 @@ class Slovorez:
 
         Args:
             text: raw input string (any language mix is fine -- only Russian
-                  words are extracted and segmented).
+                  words are extracted and segmented), or a bytes-like object
+                  holding UTF-8 text (bytes, bytearray, memoryview, mmap),
+                  which is lexed in place without decoding or copying it.
 
         Returns:
             Dict mapping each unique Russian word (lowercased) to its
@@ -288,36 +540,135 @@ class Slovorez:
         """
         tokenizer_cxx = FTTokenizer(text)
         tokenizer_cxx.set_filter(TokenType.RUWORD)
+        tokenizer_cxx.set_lowercase(True)
+        tokenizer_cxx.set_unique(True)
 
-        final_results: dict[str, list[tuple[str, int, float]]] = {}
+        batcher = TokenBudgetBatcher(
+            _DEFAULT_TOKEN_BUDGET, self._tokenizer.maxlen,
+            max_words=_DEFAULT_MODEL_BATCH, pad_context=self._tokenizer.pad_context,
+        )
+        # Lookups wait until every batch has run; words may sit in the
+        # batcher across tokenizer batches. Keys keep first-seen order.
+        all_tokens: dict[str, None] = {}
         batch = tokenizer_cxx.get_batch()
 
         while batch:
-            tokens = batch["text"].lower().split('\0')[:-1]
+            tokens = batch["text"].split('\0')[:-1]
+            all_tokens.update(dict.fromkeys(tokens))
 
             candidates = [t for t in tokens if t not in self._registry.base_dict_keys]
-            unseen = self._index.filter_unseen(candidates)
-
-            if unseen:
-                encoded     = self._tokenizer.encode_batch(unseen)
-                logits      = self._model.predict(encoded)
-                rich_results = list(self._tokenizer.decode_predictions_detail(
-                    unseen, logits, self._model_name
-                ))
-                self._index.mark_seen(unseen)
-                self._registry.register(rich_results)
-                self._writer.write(rich_results)
-
-            for token in tokens:
-                if token not in final_results:
-                    morphemes = self._registry.lookup(token)
-                    if morphemes is not None:
-                        final_results[token] = morphemes
+            for words in batcher.add(self._index.filter_unseen(candidates)):
+                self._infer_batch(words)
 
             batch = tokenizer_cxx.get_batch()
 
+        for words in batcher.flush():
+            self._infer_batch(words)
+
+        final_results: dict[str, list[tuple[str, int, float]]] = {}
+        for token in all_tokens:
+            morphemes = self._registry.lookup(token)
+            if morphemes is not None:
+                final_results[token] = morphemes
+        return final_results
+
+    async def apredict(self, text: TextSource) -> dict[str, list[tuple[str, int, float]]]:
+        """Asynchronous ``predict`` that shares inference across concurrent calls.
+
+        Unseen words of all callers awaiting ``apredict`` are pooled and run
+        as one inference batch, at the latest ``max_wait`` seconds after the
+        first of them was queued (see ``set_micro_batching``). Inference runs
+        on a dedicated thread, so the event loop is not blocked; lexing the
+        text happens inline and is cheap for request-sized texts.
+
+        Args:
+            text: same as ``predict``.
+
+        Returns:
+            Same as ``predict``.
+
+        Example::
+
+            results = await asyncio.gather(*(model.apredict(t) for t in texts))
+        """
+        all_tokens = self._unique_words(text)
+        candidates = [t for t in all_tokens if t not in self._registry.base_dict_keys]
+        if self._micro_batcher is None:
+            self.set_micro_batching()
+        await self._micro_batcher.submit(self._index.filter_unseen(candidates))
+
+        final_results: dict[str, list[tuple[str, int, float]]] = {}
+        for token in all_tokens:
+            morphemes = self._registry.lookup(token)
+            if morphemes is not None:
+                final_results[token] = morphemes
         return final_results
 
+    @staticmethod
+    def _unique_words(text: TextSource) -> dict[str, None]:
+        """Unique lowercase Russian words of ``text``, in first-seen order."""
+        # A separate frame, so the lexer and its buffers are freed before
+        # apredict() awaits -- not held by every pending call at once.
+        tokenizer_cxx = FTTokenizer(text)
+        tokenizer_cxx.set_filter(TokenType.RUWORD)
+        tokenizer_cxx.set_lowercase(True)
+        tokenizer_cxx.set_unique(True)
+
+        words: dict[str, None] = {}
+        batch = tokenizer_cxx.get_batch()
+        while batch:
+            words.update(dict.fromkeys(batch["text"].split('\0')[:-1]))
+            batch = tokenizer_cxx.get_batch()
+        return words
+
+    def set_micro_batching(
+        self,
+        max_wait: float = _DEFAULT_MAX_WAIT,
+        max_words: int = _DEFAULT_MODEL_BATCH,
+    ) -> None:
+        """Configure how ``apredict`` pools words across concurrent calls.
+
+        Args:
+            max_wait:  seconds the first queued word waits for others before
+                       the pool is run -- the latency added to a lone call.
+            max_words: pooled words that trigger a run immediately.
+        """
+        # Keep the inference thread, so runs stay serialized after a reconfigure.
+        executor = self._micro_batcher.executor if self._micro_batcher is not None else None
+        self._micro_batcher = MicroBatcher(
+            self._infer_words, max_wait=max_wait, max_words=max_words, executor=executor
+        )
+
+    def _infer_words(self, words: list[str]) -> None:
+        """Run inference on unseen words, regrouped into token-budget batches."""
+        batcher = TokenBudgetBatcher(
+            _DEFAULT_TOKEN_BUDGET, self._tokenizer.maxlen,
+            max_words=_DEFAULT_MODEL_BATCH, pad_context=self._tokenizer.pad_context,
+        )
+        for batch in batcher.add(words) + batcher.flush():
+            self._infer_batch(batch)
+
+    def _infer_batch(self, words: list[str]) -> None:
+        """Run one inference batch and register, log and mark its words seen."""
+        encoded = self._tokenizer.encode_batch(words)
+        with self._infer_lock:
+            logits       = self._model.predict(encoded)
+            rich_results = list(self._tokenizer.decode_predictions_detail(
+                words, logits, self._model_name
+            ))
+            self._index.mark_seen(words)
+            self._registry.register(rich_results)
+            self._writer.write(rich_results)
+
+    def warm_up(self) -> None:
+        """Create the inference session now rather than on the first prediction."""
+        self._model.get_session()
+
+    def flush(self) -> None:
+        """Write predictions still buffered by ``predict``/``apredict`` to the log."""
+        with self._infer_lock:
+            self._writer.flush()
+
     # ------------------------------------------------------------------
     # File processing
     # ------------------------------------------------------------------
@@ -329,53 +680,84 @@ class Slovorez:
         model_batch: int = _DEFAULT_MODEL_BATCH,
         max_workers: int = _DEFAULT_MAX_WORKERS,
         multiprocessing_mode: bool = False,
+        memory_budget: Optional[int] = None,
+        token_budget: int = _DEFAULT_TOKEN_BUDGET,
+        inference_workers: Optional[int] = None,
     ) -> None:
         """Process a text file and persist all morpheme predictions to disk.
 
         Args:
-            file_path:           path to the input text file.
-            batch_size:          number of characters per C++ tokenizer batch.
+            file_path:           path to the input text file, plain or compressed
+                                 (gzip, bz2, xz or zstd -- detected by magic bytes
+                                 and decompressed on the fly).
+            batch_size:          number of distinct words per C++ tokenizer batch.
             model_batch:         maximum words per single model inference call.
-            max_workers:         maximum CPU tokenizer workers (multiprocessing only).
+            token_budget:        maximum padded tokens (words * longest word) per
+                                 inference call. Unseen words are regrouped by length
+                                 across tokenizer batches to fill calls without padding.
+            max_workers:         maximum CPU (tokenizer) workers, one per file shard
+                                 (multiprocessing only).
             multiprocessing_mode: if True, spawns workers for CPU/GPU parallelism.
                                   if False, runs sequentially in the main thread
                                   (recommended for Windows or small files).
+            memory_budget:       bytes the pipeline buffers may use. Caps batch_size
+                                 and model_batch and, in multiprocessing mode, bounds
+                                 the inter-process queues (see ``_plan_memory``).
+                                 None keeps the given sizes and _DEFAULT_QUEUE_SIZE.
+            inference_workers:   inference worker processes fed from one shared queue
+                                 (multiprocessing only). None partitions the available
+                                 cores between tokenizer and inference workers, each
+                                 inference worker with its own ORT thread budget
+                                 (see ``_plan_cores``).
         """
         if multiprocessing_mode:
-            self._process_file_multiprocessing(file_path, batch_size, model_batch, max_workers)
+            self._process_file_multiprocessing(
+                file_path, batch_size, model_batch, max_workers, memory_budget, token_budget,
+                inference_workers,
+            )
         else:
-            self._process_file_sequential(file_path, batch_size, model_batch)
+            if memory_budget is not None:
+                batch_size, model_batch, _ = _plan_memory(
+                    memory_budget, 1, batch_size, model_batch,
+                    self._tokenizer.maxlen, len(self._tokenizer.bies_vocab),
+                )
+            self._process_file_sequential(file_path, batch_size, model_batch, token_budget)
 
     def _process_file_sequential(
         self,
         file_path: Union[str, Path],
         batch_size: int,
         model_batch: int,
+        token_budget: int,
     ) -> None:
-        tokenizer_cxx = FFTokenizer(file_path)
+        tokenizer_cxx = open_file_tokenizer(file_path)
         tokenizer_cxx.set_batch_size(batch_size)
         tokenizer_cxx.set_filter(TokenType.RUWORD)
+        tokenizer_cxx.set_lowercase(True)
+        tokenizer_cxx.set_unique(True)
+        tokenizer_cxx.set_prefetch(True)
 
-        batch = tokenizer_cxx.get_batch()
-        while batch:
-            tokens     = batch["text"].lower().split('\0')[:-1]
-            candidates = {t for t in tokens if t not in self._registry.base_dict_keys}
-            unseen     = self._index.filter_unseen(list(candidates))
+        batcher = TokenBudgetBatcher(
+            token_budget, self._tokenizer.maxlen,
+            max_words=model_batch, pad_context=self._tokenizer.pad_context,
+        )
 
-            for i in range(0, len(unseen), model_batch):
-                chunk = unseen[i : i + model_batch]
+        try:
+            batch = tokenizer_cxx.get_batch()
+            while batch:
+                tokens     = batch["text"].split('\0')[:-1]
+                candidates = [t for t in tokens if t not in self._registry.base_dict_keys]
+                unseen     = self._index.filter_unseen(candidates)
 
-                encoded      = self._tokenizer.encode_batch(chunk)
-                logits       = self._model.predict(encoded)
-                rich_results = list(self._tokenizer.decode_predictions_detail(
-                    chunk, logits, self._model_name
-                ))
+                for words in batcher.add(unseen):
+                    self._infer_batch(words)
 
-                self._index.mark_seen(chunk)
-                self._registry.register(rich_results)
-                self._writer.write(rich_results)
+                batch = tokenizer_cxx.get_batch()
+        finally:
+            tokenizer_cxx.close()
 
-            batch = tokenizer_cxx.get_batch()
+        for words in batcher.flush():
+            self._infer_batch(words)
 
         self._writer.flush()
         logger.info(f"File '{file_path}' successfully processed (sequential).")
@@ -386,37 +768,101 @@ class Slovorez:
         batch_size: int = _DEFAULT_BATCH_SIZE,
         model_batch: int = _DEFAULT_MODEL_BATCH,
         max_workers: int = _DEFAULT_MAX_WORKERS,
+        memory_budget: Optional[int] = None,
+        token_budget: int = _DEFAULT_TOKEN_BUDGET,
+        inference_workers: Optional[int] = None,
     ) -> None:
         """Process a text file using multiprocessing.
 
-        Spawns separate CPU tokenizer workers, one GPU inference worker, and
-        one writer worker. Results are appended to the predictions log file.
+        Splits the file into byte-range shards (a compressed file is one
+        shard), spawns one CPU worker per shard, a pool of inference
+        workers and one writer worker. Results are appended to the
+        predictions log file.
 
         Worker roles:
-          - CPU workers (up to max_workers): tokenize, filter, encode -- forward
-            to gpu_queue.
-          - GPU worker (1): runs model inference -- forwards to result_queue.
-          - Writer worker (1): decodes logits and flushes to disk via LogWriter.
-
-        The main process feeds raw C++ batches into task_queue and waits for
-        all workers to finish before reloading the index from disk.
+          - CPU workers (one per shard): lex their own shard, filter, hand
+            each new word to the worker owning it (by fingerprint); each
+            drops repeats of its own share, batches and encodes the rest
+            -- forward to gpu_queue.
+          - Inference workers (``_plan_cores``): take batches from the
+            shared gpu_queue, run the model, reduce logits to tag ids and
+            scores -- forward to result_queue.
+          - Writer worker (1): decodes tag ids into morphemes and flushes
+            to disk via LogWriter.
+
+        The main process does no lexing; it only waits for all workers to
+        finish before reloading the index from disk, and logs how many
+        candidate words were cross-shard duplicates.
         """
-        # Snapshot immutable state for worker processes.
-        cache_snapshot   = self._index.snapshot()
-        base_dict_keys   = self._registry.base_dict_keys
+        abs_path = resolve_path(file_path)
+        if not abs_path.is_file():
+            raise FileNotFoundError(f"File not found: {abs_path}")
+
         tokenizer_config = self._tokenizer.to_config()
         min_len          = self._index.min_len
         max_len          = self._index.max_len
 
-        gpu_queue    = multiprocessing.Queue()
-        result_queue = multiprocessing.Queue()
-        task_queue   = multiprocessing.Queue(_DEFAULT_QUEUE_LIMIT)
+        # Builds the optimized model cache (if enabled) before the inference
+        # workers load the model, so they skip graph optimization.
+        if self._model.needs_optimized_model():
+            p = multiprocessing.Process(
+                target=_cache_worker,
+                args=(str(self._model.model_path), self._model.device, self._model.session_options),
+            )
+            p.start()
+            p.join()
+            if p.exitcode != 0:
+                logger.warning(
+                    "Could not build the optimized model cache; inference workers "
+                    "will optimize the graph themselves."
+                )
+        on_gpu = self._model.on_gpu
 
-        gpu_proc = multiprocessing.Process(
-            target=_gpu_worker,
-            args=(str(self._model.model_path), gpu_queue, result_queue),
+        n_tokenizers, n_inference, threads = _plan_cores(
+            _available_cores(), max_workers, on_gpu, inference_workers,
+            int(self._model.session_options["intra_op_num_threads"]),
         )
-        gpu_proc.start()
+        worker_session_options = {**self._model.session_options, "intra_op_num_threads": threads}
+
+        compression = detect_compression(abs_path)
+        if compression is None:
+            shards = _plan_shards(abs_path.stat().st_size, n_tokenizers)
+        else:
+            shards = [(0, None)]
+
+        queue_size = _DEFAULT_QUEUE_SIZE
+        if memory_budget is not None:
+            batch_size, model_batch, queue_size = _plan_memory(
+                memory_budget, len(shards), batch_size, model_batch,
+                self._tokenizer.maxlen, len(self._tokenizer.bies_vocab),
+            )
+            logger.info(
+                f"memory_budget={memory_budget}: batch_size={batch_size}, "
+                f"model_batch={model_batch}, queue_size={queue_size}."
+            )
+
+        # Bounded, so a slow consumer stalls its producers instead of
+        # letting batches pile up in memory. The CPU workers' inboxes are
+        # not: a worker blocked on a full inbox could never drain its own.
+        inboxes      = [multiprocessing.Queue() for _ in shards]
+        gpu_queue    = multiprocessing.Queue(maxsize=queue_size)
+        result_queue = multiprocessing.Queue(maxsize=queue_size)
+
+        logger.info(
+            f"Starting {n_inference} inference worker(s) with {threads or 'default'} "
+            f"thread(s) each on {'GPU' if on_gpu else 'CPU'}."
+        )
+        inference_procs: list[multiprocessing.Process] = []
+        for _ in range(n_inference):
+            p = multiprocessing.Process(
+                target=_gpu_worker,
+                args=(
+                    str(self._model.model_path), gpu_queue, result_queue,
+                    self._model.device, worker_session_options,
+                ),
+            )
+            p.start()
+            inference_procs.append(p)
 
         writer_proc = multiprocessing.Process(
             target=_writer_worker,
@@ -424,47 +870,49 @@ class Slovorez:
         )
         writer_proc.start()
 
-        active_workers: list[multiprocessing.Process] = []
+        dedup_stats = multiprocessing.Array("q", 2)
+        logger.info(f"Lexing '{abs_path.name}' in {len(shards)} shard(s).")
 
-        def _start_worker() -> None:
-            if len(active_workers) < max_workers:
+        # Words the CPU workers must skip, published once in shared memory.
+        known_words = self._index.share_snapshot(self._registry.base_dict_keys)
+        try:
+            active_workers: list[multiprocessing.Process] = []
+            for worker_id, (offset, length) in enumerate(shards):
                 w = multiprocessing.Process(
                     target=_cpu_worker,
                     args=(
-                        task_queue, gpu_queue, cache_snapshot, base_dict_keys,
-                        tokenizer_config, model_batch, min_len, max_len,
+                        str(abs_path), offset, length, batch_size, known_words,
+                        min_len, max_len, worker_id, inboxes, gpu_queue,
+                        tokenizer_config, model_batch, token_budget, dedup_stats,
                     ),
                 )
                 w.start()
                 active_workers.append(w)
 
-        _start_worker()
-
-        tokenizer_cxx = FFTokenizer(file_path)
-        tokenizer_cxx.set_batch_size(batch_size)
-        tokenizer_cxx.set_filter(TokenType.RUWORD)
-
-        batch = tokenizer_cxx.get_batch()
-        while batch:
-            try:
-                task_queue.put(batch, block=True, timeout=0.1)
-            except queue.Full:
-                _start_worker()
-                task_queue.put(batch, block=True)
-            batch = tokenizer_cxx.get_batch()
-
-        # Drain workers in order: CPU -> GPU -> writer.
-        for _ in active_workers:
-            task_queue.put(None)
-        for w in active_workers:
-            w.join()
+            # Drain workers in order: CPU -> inference -> writer.
+            for w in active_workers:
+                w.join()
+        finally:
+            known_words.close()
+            known_words.unlink()
 
-        gpu_queue.put(None)
-        gpu_proc.join()
+        for _ in inference_procs:
+            gpu_queue.put(None)
+        for p in inference_procs:
+            p.join()
 
         result_queue.put(None)
         writer_proc.join()
 
         # Sync main-process index with results written by the writer worker.
-        self._index.reload_from_jsonl(self._writer.path)
+        self._index.reload_from_log(self._writer.path)
+
+        received, forwarded = dedup_stats[:]
+        duplicates = received - forwarded
+        logger.info(
+            f"Inferred {forwarded:,} new word(s) once each; {duplicates:,} of "
+            f"{received:,} candidates were repeats from other shards "
+            f"(duplicate-inference ratio without cross-shard dedup: "
+            f"{duplicates / max(1, received):.1%})."
+        )
         logger.info(f"File '{file_path}' successfully processed (multiprocessing).")
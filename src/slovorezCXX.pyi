@@ -1,4 +1,5 @@
-from typing import List, Iterator, overload, Union
+import mmap
+from typing import List, Iterator, Optional, overload, Union
 from enum import Enum
 from pathlib import Path
 
@@ -12,49 +13,20 @@ class TokenType(Enum):
     PNCTTN: int
     UNKNWN: int
 
-class UTF8Char:
-    """UTF8Char Struct
-    Attributes:
-        data: char raw bytes
-        size: number of bytes in the char
-        char: encoded char
-    """
-    data: bytes
-    size: int
-    char: str
-
-# class Token:
-#     """Token Struct
-#     Attributes:
-#         data: list of UTF8Char
-#         size: number of UTF8Chars
-#         type: defined in slovorezCXX enum TokenType. Represents token type
-#         str: encoded string of token
-#     """
-#     data: List[UTF8Char]
-#     size: int
-#     type: TokenType
-#     str: str
-
-# class TokenVector:
-#     """Token Container
-#     """
-#     def __len__(self) -> int: ...
-    
-#     @overload
-#     def __getitem__(self, i: int) -> Token: ...
-    
-#     @overload
-#     def __getitem__(self, s: slice) -> List[Token]: ...
-    
-#     def __iter__(self) -> Iterator[Token]: ...
-
 class FFTokenizer:
     """From File (FF). Expects string with absolute path to the file containing text.
     
     Args:
         file_path: str or pathlib.Path, absolute path to the file.
         validated: bool, if `True` skips validation
+        use_mmap: bool, if `True` memory-maps the file and lexes it in place,
+            otherwise reads it in 1 MiB blocks. Falls back to block reads
+            where mmap is unavailable (Windows) or fails.
+        offset: int, first byte of the range to lex.
+        length: int or None, size of the range in bytes (None = up to EOF).
+            Both range ends are snapped forward to just after an ASCII
+            whitespace byte, so adjacent ranges tile the file without
+            splitting a token. The snapped range is available as `range`.
     
     Example:
         >>> s = FFTokenizer("data.txt")
@@ -62,17 +34,84 @@ class FFTokenizer:
         >>> s.set_batch_size(2048)
         
         >>> batch = s.get_batch()
+
+        >>> cols = s.get_batch_columnar()  # {"data": uint8, "offsets": int64, "types": uint64}
+
+        >>> s.set_unique(True)  # distinct tokens only, plus a uint32 "counts" array
+
+        >>> s.set_prefetch(True)  # lex batch N + 1 on a native thread, GIL released
+    """
+    range: tuple
+    def __init__(
+        self,
+        file_path: Union[str, Path],
+        validated: bool = False,
+        use_mmap: bool = True,
+        offset: int = 0,
+        length: Optional[int] = None,
+    ): ...
+    def get_batch(self): ...
+    def get_batch_columnar(self): ...
+    def set_batch_size(self, size: int) -> None: ...
+    def set_lowercase(self, lowercase: bool) -> None: ...
+    def set_unique(self, unique: bool) -> None: ...
+    def set_prefetch(self, prefetch: bool) -> None: ...
+    def is_fopen(self) -> bool: ...
+    def is_mmapped(self) -> bool: ...
+
+class FSTokenizer:
+    """From Stream (FS). Lexes a compressed file (gzip, bz2, xz, zstd)
+    decompressed on the fly by a background thread.
+
+    Args:
+        file_path: str or pathlib.Path, path to the compressed file.
+        validated: bool, if `True` skips validation
+        compression: str or None, "gzip", "bz2", "xz" or "zstd"; detected
+            from the magic bytes when None.
+        block_size: int, bytes decompressed per block (1 MiB).
+        queue_size: int, blocks the decompressor may run ahead of the lexer.
+
+    Example:
+        >>> s = FSTokenizer("corpus.txt.gz")
+
+        >>> batch = s.get_batch()
+
+        >>> s.close()  # stop decompressing when abandoning the stream early
+
+    The native base (`FSSentencer`) lexes whatever is pushed to it:
+    `feed(data)` queues a copy of a bytes-like block, blocking without the
+    GIL while the queue is full, and returns False once the input is closed;
+    `close_input()` marks the end of the input; `abort_input(message)` makes
+    the next `get_batch*()` raise RuntimeError(message).
     """
-    def __init__(self, file_path: Union[str, Path]): ...
+    compression: str
+    def __init__(
+        self,
+        file_path: Union[str, Path],
+        validated: bool = False,
+        compression: Optional[str] = None,
+        block_size: int = 1 << 20,
+        queue_size: int = 8,
+    ): ...
     def get_batch(self): ...
+    def get_batch_columnar(self): ...
     def set_batch_size(self, size: int) -> None: ...
+    def set_lowercase(self, lowercase: bool) -> None: ...
+    def set_unique(self, unique: bool) -> None: ...
+    def set_prefetch(self, prefetch: bool) -> None: ...
+    def feed(self, data: Union[bytes, bytearray, memoryview]) -> bool: ...
+    def close_input(self) -> None: ...
+    def abort_input(self, message: str) -> None: ...
+    def is_closed(self) -> bool: ...
+    def close(self) -> None: ...
     def is_fopen(self) -> bool: ...
 
 class FTTokenizer:
-    """From Text (FT). Expects the string.
+    """From Text (FT). Expects the string or a bytes-like object.
       
     Args:
-        text: str, input text to process
+        text: str, or a C-contiguous buffer of UTF-8 bytes (bytes,
+            bytearray, memoryview, mmap) that is lexed in place without a copy
         validated: bool, if `True` skips validation
     
     Example:
@@ -81,7 +120,44 @@ class FTTokenizer:
         >>> s.set_batch_size(2048)
         
         >>> batch = s.get_batch()
+
+        >>> cols = s.get_batch_columnar()  # {"data": uint8, "offsets": int64, "types": uint64}
+
+        >>> s.set_unique(True)  # distinct tokens only, plus a uint32 "counts" array
+
+        >>> s.set_prefetch(True)  # lex batch N + 1 on a native thread, GIL released
+
+        >>> with open("text.txt", "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        ...     s = FTTokenizer(mm)  # no copy of the mapping
     """
-    def __init__(self, text: str): ...
+    def __init__(self, text: Union[str, bytes, bytearray, memoryview, mmap.mmap]): ...
     def get_batch(self): ...
-    def set_batch_size(self, size: int) -> None: ...
\ No newline at end of file
+    def get_batch_columnar(self): ...
+    def set_batch_size(self, size: int) -> None: ...
+    def set_lowercase(self, lowercase: bool) -> None: ...
+    def set_unique(self, unique: bool) -> None: ...
+    def set_prefetch(self, prefetch: bool) -> None: ...
+class CharEncoder:
+    """Char-id encoder built from `config["mapping"]["tokenizer_vocab"]`.
+
+    Args:
+        vocab: dict, char -> id. Only one-char keys take part in the lookup.
+        maxlen: int, maximum encoded sequence length (longer words are truncated).
+        unk_id: int, id for chars missing from the vocab.
+        pad_id: int, id used for padding.
+        pad_context: int, pad positions kept after the longest word of a batch
+            (the model's receptive field); the matrix width is
+            min(longest + pad_context, maxlen).
+
+    Example:
+        >>> enc = CharEncoder(config["mapping"]["tokenizer_vocab"], 64, pad_context=6)
+
+        >>> matrix, lengths = enc.encode(["башня", "синева"])
+
+        >>> matrix, lengths = enc.encode_columnar(cols["data"], cols["offsets"])
+    """
+    maxlen: int
+    pad_context: int
+    def __init__(self, vocab: dict, maxlen: int, unk_id: int = 1, pad_id: int = 0, pad_context: int = 0): ...
+    def encode(self, words: List[str]): ...
+    def encode_columnar(self, data, offsets, indices=None): ...
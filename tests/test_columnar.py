@@ -0,0 +1,49 @@
+from slovorez.core.cache import LogWriter
+from slovorez.io.columnar import encode_chunk, read_records, read_words
+
+
+def _record(word: str, type_id: int = 3) -> dict:
+    return {
+        "word":       word,
+        "morphemes":  [[word, type_id, 0.5]],
+        "confidence": 0.5,
+        "model":      "test",
+        "repaired":   False,
+        "validated":  True,
+    }
+
+
+def test_append_after_torn_tail(tmp_path):
+    path = tmp_path / "predictions.slvc"
+    good = encode_chunk([_record("кот"), _record("пес")])
+    torn = encode_chunk([_record("дом")])[:-5]   # flush killed mid-write
+    path.write_bytes(good + torn)
+
+    writer = LogWriter(path)
+    writer.write([_record("лес")])
+    writer.flush()
+
+    assert [record["word"] for record in read_records(path)] == ["кот", "пес", "лес"]
+    _, end = read_words(path)
+    assert end == path.stat().st_size
+
+
+def test_torn_header_is_cut_too(tmp_path):
+    path = tmp_path / "predictions.slvc"
+    path.write_bytes(encode_chunk([_record("кот")]) + b"SLV")
+
+    writer = LogWriter(path)
+    writer.write([_record("лес")])
+    writer.flush()
+
+    assert read_words(path)[0] == ["кот", "лес"]
+
+
+def test_rejected_record_keeps_the_rest_of_the_batch(tmp_path):
+    path = tmp_path / "predictions.slvc"
+
+    writer = LogWriter(path)
+    writer.write([_record("кот"), _record("пес", type_id=-1), _record("лес")])
+    writer.flush()
+
+    assert read_words(path)[0] == ["кот", "лес"]
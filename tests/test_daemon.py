@@ -0,0 +1,61 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from slovorez.daemon import SlovorezClient, SlovorezDaemon
+
+ROOT  = Path(__file__).resolve().parents[1]
+MODEL = ROOT / "models" / "slovorez-test"
+
+
+@pytest.fixture(scope="module")
+def socket_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("daemon") / "slovorez.sock"
+    env  = dict(os.environ, PYTHONPATH=os.pathsep.join([str(ROOT / "src"), str(ROOT)]))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "slovorez.daemon", str(MODEL),
+         "--socket", str(path), "--output", str(path.with_suffix(".jsonl"))],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while not path.exists():
+        if proc.poll() is not None or time.monotonic() > deadline:
+            proc.kill()
+            pytest.fail("Slovorez daemon did not start")
+        time.sleep(0.1)
+    yield path
+    proc.terminate()
+    proc.wait()
+
+
+def test_socket_is_owner_only(socket_path):
+    assert socket_path.stat().st_mode & 0o777 == 0o600
+
+
+@pytest.mark.parametrize("text", ["", "  \n\t", b"", b" \n"])
+def test_predict_rejects_blank_text(socket_path, text):
+    with SlovorezClient(socket_path) as client:
+        with pytest.raises(ValueError):
+            client.predict(text)
+        assert client.predict("кот")   # connection still usable
+
+
+def test_refuses_to_replace_regular_file(tmp_path):
+    path = tmp_path / "not-a-socket"
+    path.write_text("keep")
+    with pytest.raises(FileExistsError):
+        SlovorezDaemon(model=None, socket_path=path)._remove_stale_socket()
+    assert path.read_text() == "keep"
+
+
+def test_replaces_stale_socket(tmp_path):
+    path = tmp_path / "stale.sock"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(str(path))   # bound but never listening, like a dead daemon's
+    SlovorezDaemon(model=None, socket_path=path)._remove_stale_socket()
+    assert not path.exists()
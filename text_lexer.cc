@@ -1,72 +1,131 @@
 #include "text_lexer.h"
 
-static inline void _slovorez_lexer_token_insert_utf8_char(Token* token, UTF8Char* utf8c)
+typedef struct CharClassTable {
+    uint8_t types[SLOVOREZ_CHAR_TABLE_SIZE];
+
+    void set(uint32_t first, uint32_t last, TokenType type)
+    {
+        for (uint32_t cp = first; cp <= last; ++cp)
+        {
+            this->types[cp] = (uint8_t)type;
+        }
+    }
+
+    CharClassTable()
+    {
+        this->set(0x0000, SLOVOREZ_CHAR_TABLE_SIZE - 1, TokenType::UNKNWN);
+        this->set(0x000A, 0x000A, TokenType::NWLINE);   // New line
+        this->set(0x0020, 0x0020, TokenType::WRDSPC);   // Space
+        this->set(0x00A0, 0x00A0, TokenType::WRDSPC);   // No-break space
+        this->set(0x0030, 0x0039, TokenType::NUMBER);   // 0-9
+        this->set(0x0041, 0x005A, TokenType::ENWORD);   // A-Z
+        this->set(0x0061, 0x007A, TokenType::ENWORD);   // a-z
+        this->set(0x0401, 0x0401, TokenType::RUWORD);   // Ё
+        this->set(0x0410, 0x044F, TokenType::RUWORD);   // А-я
+        this->set(0x0451, 0x0451, TokenType::RUWORD);   // ё
+        this->set(0x0021, 0x002F, TokenType::PNCTTN);   // ! " # $ % & ' ( ) * + , - . /
+        this->set(0x003A, 0x0040, TokenType::PNCTTN);   // : ; < = > ? @
+        this->set(0x005B, 0x0060, TokenType::PNCTTN);   // [ \ ] ^ _ `
+        this->set(0x007B, 0x007E, TokenType::PNCTTN);   // { | } ~
+        this->set(0x00AB, 0x00AB, TokenType::PNCTTN);   // «
+        this->set(0x00B7, 0x00B7, TokenType::PNCTTN);   // ·
+        this->set(0x00BB, 0x00BB, TokenType::PNCTTN);   // »
+        this->set(0x2010, 0x201F, TokenType::PNCTTN);   // ‐ ‑ ‒ – — ― ‖ ‗ ' ' ‚ ‛ " " „ ‟
+        this->set(0x2024, 0x2027, TokenType::PNCTTN);   // ․ ‥ … ‧
+        this->set(0x2116, 0x2116, TokenType::PNCTTN);   // №
+    }
+} CharClassTable;
+
+static const CharClassTable SLOVOREZ_CHAR_TABLE;
+
+TokenType slovorez_get_cp_tt(uint32_t cp)
 {
-    memcpy(&token->data[token->size++], utf8c, sizeof(UTF8Char));
+    if (cp < SLOVOREZ_CHAR_TABLE_SIZE)
+    {
+        return (TokenType)SLOVOREZ_CHAR_TABLE.types[cp];
+    }
+    return TokenType::UNKNWN;
 }
 
-static inline void _slovorez_lexer_new_token(LexerContext* lctx)
+static inline bool _slovorez_lexer_is_run_type(TokenType type)
 {
-    lctx->ctxtoken.type = slovorez_get_utf8_tt(lctx->utf8c);
-    _slovorez_lexer_token_insert_utf8_char(&lctx->ctxtoken, &lctx->utf8c);
+    return type == TokenType::ENWORD || type == TokenType::NUMBER || type == TokenType::RUWORD;
 }
 
-static inline void _slovorez_lexer_token_finalize(LexerContext* lctx)
+void slovorez_lexer_init(LexerContext* lctx)
 {
-    lctx->rtoken = lctx->ctxtoken;
-    memset(&lctx->ctxtoken, 0, sizeof(Token));
+    memset(lctx, 0, sizeof(LexerContext));
 }
 
-static bool _slovorez_lexer_token_try_finalize(LexerContext* lctx)
+bool slovorez_lexer_next(LexerContext* lctx, const unsigned char* data, size_t len, size_t* pos, bool eof)
 {
-    switch (lctx->ctxtoken.type)
+    Token& ctx = lctx->ctxtoken;
+    size_t i = *pos;
+    while (i < len)
     {
-        case TokenType::NOTTKN:
+        const unsigned char c = data[i];
+        size_t n = 1;
+        TokenType type;
+        if (c < 0x80)
         {
-            _slovorez_lexer_new_token(lctx);
-            return false;
+            type = (TokenType)SLOVOREZ_CHAR_TABLE.types[c];
         }
-        case TokenType::ENWORD:
-        case TokenType::NUMBER:
-        case TokenType::RUWORD:
+        else
         {
-            TokenType utf8_tt = slovorez_get_utf8_tt(lctx->utf8c);
-            if (lctx->ctxtoken.type == utf8_tt)
+            n = slovorez_utf8_decoder_char_size(c);
+            if (n > 1 && i + n > len && !eof)
             {
-                _slovorez_lexer_token_insert_utf8_char(&lctx->ctxtoken, &lctx->utf8c);
-                return false;
+                break;
             }
-            _slovorez_lexer_token_finalize(lctx);
-            _slovorez_lexer_new_token(lctx);
-            return true;
+            size_t k = i;
+            const uint32_t cp = slovorez_utf8_decode(data, len, k);
+            n = k - i;
+            type = n > 1 ? slovorez_get_cp_tt(cp) : TokenType::UNKNWN;
+        }
+
+        if (ctx.type == type && _slovorez_lexer_is_run_type(type))
+        {
+            ctx.bytes += n;
+            ctx.size++;
+            i += n;
+            continue;
+        }
+
+        const bool ready = ctx.type != TokenType::NOTTKN;
+        if (ready)
+        {
+            lctx->rtoken = ctx;
         }
-        case TokenType::PNCTTN:
-        case TokenType::WRDSPC:
-        case TokenType::NWLINE:
-        case TokenType::UNKNWN:
+        ctx.start = i;
+        ctx.bytes = n;
+        ctx.size = 1;
+        ctx.type = type;
+        i += n;
+        if (ready)
         {
-            _slovorez_lexer_token_finalize(lctx);
-            _slovorez_lexer_new_token(lctx);
+            *pos = i;
             return true;
         }
     }
+    *pos = i;
     return false;
 }
 
-void slovorez_lexer_init(LexerContext* lctx)
+bool slovorez_lexer_token_flush(LexerContext* lctx)
 {
-    memset(&lctx->rtoken, 0, sizeof(Token));
+    if (lctx->ctxtoken.type == TokenType::NOTTKN)
+    {
+        return false;
+    }
+    lctx->rtoken = lctx->ctxtoken;
     memset(&lctx->ctxtoken, 0, sizeof(Token));
-    slovorez_utf8_decoder_char_reset(&lctx->utf8c);
+    return true;
 }
 
-bool slovorez_lexer_token_get(LexerContext* lctx, unsigned char c)
+void slovorez_lexer_rebase(LexerContext* lctx, size_t shift)
 {
-    if (!slovorez_utf8_decoder_char_get(&lctx->utf8c, c))
+    if (lctx->ctxtoken.type != TokenType::NOTTKN)
     {
-        return false;
+        lctx->ctxtoken.start -= shift;
     }
-    bool token_ready = _slovorez_lexer_token_try_finalize(lctx);
-    slovorez_utf8_decoder_char_reset(&lctx->utf8c);
-    return token_ready;
 }
@@ -4,21 +4,6 @@
 #include <cstring>
 #include <cstdint>
 
-typedef struct UTF8Char {
-    unsigned char data[4];
-    size_t size;
-
-    inline uint32_t get_bval() const
-    {
-        uint32_t value = 0;
-        for (int i = 0; i < this->size; ++i)
-        {
-            value = (value << 8) | (unsigned char)this->data[i];
-        }
-        return value;
-    }
-} UTF8Char;
-
 constexpr unsigned char UTF8_1BYTE_MASK = 0x80;
 constexpr unsigned char UTF8_1BYTE_SGNT = 0x00; // 0yyyzzzz
 constexpr unsigned char UTF8_2BYTE_MASK = 0xE0;
@@ -37,22 +22,89 @@ inline size_t slovorez_utf8_decoder_char_size(unsigned char c)
     return 0;
 }
 
-inline void slovorez_utf8_decoder_char_reset(UTF8Char* utf8c)
+// Returns the byte length of the well-formed UTF-8 char starting at s[i], or
+// 0 if the lead byte is invalid, the sequence is truncated by n, or a
+// continuation byte is missing.
+inline size_t slovorez_utf8_valid_size(const unsigned char* s, size_t n, size_t i)
+{
+    const size_t size = slovorez_utf8_decoder_char_size(s[i]);
+    if (size == 0 || i + size > n)
+    {
+        return 0;
+    }
+    for (size_t k = 1; k < size; ++k)
+    {
+        if ((s[i + k] & 0xC0) != 0x80)
+        {
+            return 0;
+        }
+    }
+    return size;
+}
+
+// Decodes the code point starting at s[i] and advances i past it. Invalid or
+// truncated sequences decode to the single lead byte, so the walk always
+// makes progress.
+inline uint32_t slovorez_utf8_decode(const unsigned char* s, size_t n, size_t& i)
+{
+    const unsigned char c = s[i];
+    const size_t size = slovorez_utf8_valid_size(s, n, i);
+    if (size <= 1)
+    {
+        ++i;
+        return c;
+    }
+    uint32_t cp = c & (0xFF >> (size + 1));
+    for (size_t k = 1; k < size; ++k)
+    {
+        cp = (cp << 6) | (s[i + k] & 0x3F);
+    }
+    i += size;
+    return cp;
+}
+
+// Counts code points in a UTF-8 span (every byte that is not a continuation).
+inline size_t slovorez_utf8_strlen(const unsigned char* s, size_t n)
 {
-    memset(utf8c, 0, sizeof(UTF8Char));
+    size_t len = 0;
+    for (size_t i = 0; i < n; ++i)
+    {
+        len += (s[i] & 0xC0) != 0x80;
+    }
+    return len;
 }
 
-inline bool slovorez_utf8_decoder_char_get(UTF8Char* utf8c, unsigned char c)
+// Lowercases Latin (A-Z) and Russian (А-Я, Ё) letters of a UTF-8 byte span
+// in place. Every mapping keeps the encoded length, so offsets stay valid.
+inline void slovorez_utf8_lower_inplace(unsigned char* s, size_t n)
 {
-    if (utf8c->size >= 4)
+    for (size_t i = 0; i < n; ++i)
     {
-        slovorez_utf8_decoder_char_reset(utf8c);
+        unsigned char c = s[i];
+        if (c >= 'A' && c <= 'Z')
+        {
+            s[i] = c + 0x20;
+        }
+        else if (c == 0xD0 && i + 1 < n)
+        {
+            unsigned char c1 = s[i + 1];
+            if (c1 >= 0x90 && c1 <= 0x9F)           // А-П -> а-п
+            {
+                s[i + 1] = c1 + 0x20;
+            }
+            else if (c1 >= 0xA0 && c1 <= 0xAF)      // Р-Я -> р-я
+            {
+                s[i] = 0xD1;
+                s[i + 1] = c1 - 0x20;
+            }
+            else if (c1 == 0x81)                    // Ё -> ё
+            {
+                s[i] = 0xD1;
+                s[i + 1] = 0x91;
+            }
+            ++i;
+        }
     }
-    // issue unresolved.
-    // segfaults without if check-reset.
-    // can be caused by slovorez_utf8_decoder_char_size receiving improper signature
-    utf8c->data[utf8c->size++] = c;
-    return (utf8c->size == slovorez_utf8_decoder_char_size(utf8c->data[0]));
 }
 
 #endif // SLOVOREZ_UTF8_DECODER_H